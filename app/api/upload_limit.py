@@ -0,0 +1,52 @@
+from typing import Dict
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from starlette.routing import compile_path
+
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+
+class UploadSizeLimitMiddleware:
+    def __init__(self, app, limits: Dict[str, int]):
+        self.app = app
+        self.limits = [(compile_path(path)[0], limit) for path, limit in limits.items()]
+
+    async def __call__(self, scope, receive, send):
+        limit = None
+        if scope["type"] == "http":
+            path = scope.get("path", "")
+            limit = next((limit for regex, limit in self.limits if regex.match(path)), None)
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        max_bytes = limit + MULTIPART_OVERHEAD_BYTES
+        detail = f"Archivo muy grande (máximo {limit // (1024 * 1024)}MB)"
+
+        content_length = dict(scope["headers"]).get(b"content-length")
+        if content_length is not None:
+            try:
+                declared = int(content_length)
+            except ValueError:
+                declared = -1
+            if declared < 0:
+                response = JSONResponse(status_code=400, content={"detail": "Cabecera Content-Length inválida"})
+                await response(scope, receive, send)
+                return
+            if declared > max_bytes:
+                response = JSONResponse(status_code=413, content={"detail": detail})
+                await response(scope, receive, send)
+                return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > max_bytes:
+                    raise HTTPException(status_code=413, detail=detail)
+            return message
+
+        await self.app(scope, limited_receive, send)
@@ -1,12 +1,18 @@
+from typing import Optional
 from fastapi import APIRouter, Depends, Query, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from app.schemas.session import (
     SessionActivateResponse,
     VoiceData,
     SessionPauseRequest,
     SessionPauseResponse,
+    SessionScoresResponse,
     ActiveSessionsResponse
 )
-from app.services.session_service import SessionService
+from app.config import settings
+from app.core.voice_matcher import VoiceMatcher
+from app.dependencies import get_voice_repository
+from app.services.session_service import IdentificationSuperseded, SessionService
 from app.utils.audio_buffer import AudioBuffer
 from app.websocket.audiohook_protocol import AudioHookProtocolHandler
 
@@ -32,13 +38,38 @@ def get_session_service() -> SessionService:
 @router.post("/activate", response_model=SessionActivateResponse)
 async def activate_session(
     conversation_id: str = Query(..., min_length=1, description="ID de la conversación a activar"),
-    threshold: float = Query(0.75, ge=0.0, le=1.0, description="Umbral de similitud"),
+    threshold: Optional[float] = Query(
+        None,
+        ge=0.0,
+        le=1.0,
+        description=(
+            "Umbral de similitud coseno (por defecto DEFAULT_THRESHOLD). Con normalización de score "
+            "activa no se admite: se usa SCORE_NORM_THRESHOLD"
+        )
+    ),
+    top_k: int = Query(0, ge=0, le=settings.RESULT_TOP_K, description="Incluir los k mejores scores"),
+    continuous: bool = Query(
+        settings.CONTINUOUS_VERIFICATION,
+        description="Seguir verificando al hablante durante toda la llamada"
+    ),
     service: SessionService = Depends(get_session_service)
 ):
+    if threshold is not None and get_voice_repository().get_score_normalizer() is not None:
+        raise HTTPException(
+            status_code=400,
+            detail=(
+                f"Con normalización de score ({settings.SCORE_NORM}) el umbral se fija con "
+                f"SCORE_NORM_THRESHOLD={settings.SCORE_NORM_THRESHOLD}"
+            )
+        )
+
     protocol_handler.activate_session(conversation_id)
-    service.activate_session(conversation_id, threshold)
+    service.activate_session(conversation_id, threshold, continuous)
 
-    identification_result = await service.wait_for_identification(conversation_id, timeout=30.0)
+    try:
+        identification_result = await service.wait_for_identification(conversation_id, timeout=30.0)
+    except IdentificationSuperseded as e:
+        raise HTTPException(status_code=409, detail=str(e))
 
     if identification_result is None:
         raise HTTPException(
@@ -50,10 +81,25 @@ async def activate_session(
         identified=identification_result.get("identified", False),
         data=VoiceData(
             name=identification_result.get("person_id")
-        )
+        ),
+        scores=dict(list(identification_result.get("all_scores", {}).items())[:top_k]) if top_k else None
     )
 
 
+@router.get("/{conversation_id}/scores", response_model=SessionScoresResponse)
+async def get_session_scores(conversation_id: str, service: SessionService = Depends(get_session_service)):
+    embedding = service.get_last_embedding(conversation_id)
+    if embedding is None:
+        raise HTTPException(status_code=404, detail=f"Sin identificación para la conversación '{conversation_id}'")
+
+    voice_index, sample_index, score_normalizer = get_voice_repository().snapshot()
+    scores = await run_in_threadpool(
+        VoiceMatcher.score_all, embedding, voice_index, sample_index, score_normalizer
+    )
+
+    return SessionScoresResponse(conversation_id=conversation_id, scores=scores, total=len(scores))
+
+
 @router.post("/pause", response_model=SessionPauseResponse)
 async def pause_session(request: SessionPauseRequest, service: SessionService = Depends(get_session_service)):
     result = service.pause_session(request.conversation_id)
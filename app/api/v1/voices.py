@@ -1,26 +1,41 @@
-import os
-import uuid
+import json
+import tarfile
+import tempfile
+import zipfile
 from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Depends
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from app.schemas.voice import (
     VoiceRegisterResponse,
     VoiceInfoResponse,
     VoicesListResponse,
-    VoiceDeleteResponse
+    VoiceDeleteResponse,
+    VoiceSampleResponse
 )
 from app.services.voice_service import VoiceService
-from app.repositories.voice_repository import VoiceRepository
+from app.services.enrollment_service import EnrollmentService, items_from_archive
+from app.core.embedding_generator import EmbeddingGenerator
+from app.dependencies import get_inference_executor, get_model_manager, get_voice_repository
 from app.config import settings
 
 router = APIRouter(prefix="/voices", tags=["voices"])
 
-voice_repository = VoiceRepository()
-voice_service = VoiceService(voice_repository)
+voice_service = VoiceService(get_voice_repository())
 
 
 def get_voice_service() -> VoiceService:
     return voice_service
 
 
+def get_enrollment_service() -> EnrollmentService:
+    return EnrollmentService(
+        get_voice_repository(),
+        EmbeddingGenerator(get_model_manager().get_classifier(), get_inference_executor()),
+        decode_workers=settings.BULK_ENROLL_DECODE_WORKERS,
+        batch_size=settings.BULK_ENROLL_BATCH_SIZE
+    )
+
+
 @router.post("/register", response_model=VoiceRegisterResponse)
 async def register_voice(
     audio: UploadFile = File(...),
@@ -35,16 +50,12 @@ async def register_voice(
 
     person_id = person_id.strip()
 
-    os.makedirs(settings.AUDIO_TMP, exist_ok=True)
-
-    temp_path = os.path.join(settings.AUDIO_TMP, f"{uuid.uuid4()}.wav")
+    max_bytes = settings.MAX_FILE_SIZE_MB * 1024 * 1024
+    if audio.size is not None and audio.size > max_bytes:
+        raise HTTPException(status_code=413, detail=f"Archivo muy grande (máximo {settings.MAX_FILE_SIZE_MB}MB)")
 
     try:
-        with open(temp_path, "wb") as f:
-            content = await audio.read()
-            f.write(content)
-
-        result = service.register_voice(temp_path, person_id)
+        result = await run_in_threadpool(service.register_voice, audio.file, person_id)
 
         return VoiceRegisterResponse(**result)
 
@@ -52,9 +63,75 @@ async def register_voice(
         raise HTTPException(status_code=409, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
-    finally:
-        if os.path.exists(temp_path):
-            os.remove(temp_path)
+
+
+@router.post("/register/bulk")
+async def register_voices_bulk(
+    archive: UploadFile = File(...),
+    service: EnrollmentService = Depends(get_enrollment_service)
+):
+    filename = archive.filename.lower()
+    if not filename.endswith((".zip", ".tar", ".tar.gz", ".tgz")):
+        raise HTTPException(status_code=400, detail="Solo se permiten archivos .zip o .tar(.gz)")
+
+    max_bytes = settings.BULK_ENROLL_MAX_ARCHIVE_MB * 1024 * 1024
+    spooled = tempfile.SpooledTemporaryFile(max_size=64 * 1024 * 1024)
+
+    try:
+        size = 0
+        while chunk := await archive.read(1024 * 1024):
+            size += len(chunk)
+            if size > max_bytes:
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"Archivo muy grande (máximo {settings.BULK_ENROLL_MAX_ARCHIVE_MB}MB)"
+                )
+            spooled.write(chunk)
+        spooled.seek(0)
+
+        items = await run_in_threadpool(items_from_archive, spooled, filename)
+    except HTTPException:
+        spooled.close()
+        raise
+    except (zipfile.BadZipFile, tarfile.TarError, KeyError, ValueError, EOFError) as e:
+        spooled.close()
+        raise HTTPException(status_code=400, detail=f"Archivo comprimido inválido: {e}")
+    except Exception:
+        spooled.close()
+        raise
+
+    async def progress():
+        try:
+            async for event in service.enroll(items):
+                yield json.dumps(event, ensure_ascii=False) + "\n"
+        except ValueError as e:
+            yield json.dumps({"status": "error", "error": str(e)}, ensure_ascii=False) + "\n"
+        finally:
+            spooled.close()
+
+    return StreamingResponse(progress(), media_type="application/x-ndjson")
+
+
+@router.post("/{person_id}/samples", response_model=VoiceSampleResponse)
+async def add_voice_sample(
+    person_id: str,
+    audio: UploadFile = File(...),
+    service: VoiceService = Depends(get_voice_service)
+):
+    if not audio.filename.endswith('.wav'):
+        raise HTTPException(status_code=400, detail="Solo se permiten archivos WAV")
+
+    max_bytes = settings.MAX_FILE_SIZE_MB * 1024 * 1024
+    if audio.size is not None and audio.size > max_bytes:
+        raise HTTPException(status_code=413, detail=f"Archivo muy grande (máximo {settings.MAX_FILE_SIZE_MB}MB)")
+
+    try:
+        result = await run_in_threadpool(service.add_voice_sample, audio.file, person_id)
+        return VoiceSampleResponse(**result)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.get("/list", response_model=VoicesListResponse)
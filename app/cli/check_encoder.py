@@ -0,0 +1,59 @@
+import argparse
+import time
+import torch
+import torchaudio
+from app.config import settings
+from app.core.optimized_encoder import BACKENDS, BACKEND_EAGER, OptimizedEncoder, check_parity, warm_up
+
+
+def load_waveforms(paths):
+    waveforms = []
+    for path in paths:
+        waveform, sr = torchaudio.load(path)
+        if sr != settings.SAMPLE_RATE:
+            waveform = torchaudio.functional.resample(waveform, sr, settings.SAMPLE_RATE)
+        waveforms.append(waveform.mean(dim=0, keepdim=True))
+    return waveforms
+
+
+def time_encoder(encoder, waveforms, runs: int) -> float:
+    start = time.perf_counter()
+    with torch.no_grad():
+        for _ in range(runs):
+            for waveform in waveforms:
+                encoder.encode_batch(waveform)
+    return (time.perf_counter() - start) / (runs * len(waveforms))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara backends optimizados del encoder contra fp32")
+    parser.add_argument("wavs", nargs="+", help="Archivos WAV de referencia")
+    parser.add_argument("--backend", action="append", choices=BACKENDS, help="Backend(s) a evaluar")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    from speechbrain.pretrained import EncoderClassifier
+    classifier = EncoderClassifier.from_hparams(
+        source=settings.MODEL_DIR,
+        savedir=settings.MODEL_DIR,
+        run_opts={"device": "cpu"}
+    )
+
+    waveforms = load_waveforms(args.wavs)
+    warm_up(classifier, settings.TARGET_DURATION_SEC, settings.SAMPLE_RATE)
+    baseline = time_encoder(classifier, waveforms, args.runs)
+    print(f"{BACKEND_EAGER:12s} {baseline * 1000:8.1f} ms/embedding")
+
+    for backend in args.backend or [b for b in BACKENDS if b != BACKEND_EAGER]:
+        encoder = OptimizedEncoder(classifier, backend, settings.MODEL_DIR, settings.SAMPLE_RATE)
+        warm_up(encoder, settings.TARGET_DURATION_SEC, settings.SAMPLE_RATE)
+        report = check_parity(classifier, encoder, waveforms)
+        elapsed = time_encoder(encoder, waveforms, args.runs)
+        print(
+            f"{backend:12s} {elapsed * 1000:8.1f} ms/embedding  x{baseline / elapsed:4.2f}  "
+            f"coseno min={report['min_cosine']:.5f} media={report['mean_cosine']:.5f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
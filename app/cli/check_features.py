@@ -0,0 +1,50 @@
+import argparse
+import numpy as np
+import torch
+from app.cli.check_encoder import load_waveforms
+from app.config import settings
+from app.core.streaming_features import check_feature_equivalence, window_lengths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara el Fbank incremental cacheado contra el cálculo de una pasada")
+    parser.add_argument("wavs", nargs="+", help="Archivos WAV de referencia")
+    parser.add_argument("--chunk-ms", type=float, default=100.0, help="Tamaño de los chunks simulados")
+    parser.add_argument("--max-error", type=float, default=1e-3, help="Error absoluto máximo admitido en features")
+    parser.add_argument("--min-cosine", type=float, default=0.9999, help="Coseno mínimo admitido entre embeddings")
+    args = parser.parse_args()
+
+    from app.core.embedding_generator import EmbeddingGenerator
+    from app.dependencies import get_model_manager
+
+    generator = EmbeddingGenerator(get_model_manager().get_classifier())
+    signals = [waveform.reshape(-1).numpy() for waveform in load_waveforms(args.wavs)]
+    chunk_samples = max(1, int(args.chunk_ms * settings.SAMPLE_RATE / 1000))
+
+    report = check_feature_equivalence(generator.classifier.mods.compute_features, signals, chunk_samples)
+
+    cosines = []
+    for signal in signals:
+        stream = generator.create_feature_stream(signal.shape[0])
+        for start in range(0, signal.shape[0], chunk_samples):
+            stream.append(signal[start:start + chunk_samples])
+
+        for length in window_lengths(signal.shape[0], stream.hop):
+            window = signal[signal.shape[0] - stream.window_samples(length):]
+            expected = generator.generate_embedding(torch.from_numpy(window).unsqueeze(0)).reshape(-1)
+            actual = generator.generate_embeddings_from_features([stream.features(signal[signal.shape[0] - length:])]).reshape(-1)
+            cosines.append(float(np.dot(expected, actual) / (np.linalg.norm(expected) * np.linalg.norm(actual))))
+
+    min_cosine = min(cosines)
+    print(f"features: {report['samples']} audios, {report['windows']} ventanas, error máximo {report['max_abs_error']:.2e}")
+    print(f"embeddings: coseno min={min_cosine:.6f} media={float(np.mean(cosines)):.6f}")
+
+    if report["max_abs_error"] > args.max_error or min_cosine < args.min_cosine:
+        print("El camino incremental NO es equivalente al de una pasada")
+        raise SystemExit(1)
+
+    print("El camino incremental es equivalente al de una pasada")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+import argparse
+import asyncio
+import json
+from app.config import settings
+from app.core.embedding_generator import EmbeddingGenerator
+from app.dependencies import get_model_manager, get_voice_repository
+from app.services.enrollment_service import EnrollmentService, items_from_archive, items_from_directory
+
+
+async def run(source: str, decode_workers: int, batch_size: int) -> dict:
+    service = EnrollmentService(
+        get_voice_repository(),
+        EmbeddingGenerator(get_model_manager().get_classifier()),
+        decode_workers=decode_workers,
+        batch_size=batch_size
+    )
+
+    if source.lower().endswith((".zip", ".tar", ".tar.gz", ".tgz")):
+        with open(source, "rb") as f:
+            return await _print_progress(service, items_from_archive(f, source))
+
+    return await _print_progress(service, items_from_directory(source))
+
+
+async def _print_progress(service: EnrollmentService, items) -> dict:
+    summary = {}
+    async for event in service.enroll(items):
+        print(json.dumps(event, ensure_ascii=False), flush=True)
+        summary = event
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Registra voces en lote desde un zip/tar, un directorio o un manifiesto person_id,wav")
+    parser.add_argument("source", help="Archivo .zip/.tar, directorio con .wav o manifest.csv")
+    parser.add_argument("--workers", type=int, default=settings.BULK_ENROLL_DECODE_WORKERS)
+    parser.add_argument("--batch-size", type=int, default=settings.BULK_ENROLL_BATCH_SIZE)
+    args = parser.parse_args()
+
+    summary = asyncio.run(run(args.source, args.workers, args.batch_size))
+    get_voice_repository().persist_index()
+
+    if summary.get("failed"):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
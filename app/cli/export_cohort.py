@@ -0,0 +1,21 @@
+import argparse
+import numpy as np
+from app.repositories.voice_repository import VoiceRepository
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exporta los centroides registrados como cohorte de impostores (.npy)")
+    parser.add_argument("output", help="Ruta del archivo .npy (usar en SCORE_NORM_COHORT_PATH)")
+    args = parser.parse_args()
+
+    embeddings = VoiceRepository().get_all_embeddings()
+    if not embeddings:
+        raise SystemExit("No hay voces registradas")
+
+    cohort = np.stack(list(embeddings.values())).astype(np.float32)
+    np.save(args.output, cohort)
+    print(f"Cohorte de {cohort.shape[0]} voces exportada en {args.output}")
+
+
+if __name__ == "__main__":
+    main()
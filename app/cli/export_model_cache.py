@@ -0,0 +1,33 @@
+import argparse
+import time
+from app.config import settings
+from app.core.model_cache import CACHE_PARITY_MIN_COSINE, export_verified_model_cache, load_model_cache
+from app.core.optimized_encoder import parity_waveforms
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exporta el encoder ECAPA a un artefacto mmap para arranque rápido")
+    parser.add_argument("--output", default=settings.MODEL_CACHE_PATH)
+    args = parser.parse_args()
+
+    from speechbrain.pretrained import EncoderClassifier
+    classifier = EncoderClassifier.from_hparams(
+        source=settings.MODEL_DIR,
+        savedir=settings.MODEL_DIR,
+        run_opts={"device": "cpu"}
+    )
+
+    waveforms = parity_waveforms((3.0, settings.TARGET_DURATION_SEC), settings.SAMPLE_RATE)
+    cached, report = export_verified_model_cache(classifier, args.output, settings.MODEL_DIR, waveforms)
+    print(f"Paridad vs from_hparams: coseno mínimo={report['min_cosine']:.6f} ({report['samples']} audios)")
+    if cached is None:
+        print(f"La caché no reproduce el modelo original (mínimo {CACHE_PARITY_MIN_COSINE}) - descartada")
+        raise SystemExit(1)
+
+    start = time.perf_counter()
+    load_model_cache(args.output)
+    print(f"Caché exportada en {args.output} (carga: {time.perf_counter() - start:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
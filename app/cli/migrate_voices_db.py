@@ -0,0 +1,32 @@
+import argparse
+import os
+from app.config import settings
+from app.repositories.embedding_store import EmbeddingStore, import_npy_directory
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migra embeddings .npy al almacén de voces")
+    parser.add_argument("--source", default=settings.VOICES_DB, help="Directorio con archivos {persona_id}.npy")
+    parser.add_argument("--remove-npy", action="store_true", help="Elimina los .npy migrados")
+    args = parser.parse_args()
+
+    store = EmbeddingStore(
+        settings.VOICES_DB,
+        compaction_ratio=settings.VOICE_STORE_COMPACTION_RATIO,
+        compaction_min_rows=settings.VOICE_STORE_COMPACTION_MIN_ROWS
+    )
+
+    imported = import_npy_directory(store, args.source)
+    print(f"{imported} voces migradas ({len(store)} en total) -> {store.embeddings_path}")
+
+    if args.remove_npy:
+        removed = 0
+        for file in os.listdir(args.source):
+            if file.endswith(".npy") and file[:-len(".npy")] in store:
+                os.remove(os.path.join(args.source, file))
+                removed += 1
+        print(f"{removed} archivos .npy eliminados")
+
+
+if __name__ == "__main__":
+    main()
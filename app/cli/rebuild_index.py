@@ -0,0 +1,29 @@
+import argparse
+import time
+from app.config import settings
+from app.repositories.voice_repository import VoiceRepository
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reconstruye el índice de voces desde voices_db")
+    parser.add_argument("--type", dest="index_type", default=None, help="matrix | flat | ivf | hnsw")
+    args = parser.parse_args()
+
+    if args.index_type:
+        settings.VOICE_INDEX_TYPE = args.index_type
+
+    repository = VoiceRepository()
+
+    start = time.perf_counter()
+    repository.rebuild_index()
+    repository.persist_index()
+    elapsed = time.perf_counter() - start
+
+    print(
+        f"Índice '{settings.VOICE_INDEX_TYPE}' reconstruido con "
+        f"{len(repository.get_voice_index())} voces en {elapsed:.2f}s -> {settings.VOICE_INDEX_PATH}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -12,16 +12,88 @@ class Settings(BaseSettings):
     MODEL_DIR: str = os.path.join(BASE_DIR, "models", "spkrec-ecapa-voxceleb")
     VOICES_DB: str = os.path.join(BASE_DIR, "voices_db")
     AUDIO_TMP: str = os.path.join(BASE_DIR, "audio_tmp")
+    MODEL_CACHE_ENABLED: bool = True
+    MODEL_CACHE_PATH: str = os.path.join(MODEL_DIR, "encoder_cache.pt")
 
     SAMPLE_RATE: int = 16000
     CHANNELS: int = 1
+    L16_BYTE_ORDER: str = "little"
+    AUDIOHOOK_PREFER_L16: bool = True
+    AUDIOHOOK_IDENTIFY_CHANNELS: str = "external"
     MIN_DURATION_SEC: float = 8.0
     MAX_DURATION_SEC: float = 15.0
     TARGET_DURATION_SEC: float = 10.0
+    PROGRESSIVE_IDENTIFICATION: bool = False
+    PROGRESSIVE_MIN_SEC: float = 3.0
+    PROGRESSIVE_STEP_SEC: float = 2.0
+    PROGRESSIVE_MARGIN: float = 0.05
+    CONTINUOUS_VERIFICATION: bool = False
+    CONTINUOUS_WINDOW_SEC: float = 6.0
+    CONTINUOUS_HOP_SEC: float = 2.0
+    CONTINUOUS_MAX_HOP_SEC: float = 16.0
+    CONTINUOUS_HOP_BACKOFF: float = 2.0
+    CONTINUOUS_SCORE_DELTA: float = 0.15
+    CALLER_CACHE_ENABLED: bool = False
+    CALLER_CACHE_TTL_SEC: float = 600.0
+    CALLER_CACHE_MAX_ENTRIES: int = 10000
+    CALLER_CACHE_MAX_MB: float = 16.0
+    CALLER_CACHE_CONFIRM_SEC: float = 3.0
+    CALLER_CACHE_VERIFY_THRESHOLD: float = 0.7
+
+    VAD_ENABLED: bool = False
+    VAD_FRAME_MS: float = 20.0
+    VAD_ENERGY_THRESHOLD_DB: float = -45.0
+    VAD_SNR_DB: float = 9.0
+    VAD_MAX_ZCR: float = 0.45
+    VAD_HANGOVER_MS: float = 200.0
     MAX_FILE_SIZE_MB: int = 2
+    BULK_ENROLL_DECODE_WORKERS: int = 2
+    BULK_ENROLL_BATCH_SIZE: int = 8
+    BULK_ENROLL_MAX_ARCHIVE_MB: int = 512
 
     DEFAULT_THRESHOLD: float = 0.75
 
+    VOICE_INDEX_TYPE: str = "matrix"
+    VOICE_INDEX_PATH: str = os.path.join(VOICES_DB, "voices.index")
+    VOICE_INDEX_SEARCH_K: int = 10
+    VOICE_INDEX_IVF_NLIST: int = 256
+    VOICE_INDEX_IVF_NPROBE: int = 8
+    VOICE_INDEX_HNSW_M: int = 32
+    VOICE_INDEX_HNSW_EF_SEARCH: int = 64
+
+    RESULT_TOP_K: int = 5
+    RESULT_QUEUE_SIZE: int = 100
+    RESULT_SEND_TIMEOUT_SEC: float = 5.0
+
+    VOICE_MATCH_MODE: str = "centroid"
+    VOICE_MATCH_TOP_K: int = 3
+    VOICE_MAX_SAMPLES_PER_SPEAKER: int = 5
+
+    SCORE_NORM: str = "none"
+    SCORE_NORM_COHORT_PATH: str = ""
+    SCORE_NORM_TOP_K: int = 200
+    SCORE_NORM_MIN_COHORT: int = 20
+    SCORE_NORM_THRESHOLD: float = 3.0
+    SCORE_NORM_PROGRESSIVE_MARGIN: float = 1.0
+
+    VOICE_STORE_COMPACTION_RATIO: float = 0.3
+    VOICE_STORE_COMPACTION_MIN_ROWS: int = 64
+
+    INFERENCE_EXECUTOR: str = "thread"
+    INFERENCE_WORKERS: int = 2
+    INFERENCE_TORCH_THREADS: int = 1
+    INFERENCE_MAX_QUEUE: int = 32
+    INFERENCE_QUEUE_TIMEOUT_SEC: float = 5.0
+    INFERENCE_RETRY_SEC: float = 1.0
+    INFERENCE_MAX_RETRIES: int = 2
+    INFERENCE_BACKEND: str = "eager"
+    INFERENCE_PARITY_MIN_COSINE: float = 0.99
+    INFERENCE_WARMUP: bool = True
+
+    EMBEDDING_BATCH_MAX_SIZE: int = 8
+    EMBEDDING_BATCH_WINDOW_MS: float = 30.0
+    FEATURE_CACHE_ENABLED: bool = False
+
     GENESYS_AUDIOHOOK_URL: str = ""
 
     class Config:
@@ -1,12 +1,19 @@
+import io
 import torch
 import torchaudio
+from typing import BinaryIO, Union
 from app.config import settings
 
+AudioSource = Union[str, bytes, bytearray, memoryview, BinaryIO]
+
 
 class AudioProcessor:
     @staticmethod
-    def load_and_normalize(file_path: str) -> tuple[torch.Tensor, int]:
-        waveform, sr = torchaudio.load(file_path)
+    def load_and_normalize(source: AudioSource) -> tuple[torch.Tensor, int]:
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            source = io.BytesIO(source)
+
+        waveform, sr = torchaudio.load(source)
 
         if sr != settings.SAMPLE_RATE:
             raise ValueError(f"Sample rate debe ser {settings.SAMPLE_RATE}Hz, recibido: {sr}Hz")
@@ -27,5 +34,5 @@ class AudioProcessor:
         return waveform, sr
 
     @staticmethod
-    def validate_wav(file_path: str) -> tuple[torch.Tensor, int]:
-        return AudioProcessor.load_and_normalize(file_path)
+    def validate_wav(source: AudioSource) -> tuple[torch.Tensor, int]:
+        return AudioProcessor.load_and_normalize(source)
@@ -0,0 +1,84 @@
+import asyncio
+from typing import TYPE_CHECKING, Awaitable, Callable, List, Optional, Set, Tuple
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import torch
+    from app.core.embedding_generator import EmbeddingGenerator
+
+
+class EmbeddingBatcher:
+    def __init__(
+        self,
+        embedding_generator: "EmbeddingGenerator",
+        max_batch_size: int = 8,
+        window_ms: float = 30.0,
+        batch_fn: Optional[Callable[[List["torch.Tensor"]], Awaitable[np.ndarray]]] = None
+    ):
+        self.embedding_generator = embedding_generator
+        self.batch_fn = batch_fn or embedding_generator.generate_embeddings_batch_async
+        self.max_batch_size = max(1, max_batch_size)
+        self.window_sec = max(0.0, window_ms) / 1000.0
+
+        self._pending: List[Tuple["torch.Tensor", asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._running: Set[asyncio.Task] = set()
+
+        self.batches = 0
+        self.items = 0
+        self.max_observed_batch = 0
+
+    async def submit(self, waveform: "torch.Tensor") -> np.ndarray:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((waveform, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window_sec, self._flush)
+
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, []
+        batch = [(waveform, future) for waveform, future in batch if not future.done()]
+        if not batch:
+            return
+
+        task = asyncio.ensure_future(self._run_batch(batch))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    async def _run_batch(self, batch: List[Tuple["torch.Tensor", asyncio.Future]]):
+        self.batches += 1
+        self.items += len(batch)
+        self.max_observed_batch = max(self.max_observed_batch, len(batch))
+
+        waveforms = [waveform for waveform, _ in batch]
+
+        try:
+            embeddings = await self.batch_fn(waveforms)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), embedding in zip(batch, embeddings):
+            if not future.done():
+                future.set_result(embedding)
+
+    def get_stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": (self.items / self.batches) if self.batches else 0.0,
+            "max_batch_size": self.max_observed_batch,
+            "pending": len(self._pending)
+        }
@@ -1,14 +1,17 @@
 import numpy as np
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, List, Optional
 
 if TYPE_CHECKING:
     import torch
     from speechbrain.pretrained import EncoderClassifier
+    from app.core.inference_executor import InferenceExecutor
+    from app.core.streaming_features import StreamingFbank
 
 
 class EmbeddingGenerator:
-    def __init__(self, classifier: "EncoderClassifier"):
+    def __init__(self, classifier: "EncoderClassifier", executor: Optional["InferenceExecutor"] = None):
         self.classifier = classifier
+        self.executor = executor
 
     def generate_embedding(self, waveform: "torch.Tensor") -> np.ndarray:
         import torch
@@ -18,3 +21,65 @@ class EmbeddingGenerator:
         embedding = embedding.squeeze().cpu().numpy()
 
         return embedding
+
+    def generate_embeddings_batch(self, waveforms: List["torch.Tensor"]) -> np.ndarray:
+        import torch
+        signals = [w.reshape(-1) for w in waveforms]
+        lengths = torch.tensor([s.shape[0] for s in signals], dtype=torch.float32)
+
+        batch = torch.zeros(len(signals), int(lengths.max().item()))
+        for i, signal in enumerate(signals):
+            batch[i, :signal.shape[0]] = signal
+
+        wav_lens = lengths / lengths.max()
+
+        with torch.no_grad():
+            embeddings = self.classifier.encode_batch(batch, wav_lens)
+
+        return embeddings.reshape(len(signals), -1).cpu().numpy()
+
+    def create_feature_stream(self, max_samples: int) -> "StreamingFbank":
+        from app.core.streaming_features import StreamingFbank
+        return StreamingFbank(self.classifier.mods.compute_features, max_samples)
+
+    def generate_embeddings_from_features(self, features: List["torch.Tensor"]) -> np.ndarray:
+        import torch
+        from app.core.optimized_encoder import run_features
+
+        frames = [f.reshape(-1, f.shape[-1]) for f in features]
+        lengths = torch.tensor([f.shape[0] for f in frames], dtype=torch.float32)
+
+        batch = torch.zeros(len(frames), int(lengths.max().item()), frames[0].shape[1])
+        for i, f in enumerate(frames):
+            batch[i, :f.shape[0]] = f
+
+        feat_lens = lengths / lengths.max()
+
+        encode_features = getattr(self.classifier, "encode_features", None)
+        with torch.no_grad():
+            if encode_features is not None:
+                embeddings = encode_features(batch, feat_lens)
+            else:
+                embeddings = run_features(self.classifier.mods, batch, feat_lens)
+
+        return embeddings.reshape(len(frames), -1).cpu().numpy()
+
+    async def generate_embeddings_batch_async(self, waveforms: List["torch.Tensor"]) -> np.ndarray:
+        if self.executor is None:
+            return self.generate_embeddings_batch(waveforms)
+
+        if self.executor.is_process:
+            from app.core.inference_executor import generate_embeddings_batch_in_worker
+            return await self.executor.run(generate_embeddings_batch_in_worker, waveforms)
+
+        return await self.executor.run(self.generate_embeddings_batch, waveforms)
+
+    async def generate_embeddings_from_features_async(self, features: List["torch.Tensor"]) -> np.ndarray:
+        if self.executor is None:
+            return self.generate_embeddings_from_features(features)
+
+        if self.executor.is_process:
+            from app.core.inference_executor import generate_embeddings_from_features_in_worker
+            return await self.executor.run(generate_embeddings_from_features_in_worker, features)
+
+        return await self.executor.run(self.generate_embeddings_from_features, features)
@@ -0,0 +1,191 @@
+import asyncio
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional, Tuple
+
+import numpy as np
+
+EXECUTOR_THREAD = "thread"
+EXECUTOR_PROCESS = "process"
+
+
+class InferenceQueueFullError(RuntimeError):
+    pass
+
+
+def _init_process_worker(torch_threads: int):
+    import torch
+    torch.set_num_threads(torch_threads)
+
+    from app.dependencies import get_model_manager
+    get_model_manager().get_classifier()
+
+
+def _timed_worker_call(fn: Callable[..., Any], *args) -> Tuple[float, Any]:
+    return time.time(), fn(*args)
+
+
+def generate_embeddings_batch_in_worker(waveforms) -> np.ndarray:
+    from app.core.embedding_generator import EmbeddingGenerator
+    from app.dependencies import get_model_manager
+
+    classifier = get_model_manager().get_classifier()
+    return EmbeddingGenerator(classifier).generate_embeddings_batch(waveforms)
+
+
+def generate_embeddings_from_features_in_worker(features) -> np.ndarray:
+    from app.core.embedding_generator import EmbeddingGenerator
+    from app.dependencies import get_model_manager
+
+    classifier = get_model_manager().get_classifier()
+    return EmbeddingGenerator(classifier).generate_embeddings_from_features(features)
+
+
+class InferenceMetrics:
+    __slots__ = (
+        "submitted", "completed", "failed", "rejected", "in_flight",
+        "total_wait_sec", "max_wait_sec", "total_run_sec", "max_run_sec", "last_run_sec"
+    )
+
+    def __init__(self):
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.in_flight = 0
+        self.total_wait_sec = 0.0
+        self.max_wait_sec = 0.0
+        self.total_run_sec = 0.0
+        self.max_run_sec = 0.0
+        self.last_run_sec = 0.0
+
+    def record(self, wait_sec: float, run_sec: float, failed: bool):
+        if failed:
+            self.failed += 1
+        else:
+            self.completed += 1
+
+        self.total_wait_sec += wait_sec
+        self.max_wait_sec = max(self.max_wait_sec, wait_sec)
+        self.total_run_sec += run_sec
+        self.max_run_sec = max(self.max_run_sec, run_sec)
+        self.last_run_sec = run_sec
+
+    def to_dict(self) -> dict:
+        finished = self.completed + self.failed
+        return {
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "in_flight": self.in_flight,
+            "avg_wait_ms": (self.total_wait_sec / finished * 1000) if finished else 0.0,
+            "max_wait_ms": self.max_wait_sec * 1000,
+            "avg_run_ms": (self.total_run_sec / finished * 1000) if finished else 0.0,
+            "max_run_ms": self.max_run_sec * 1000,
+            "last_run_ms": self.last_run_sec * 1000
+        }
+
+
+class InferenceExecutor:
+    def __init__(
+        self,
+        mode: str = EXECUTOR_THREAD,
+        max_workers: int = 2,
+        torch_threads: int = 1,
+        max_queue: int = 32,
+        queue_timeout: float = 5.0
+    ):
+        if mode not in (EXECUTOR_THREAD, EXECUTOR_PROCESS):
+            raise ValueError(f"Modo de ejecutor no soportado: {mode}")
+
+        self.mode = mode
+        self.max_workers = max_workers
+        self.torch_threads = torch_threads
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.metrics = InferenceMetrics()
+
+        self._executor: Optional[Executor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    @property
+    def is_process(self) -> bool:
+        return self.mode == EXECUTOR_PROCESS
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.is_process:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    initializer=_init_process_worker,
+                    initargs=(self.torch_threads,)
+                )
+            else:
+                import torch
+                torch.set_num_threads(self.torch_threads)
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="inference"
+                )
+        return self._executor
+
+    def _get_slots(self) -> asyncio.Semaphore:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_workers + self.max_queue)
+        return self._slots
+
+    async def run(self, fn: Callable[..., Any], *args) -> Any:
+        slots = self._get_slots()
+        self.metrics.submitted += 1
+
+        try:
+            await asyncio.wait_for(slots.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.metrics.rejected += 1
+            raise InferenceQueueFullError(
+                f"Cola de inferencia llena ({self.max_queue} trabajos pendientes)"
+            )
+
+        self.metrics.in_flight += 1
+        submitted_at = time.perf_counter()
+        started = {}
+
+        def timed_call():
+            started["at"] = time.perf_counter()
+            return fn(*args)
+
+        failed = False
+        try:
+            loop = asyncio.get_running_loop()
+            if self.is_process:
+                submitted_wall = time.time()
+                started_wall, result = await loop.run_in_executor(
+                    self._get_executor(), _timed_worker_call, fn, *args
+                )
+                started["at"] = submitted_at + max(0.0, started_wall - submitted_wall)
+                return result
+            return await loop.run_in_executor(self._get_executor(), timed_call)
+        except Exception:
+            failed = True
+            raise
+        finally:
+            finished_at = time.perf_counter()
+            started_at = started.get("at", finished_at)
+            self.metrics.in_flight -= 1
+            self.metrics.record(started_at - submitted_at, finished_at - started_at, failed)
+            slots.release()
+
+    def get_stats(self) -> dict:
+        stats = self.metrics.to_dict()
+        stats.update({
+            "mode": self.mode,
+            "workers": self.max_workers,
+            "max_queue": self.max_queue
+        })
+        return stats
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,138 @@
+import os
+from types import SimpleNamespace
+from typing import List, Optional, Tuple
+
+import torch
+
+from app.core.optimized_encoder import check_parity, run_encoder, run_features
+
+CACHE_FORMAT_VERSION = 2
+SOURCE_CHECKPOINT = "embedding_model.ckpt"
+CACHE_PARITY_MIN_COSINE = 0.9999
+NORM_STATISTICS = ("count", "glob_mean", "glob_std", "spk_dict_mean", "spk_dict_std", "spk_dict_count")
+
+ECAPA_CONFIG = {
+    "n_mels": 80,
+    "channels": [1024, 1024, 1024, 1024, 3072],
+    "kernel_sizes": [5, 3, 3, 3, 1],
+    "dilations": [1, 2, 3, 4, 1],
+    "attention_channels": 128,
+    "lin_neurons": 192
+}
+
+
+class CachedClassifier:
+    def __init__(self, mods: SimpleNamespace):
+        self.mods = mods
+
+    def encode_batch(self, wavs: torch.Tensor, wav_lens: Optional[torch.Tensor] = None) -> torch.Tensor:
+        return run_encoder(self.mods, wavs, wav_lens)
+
+    def encode_features(self, feats: torch.Tensor, wav_lens: Optional[torch.Tensor] = None) -> torch.Tensor:
+        return run_features(self.mods, feats, wav_lens)
+
+
+def _source_signature(model_dir: str) -> Optional[list]:
+    path = os.path.join(model_dir, SOURCE_CHECKPOINT)
+    if not os.path.exists(path):
+        return None
+    stat = os.stat(path)
+    return [stat.st_size, int(stat.st_mtime)]
+
+
+def _detach(value):
+    if isinstance(value, torch.Tensor):
+        return value.detach().clone()
+    if isinstance(value, dict):
+        return {key: _detach(item) for key, item in value.items()}
+    return value
+
+
+def _norm_state(norm) -> dict:
+    return {
+        "state_dict": norm.state_dict(),
+        "statistics": {name: _detach(getattr(norm, name)) for name in NORM_STATISTICS if hasattr(norm, name)}
+    }
+
+
+def _load_norm_state(norm, state: dict):
+    norm.load_state_dict(state["state_dict"])
+    for name, value in state["statistics"].items():
+        setattr(norm, name, value)
+
+
+def is_cache_valid(cache_path: str, model_dir: str) -> bool:
+    signature = _source_signature(model_dir)
+    if signature is None or not os.path.exists(cache_path):
+        return False
+
+    artifact = torch.load(cache_path, map_location="cpu", mmap=True, weights_only=True)
+    if artifact.get("version") != CACHE_FORMAT_VERSION:
+        return False
+
+    return artifact.get("source") == signature
+
+
+def export_model_cache(classifier, cache_path: str, model_dir: str):
+    mods = classifier.mods
+    artifact = {
+        "version": CACHE_FORMAT_VERSION,
+        "source": _source_signature(model_dir),
+        "config": ECAPA_CONFIG,
+        "embedding_model": {
+            name: tensor.detach().contiguous()
+            for name, tensor in mods.embedding_model.state_dict().items()
+        },
+        "mean_var_norm": _norm_state(mods.mean_var_norm),
+        "mean_var_norm_emb": _norm_state(mods.mean_var_norm_emb)
+    }
+
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    torch.save(artifact, tmp_path)
+    os.replace(tmp_path, cache_path)
+
+
+def load_model_cache(cache_path: str) -> CachedClassifier:
+    artifact = torch.load(cache_path, map_location="cpu", mmap=True, weights_only=True)
+    config = dict(artifact["config"])
+    n_mels = config.pop("n_mels")
+
+    from speechbrain.lobes.features import Fbank
+    from speechbrain.lobes.models.ECAPA_TDNN import ECAPA_TDNN
+    from speechbrain.processing.features import InputNormalization
+
+    with torch.device("meta"):
+        embedding_model = ECAPA_TDNN(input_size=n_mels, **config)
+    embedding_model.load_state_dict(artifact["embedding_model"], assign=True)
+    embedding_model.eval().requires_grad_(False)
+
+    mean_var_norm = InputNormalization(norm_type="sentence", std_norm=False)
+    _load_norm_state(mean_var_norm, artifact["mean_var_norm"])
+
+    mean_var_norm_emb = InputNormalization(norm_type="global", std_norm=False)
+    _load_norm_state(mean_var_norm_emb, artifact["mean_var_norm_emb"])
+
+    mods = SimpleNamespace(
+        compute_features=Fbank(n_mels=n_mels),
+        mean_var_norm=mean_var_norm.eval(),
+        embedding_model=embedding_model,
+        mean_var_norm_emb=mean_var_norm_emb.eval()
+    )
+    return CachedClassifier(mods)
+
+
+def export_verified_model_cache(
+    classifier,
+    cache_path: str,
+    model_dir: str,
+    waveforms: List[torch.Tensor]
+) -> Tuple[Optional[CachedClassifier], dict]:
+    export_model_cache(classifier, cache_path, model_dir)
+    cached = load_model_cache(cache_path)
+
+    report = check_parity(classifier, cached, waveforms)
+    if report["min_cosine"] < CACHE_PARITY_MIN_COSINE:
+        os.remove(cache_path)
+        return None, report
+
+    return cached, report
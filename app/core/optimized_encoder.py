@@ -0,0 +1,177 @@
+import os
+from typing import List, Optional
+
+import numpy as np
+import torch
+
+BACKEND_EAGER = "eager"
+BACKEND_TORCHSCRIPT = "torchscript"
+BACKEND_ONNX = "onnx"
+BACKEND_INT8 = "int8"
+
+BACKENDS = (BACKEND_EAGER, BACKEND_TORCHSCRIPT, BACKEND_ONNX, BACKEND_INT8)
+
+EXAMPLE_SECONDS = 3.0
+
+
+class OptimizedEncoder:
+    def __init__(self, classifier, backend: str, cache_dir: str, sample_rate: int = 16000):
+        if backend not in BACKENDS:
+            raise ValueError(f"Backend de inferencia no soportado: {backend}")
+
+        self.classifier = classifier
+        self.mods = classifier.mods
+        self.backend = backend
+        self.cache_dir = cache_dir
+        self.sample_rate = sample_rate
+
+        self._torchscript_model = None
+        self._onnx_session = None
+
+        if backend == BACKEND_TORCHSCRIPT:
+            self._build_torchscript()
+        elif backend in (BACKEND_ONNX, BACKEND_INT8):
+            self._build_onnx(quantized=backend == BACKEND_INT8)
+
+    def _example_inputs(self):
+        wavs = torch.randn(1, int(EXAMPLE_SECONDS * self.sample_rate)) * 0.1
+        wav_lens = torch.ones(1)
+        with torch.no_grad():
+            feats = self.mods.compute_features(wavs)
+            feats = self.mods.mean_var_norm(feats, wav_lens)
+        return feats, wav_lens
+
+    def _build_torchscript(self):
+        feats, wav_lens = self._example_inputs()
+        with torch.no_grad():
+            traced = torch.jit.trace(self.mods.embedding_model, (feats, wav_lens), check_trace=False)
+            traced = torch.jit.freeze(traced.eval())
+            self._torchscript_model = torch.jit.optimize_for_inference(traced)
+
+    def _onnx_path(self, quantized: bool) -> str:
+        name = "embedding_model.int8.onnx" if quantized else "embedding_model.onnx"
+        return os.path.join(self.cache_dir, name)
+
+    def _export_onnx(self, path: str):
+        feats, wav_lens = self._example_inputs()
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with torch.no_grad():
+            torch.onnx.export(
+                self.mods.embedding_model,
+                (feats, wav_lens),
+                tmp_path,
+                input_names=["feats", "wav_lens"],
+                output_names=["embeddings"],
+                dynamic_axes={"feats": {0: "batch", 1: "frames"}, "wav_lens": {0: "batch"}},
+                opset_version=17
+            )
+        os.replace(tmp_path, path)
+
+    def _build_onnx(self, quantized: bool):
+        try:
+            import onnxruntime
+        except ImportError as e:
+            raise RuntimeError(
+                f"El backend '{self.backend}' requiere onnxruntime (pip install onnxruntime onnx)"
+            ) from e
+
+        fp32_path = self._onnx_path(quantized=False)
+        if not os.path.exists(fp32_path):
+            self._export_onnx(fp32_path)
+
+        model_path = fp32_path
+        if quantized:
+            model_path = self._onnx_path(quantized=True)
+            if not os.path.exists(model_path):
+                from onnxruntime.quantization import QuantType, quantize_dynamic
+                tmp_path = f"{model_path}.{os.getpid()}.tmp"
+                quantize_dynamic(fp32_path, tmp_path, weight_type=QuantType.QInt8)
+                os.replace(tmp_path, model_path)
+
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = torch.get_num_threads()
+        self._onnx_session = onnxruntime.InferenceSession(
+            model_path,
+            sess_options=options,
+            providers=["CPUExecutionProvider"]
+        )
+
+    def _embed(self, feats: torch.Tensor, wav_lens: torch.Tensor) -> torch.Tensor:
+        if self._torchscript_model is not None:
+            return self._torchscript_model(feats, wav_lens)
+
+        if self._onnx_session is not None:
+            outputs = self._onnx_session.run(None, {
+                "feats": feats.cpu().numpy().astype(np.float32),
+                "wav_lens": wav_lens.cpu().numpy().astype(np.float32)
+            })
+            return torch.from_numpy(outputs[0])
+
+        return self.mods.embedding_model(feats, wav_lens)
+
+    def encode_batch(self, wavs: torch.Tensor, wav_lens: Optional[torch.Tensor] = None) -> torch.Tensor:
+        return run_encoder(self.mods, wavs, wav_lens, self._embed)
+
+    def encode_features(self, feats: torch.Tensor, wav_lens: Optional[torch.Tensor] = None) -> torch.Tensor:
+        return run_features(self.mods, feats, wav_lens, self._embed)
+
+
+def run_features(mods, feats: torch.Tensor, wav_lens: Optional[torch.Tensor] = None, embed=None) -> torch.Tensor:
+    if wav_lens is None:
+        wav_lens = torch.ones(feats.shape[0])
+
+    if embed is None:
+        embed = mods.embedding_model
+
+    with torch.no_grad():
+        feats = mods.mean_var_norm(feats, wav_lens)
+        return embed(feats, wav_lens)
+
+
+def run_encoder(mods, wavs: torch.Tensor, wav_lens: Optional[torch.Tensor] = None, embed=None) -> torch.Tensor:
+    if wavs.dim() == 1:
+        wavs = wavs.unsqueeze(0)
+
+    if wav_lens is None:
+        wav_lens = torch.ones(wavs.shape[0])
+
+    if embed is None:
+        embed = mods.embedding_model
+
+    wavs = wavs.float()
+
+    with torch.no_grad():
+        feats = mods.compute_features(wavs)
+    return run_features(mods, feats, wav_lens, embed)
+
+
+def warm_up(encoder, seconds: float, sample_rate: int = 16000, runs: int = 2):
+    wavs = torch.randn(1, int(seconds * sample_rate)) * 0.1
+    with torch.no_grad():
+        for _ in range(runs):
+            encoder.encode_batch(wavs)
+
+
+def parity_waveforms(durations: List[float], sample_rate: int = 16000) -> List[torch.Tensor]:
+    generator = torch.Generator().manual_seed(0)
+    return [
+        torch.randn(1, int(seconds * sample_rate), generator=generator) * 0.1
+        for seconds in durations
+    ]
+
+
+def check_parity(reference, candidate, waveforms: List[torch.Tensor]) -> dict:
+    cosines = []
+    with torch.no_grad():
+        for waveform in waveforms:
+            expected = reference.encode_batch(waveform).reshape(-1)
+            actual = candidate.encode_batch(waveform).reshape(-1)
+            cosine = torch.nn.functional.cosine_similarity(expected, actual, dim=0)
+            cosines.append(float(cosine))
+
+    return {
+        "samples": len(cosines),
+        "min_cosine": min(cosines) if cosines else 1.0,
+        "mean_cosine": float(np.mean(cosines)) if cosines else 1.0,
+        "max_drift": 1.0 - min(cosines) if cosines else 0.0
+    }
@@ -1,7 +1,5 @@
 import numpy as np
 import torch
-import torchaudio
-from typing import List
 from app.config import settings
 
 ULAW_DECODE_TABLE = np.array([
@@ -39,63 +37,147 @@ ULAW_DECODE_TABLE = np.array([
         56,     48,     40,     32,     24,     16,      8,      0
 ], dtype=np.int16)
 
+ULAW_DECODE_FLOAT = ULAW_DECODE_TABLE.astype(np.float32) / 32768.0
 
-class PCMConverter:
-    @staticmethod
-    def pcm_to_waveform(pcm_bytes: bytes, sample_rate: int = None) -> torch.Tensor:
-        if sample_rate is None:
-            sample_rate = settings.SAMPLE_RATE
+RESAMPLER_TAPS = 65
 
-        audio_array = np.frombuffer(pcm_bytes, dtype=np.int16)
 
-        audio_float = audio_array.astype(np.float32) / 32768.0
+def _design_upsample_filter(taps: int = RESAMPLER_TAPS) -> np.ndarray:
+    n = np.arange(taps) - (taps - 1) / 2.0
+    kernel = 0.5 * np.sinc(0.5 * n) * np.kaiser(taps, 8.0)
+    kernel = kernel / kernel.sum() * 2.0
+    return kernel.astype(np.float32)
 
-        waveform = torch.from_numpy(audio_float).unsqueeze(0)
 
-        max_val = torch.max(torch.abs(waveform))
-        if max_val > 0:
-            waveform = waveform / max_val
+UPSAMPLE_FILTER = _design_upsample_filter()
+UPSAMPLE_PHASES = (
+    UPSAMPLE_FILTER[0::2].copy(),
+    np.append(UPSAMPLE_FILTER[1::2], np.float32(0.0))
+)
 
-        return waveform
 
-    @staticmethod
-    def pcm_chunks_to_waveform(pcm_chunks: List[bytes], sample_rate: int = None) -> torch.Tensor:
-        if not pcm_chunks:
-            raise ValueError("Lista de chunks PCM vacía")
+FORMAT_PCMU = "PCMU"
+FORMAT_L16 = "L16"
 
-        concatenated = b''.join(pcm_chunks)
+L16_SCALE = np.float32(1.0 / 32768.0)
 
-        return PCMConverter.pcm_to_waveform(concatenated, sample_rate)
 
-    @staticmethod
-    def ulaw_to_pcm(ulaw_bytes: bytes) -> bytes:
-        ulaw_array = np.frombuffer(ulaw_bytes, dtype=np.uint8)
-        pcm_array = ULAW_DECODE_TABLE[ulaw_array]
-        return pcm_array.tobytes()
+class StreamingUpsampler:
+    def __init__(self):
+        self._history = np.zeros(UPSAMPLE_PHASES[0].shape[0] - 1, dtype=np.float32)
 
-    @staticmethod
-    def resample_8k_to_16k(pcm_bytes: bytes) -> bytes:
-        audio_array = np.frombuffer(pcm_bytes, dtype=np.int16)
-        audio_float = audio_array.astype(np.float32) / 32768.0
-        waveform = torch.from_numpy(audio_float).unsqueeze(0)
+    def reset(self):
+        self._history[:] = 0.0
+
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        if samples.shape[0] == 0:
+            return samples
+
+        extended = np.concatenate((self._history, samples))
+        history_len = self._history.shape[0]
+        self._history = extended[-history_len:].copy()
+
+        even_phase, odd_phase = UPSAMPLE_PHASES
+        output = np.empty(samples.shape[0] * 2, dtype=np.float32)
+        output[0::2] = np.convolve(extended, even_phase, mode="valid")
+        output[1::2] = np.convolve(extended, odd_phase, mode="valid")
+        return output
+
+
+class StreamingULawResampler:
+    dtype = np.dtype(np.uint8)
+
+    def __init__(self, rate: int = 8000):
+        self._upsampler = StreamingUpsampler() if rate != settings.SAMPLE_RATE else None
+
+    def reset(self):
+        if self._upsampler is not None:
+            self._upsampler.reset()
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        samples = ULAW_DECODE_FLOAT[codes]
+        if self._upsampler is None:
+            return samples
+        return self._upsampler.process(samples)
+
+    def process(self, ulaw_bytes: bytes) -> np.ndarray:
+        return self.decode(np.frombuffer(ulaw_bytes, dtype=self.dtype))
+
+
+class StreamingL16Decoder:
+    def __init__(self, rate: int = None, byte_order: str = None):
+        rate = rate or settings.SAMPLE_RATE
+        byte_order = byte_order or settings.L16_BYTE_ORDER
+        if byte_order not in ("little", "big"):
+            raise ValueError(f"Orden de bytes L16 no soportado: {byte_order}")
 
-        resampler = torchaudio.transforms.Resample(
-            orig_freq=8000,
-            new_freq=16000,
-            dtype=waveform.dtype
-        )
-        resampled = resampler(waveform)
+        self.dtype = np.dtype("<i2" if byte_order == "little" else ">i2")
+        self._upsampler = StreamingUpsampler() if rate != settings.SAMPLE_RATE else None
 
-        resampled_int16 = (resampled.squeeze(0).numpy() * 32768.0).astype(np.int16)
-        return resampled_int16.tobytes()
+    def reset(self):
+        if self._upsampler is not None:
+            self._upsampler.reset()
 
+    def decode(self, pcm: np.ndarray) -> np.ndarray:
+        samples = pcm.astype(np.float32)
+        samples *= L16_SCALE
+        if self._upsampler is None:
+            return samples
+        return self._upsampler.process(samples)
+
+    def process(self, pcm_bytes: bytes) -> np.ndarray:
+        usable = len(pcm_bytes) // self.dtype.itemsize
+        return self.decode(np.frombuffer(pcm_bytes, dtype=self.dtype, count=usable))
+
+
+class FrameDemuxer:
+    def __init__(self, dtype: np.dtype, channels: int = 1):
+        self.dtype = np.dtype(dtype)
+        self.channels = max(1, channels)
+        self.frame_bytes = self.dtype.itemsize * self.channels
+        self._pending = b""
+
+    def reset(self):
+        self._pending = b""
+
+    def split(self, data: bytes) -> np.ndarray:
+        if self._pending:
+            data = self._pending + data
+            self._pending = b""
+
+        frames = len(data) // self.frame_bytes
+        usable = frames * self.frame_bytes
+        if usable != len(data):
+            self._pending = bytes(data[usable:])
+
+        return np.frombuffer(data, dtype=self.dtype, count=frames * self.channels).reshape(frames, self.channels)
+
+
+def is_supported_media(media_format: str, rate: int) -> bool:
+    if media_format not in (FORMAT_PCMU, FORMAT_L16):
+        return False
+    return rate in (settings.SAMPLE_RATE, settings.SAMPLE_RATE // 2)
+
+
+def create_stream_decoder(media_format: str = FORMAT_PCMU, rate: int = 8000):
+    if not is_supported_media(media_format, rate):
+        raise ValueError(f"Formato de audio no soportado: {media_format} a {rate} Hz")
+
+    if media_format == FORMAT_L16:
+        return StreamingL16Decoder(rate)
+    return StreamingULawResampler(rate)
+
+
+class PCMConverter:
     @staticmethod
-    def ulaw_chunks_to_waveform(ulaw_chunks: List[bytes]) -> torch.Tensor:
-        if not ulaw_chunks:
-            raise ValueError("Lista de chunks u-Law vacía")
+    def samples_to_waveform(samples: np.ndarray) -> torch.Tensor:
+        if samples.shape[0] == 0:
+            raise ValueError("Buffer de audio vacío")
 
-        concatenated_ulaw = b''.join(ulaw_chunks)
-        pcm_bytes = PCMConverter.ulaw_to_pcm(concatenated_ulaw)
-        pcm_16k = PCMConverter.resample_8k_to_16k(pcm_bytes)
+        waveform = torch.tensor(samples, dtype=torch.float32).unsqueeze(0)
 
-        return PCMConverter.pcm_to_waveform(pcm_16k, sample_rate=16000)
+        max_val = torch.max(torch.abs(waveform))
+        if max_val > 0:
+            waveform /= max_val
+
+        return waveform
@@ -0,0 +1,150 @@
+import os
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+NORM_NONE = "none"
+NORM_S = "s_norm"
+NORM_AS = "as_norm"
+
+STATS_CHUNK_ROWS = 4096
+MIN_STD = 1e-6
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    matrix = np.asarray(matrix, dtype=np.float32)
+    lengths = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(lengths > 0, lengths, 1.0)
+
+
+def load_cohort(path: str) -> np.ndarray:
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Cohorte no encontrada: {path}")
+    cohort = np.load(path)
+    return _normalize_rows(cohort.reshape(-1, cohort.shape[-1]))
+
+
+class ScoreNormalizer:
+    def __init__(
+        self,
+        cohort: np.ndarray,
+        method: str = NORM_AS,
+        top_k: int = 200,
+        cohort_ids: Optional[List[str]] = None
+    ):
+        if method not in (NORM_S, NORM_AS):
+            raise ValueError(f"Normalización de score no soportada: {method}")
+
+        self.cohort = _normalize_rows(cohort)
+        self.method = method
+        self.top_k = min(top_k, self.cohort.shape[0])
+        self._cohort_rows = {person_id: row for row, person_id in enumerate(cohort_ids or [])}
+
+        self._slots: Dict[str, int] = {}
+        self._ids: List[str] = []
+        self._mean = np.zeros(0, dtype=np.float32)
+        self._std = np.zeros(0, dtype=np.float32)
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def __contains__(self, person_id: str) -> bool:
+        return person_id in self._slots
+
+    def _stats(self, scores: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        if self.method == NORM_AS and self.top_k < scores.shape[1]:
+            scores = -np.partition(-scores, self.top_k - 1, axis=1)[:, :self.top_k]
+
+        scores = np.where(np.isfinite(scores), scores, np.nan)
+        mean = np.nanmean(scores, axis=1)
+        std = np.maximum(np.nanstd(scores, axis=1), MIN_STD)
+        return mean.astype(np.float32), std.astype(np.float32)
+
+    def enrollment_stats(self, person_ids: List[str], embeddings: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        embeddings = _normalize_rows(np.asarray(embeddings).reshape(len(person_ids), -1))
+        means = []
+        stds = []
+        for start in range(0, len(person_ids), STATS_CHUNK_ROWS):
+            chunk_ids = person_ids[start:start + STATS_CHUNK_ROWS]
+            scores = embeddings[start:start + STATS_CHUNK_ROWS] @ self.cohort.T
+
+            for i, person_id in enumerate(chunk_ids):
+                row = self._cohort_rows.get(person_id)
+                if row is not None:
+                    scores[i, row] = -np.inf
+
+            mean, std = self._stats(scores)
+            means.append(mean)
+            stds.append(std)
+
+        if not means:
+            return np.zeros(0, dtype=np.float32), np.zeros(0, dtype=np.float32)
+        return np.concatenate(means), np.concatenate(stds)
+
+    def enroll_many(self, items: Iterable[Tuple[str, np.ndarray]]):
+        items = list(items)
+        if not items:
+            return
+
+        person_ids = [person_id for person_id, _ in items]
+        means, stds = self.enrollment_stats(person_ids, np.stack([np.asarray(e).reshape(-1) for _, e in items]))
+
+        new_ids = [person_id for person_id in person_ids if person_id not in self._slots]
+        if new_ids:
+            for person_id in new_ids:
+                self._slots[person_id] = len(self._ids)
+                self._ids.append(person_id)
+            self._mean = np.concatenate([self._mean, np.zeros(len(new_ids), dtype=np.float32)])
+            self._std = np.concatenate([self._std, np.ones(len(new_ids), dtype=np.float32)])
+
+        slots = np.array([self._slots[person_id] for person_id in person_ids], dtype=np.int64)
+        self._mean[slots] = means
+        self._std[slots] = stds
+
+    def enroll(self, person_id: str, embedding: np.ndarray):
+        self.enroll_many([(person_id, embedding)])
+
+    def remove(self, person_id: str) -> bool:
+        slot = self._slots.pop(person_id, None)
+        if slot is None:
+            return False
+
+        last = len(self._ids) - 1
+        if slot != last:
+            moved_id = self._ids[last]
+            self._ids[slot] = moved_id
+            self._mean[slot] = self._mean[last]
+            self._std[slot] = self._std[last]
+            self._slots[moved_id] = slot
+
+        self._ids.pop()
+        self._mean = self._mean[:last]
+        self._std = self._std[:last]
+        return True
+
+    def rebuild(self, items: Iterable[Tuple[str, np.ndarray]]):
+        self._slots = {}
+        self._ids = []
+        self._mean = np.zeros(0, dtype=np.float32)
+        self._std = np.zeros(0, dtype=np.float32)
+        self.enroll_many(items)
+
+    def test_stats(self, embedding: np.ndarray) -> Tuple[float, float]:
+        query = np.asarray(embedding, dtype=np.float32).reshape(-1)
+        length = np.linalg.norm(query)
+        if length > 0:
+            query = query / length
+
+        mean, std = self._stats((self.cohort @ query)[np.newaxis, :])
+        return float(mean[0]), float(std[0])
+
+    def normalize(self, embedding: np.ndarray, person_ids: List[str], scores: np.ndarray) -> np.ndarray:
+        test_mean, test_std = self.test_stats(embedding)
+
+        slots = np.array([self._slots.get(person_id, -1) for person_id in person_ids], dtype=np.int64)
+        known = slots >= 0
+        enroll_mean = np.where(known, self._mean[np.maximum(slots, 0)] if len(self._ids) else 0.0, test_mean)
+        enroll_std = np.where(known, self._std[np.maximum(slots, 0)] if len(self._ids) else 1.0, test_std)
+
+        scores = np.asarray(scores, dtype=np.float32)
+        return (0.5 * ((scores - enroll_mean) / enroll_std + (scores - test_mean) / test_std)).astype(np.float32)
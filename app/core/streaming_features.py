@@ -0,0 +1,164 @@
+from typing import List, Optional
+
+import numpy as np
+import torch
+
+from app.utils.sample_buffer import SlidingSampleBuffer
+
+
+def _filterbank_matrix(filterbank) -> torch.Tensor:
+    f_central_mat = filterbank.f_central.repeat(filterbank.all_freqs_mat.shape[1], 1).transpose(0, 1)
+    band_mat = filterbank.band.repeat(filterbank.all_freqs_mat.shape[1], 1).transpose(0, 1)
+
+    if not filterbank.freeze:
+        scale = filterbank.sample_rate * filterbank.param_change_factor * filterbank.param_change_factor
+        f_central_mat = f_central_mat * scale
+        band_mat = band_mat * scale
+
+    return filterbank._create_fbank_matrix(f_central_mat, band_mat)
+
+
+class StreamingFbank:
+    def __init__(self, compute_features, max_samples: int):
+        if getattr(compute_features, "deltas", False) or getattr(compute_features, "context", False):
+            raise ValueError("Fbank con deltas o contexto no soporta extracción incremental")
+
+        stft = compute_features.compute_STFT
+        if stft.center and stft.pad_mode != "constant":
+            raise ValueError(f"Padding STFT no soportado para extracción incremental: {stft.pad_mode}")
+
+        self.stft = stft
+        self.filterbank = compute_features.compute_fbanks
+        self.n_fft = stft.n_fft
+        self.hop = stft.hop_length
+        self.pad = self.n_fft // 2 if stft.center else 0
+        self._matrix = _filterbank_matrix(self.filterbank).float()
+
+        self.frames = SlidingSampleBuffer(max_samples // self.hop + 1, width=self._matrix.shape[1])
+        self._pending = np.zeros(self.pad, dtype=np.float32)
+        self.total_samples = 0
+
+    def reset(self):
+        self.frames.clear()
+        self._pending = np.zeros(self.pad, dtype=np.float32)
+        self.total_samples = 0
+
+    def _energies(self, signal: np.ndarray) -> torch.Tensor:
+        spectrum = torch.stft(
+            torch.from_numpy(np.ascontiguousarray(signal, dtype=np.float32)),
+            self.n_fft,
+            self.hop,
+            self.stft.win_length,
+            self.stft.window,
+            center=False,
+            normalized=self.stft.normalized_stft,
+            onesided=self.stft.onesided,
+            return_complex=True
+        )
+        power = spectrum.real.pow(2) + spectrum.imag.pow(2)
+        return torch.matmul(power.transpose(0, 1), self._matrix)
+
+    def append(self, samples: np.ndarray):
+        if samples.shape[0] == 0:
+            return
+
+        self.total_samples += samples.shape[0]
+        pending = np.concatenate((self._pending, samples))
+        if pending.shape[0] < self.n_fft:
+            self._pending = pending
+            return
+
+        count = (pending.shape[0] - self.n_fft) // self.hop + 1
+        with torch.no_grad():
+            energies = self._energies(pending[:(count - 1) * self.hop + self.n_fft])
+        self.frames.write(energies.numpy())
+        self._pending = pending[count * self.hop:]
+
+    def _tail(self) -> np.ndarray:
+        if not self.pad:
+            return np.zeros((0, self._matrix.shape[1]), dtype=np.float32)
+
+        tail = np.concatenate((self._pending, np.zeros(self.pad, dtype=np.float32)))
+        with torch.no_grad():
+            return self._energies(tail).numpy()
+
+    def frame_count(self, num_samples: int) -> int:
+        if self.pad:
+            return num_samples // self.hop + 1
+        return max(0, (num_samples - self.n_fft) // self.hop + 1)
+
+    def window_samples(self, num_samples: int) -> int:
+        num_samples = min(num_samples, self.total_samples)
+        return num_samples - (num_samples - self.total_samples) % self.hop
+
+    def _window_energies(self, window: np.ndarray, count: int, tail: np.ndarray) -> np.ndarray:
+        width = self._matrix.shape[1]
+        if count <= 0:
+            return np.zeros((0, width), dtype=np.float32)
+
+        head = -(-self.pad // self.hop)
+        if count <= head + tail.shape[0]:
+            padding = np.zeros(self.pad, dtype=np.float32)
+            with torch.no_grad():
+                return self._energies(np.concatenate((padding, window, padding))).numpy()
+
+        parts = []
+        if head:
+            signal = np.concatenate((np.zeros(self.pad, dtype=np.float32), window[:(head - 1) * self.hop + self.n_fft - self.pad]))
+            with torch.no_grad():
+                parts.append(self._energies(signal).numpy())
+        parts.append(self.frames.view(count - tail.shape[0])[head:])
+        parts.append(tail)
+        return np.concatenate(parts)
+
+    def features(self, samples: Optional[np.ndarray] = None) -> torch.Tensor:
+        num_samples = self.total_samples if samples is None else self.window_samples(samples.shape[0])
+
+        tail = self._tail()
+        if num_samples == self.total_samples:
+            count = min(self.frame_count(num_samples), len(self.frames) + tail.shape[0])
+            if count <= tail.shape[0]:
+                energies = tail[tail.shape[0] - count:]
+            else:
+                energies = np.concatenate((self.frames.view(count - tail.shape[0]), tail))
+        else:
+            window = np.asarray(samples[samples.shape[0] - num_samples:], dtype=np.float32)
+            energies = self._window_energies(window, self.frame_count(num_samples), tail)
+
+        with torch.no_grad():
+            energies = torch.from_numpy(np.ascontiguousarray(energies)).unsqueeze(0)
+            if self.filterbank.log_mel:
+                return self.filterbank._amplitude_to_DB(energies)
+            return energies
+
+
+def window_lengths(num_samples: int, hop: int) -> List[int]:
+    lengths = {num_samples, num_samples - 7 * hop, num_samples - hop // 2, num_samples // 2 + 1, 3 * hop + 1}
+    return sorted(length for length in lengths if 0 < length <= num_samples)
+
+
+def check_feature_equivalence(compute_features, signals: List[np.ndarray], chunk_samples: int = 1600) -> dict:
+    max_errors = []
+    windows = 0
+    for signal in signals:
+        signal = np.asarray(signal, dtype=np.float32).reshape(-1)
+        extractor = StreamingFbank(compute_features, signal.shape[0])
+        for start in range(0, signal.shape[0], chunk_samples):
+            extractor.append(signal[start:start + chunk_samples])
+
+        for length in window_lengths(signal.shape[0], extractor.hop):
+            expected_length = extractor.window_samples(length)
+            with torch.no_grad():
+                expected = compute_features(torch.from_numpy(signal[signal.shape[0] - expected_length:]).unsqueeze(0))
+            actual = extractor.features(signal[signal.shape[0] - length:])
+
+            if actual.shape != expected.shape:
+                raise ValueError(f"Forma de features distinta: {tuple(actual.shape)} != {tuple(expected.shape)}")
+            max_errors.append(float((actual - expected).abs().max()))
+            windows += 1
+
+    return {
+        "samples": len(signals),
+        "windows": windows,
+        "max_abs_error": max(max_errors) if max_errors else 0.0
+    }
@@ -0,0 +1,87 @@
+import numpy as np
+
+ENERGY_EPS = 1e-10
+NOISE_FLOOR_RISE = 0.02
+
+
+class EnergyVAD:
+    def __init__(
+        self,
+        sample_rate: int = 16000,
+        frame_ms: float = 20.0,
+        energy_threshold_db: float = -45.0,
+        snr_db: float = 9.0,
+        max_zcr: float = 0.45,
+        hangover_ms: float = 200.0
+    ):
+        self.frame_len = max(1, int(sample_rate * frame_ms / 1000))
+        self.energy_threshold_db = energy_threshold_db
+        self.snr_db = snr_db
+        self.max_zcr = max_zcr
+        self.hangover_frames = int(hangover_ms / frame_ms)
+
+        self._pending = np.zeros(0, dtype=np.float32)
+        self._noise_floor_db = None
+        self._hangover = 0
+
+        self.speech_frames = 0
+        self.total_frames = 0
+
+    def reset(self):
+        self._pending = np.zeros(0, dtype=np.float32)
+        self._noise_floor_db = None
+        self._hangover = 0
+        self.speech_frames = 0
+        self.total_frames = 0
+
+    def _is_speech(self, energy_db: float, zcr: float) -> bool:
+        if self._noise_floor_db is None or energy_db < self._noise_floor_db:
+            self._noise_floor_db = energy_db
+
+        voiced = (
+            energy_db > self.energy_threshold_db
+            and energy_db > self._noise_floor_db + self.snr_db
+            and zcr < self.max_zcr
+        )
+
+        if not voiced:
+            self._noise_floor_db += (energy_db - self._noise_floor_db) * NOISE_FLOOR_RISE
+
+        if voiced:
+            self._hangover = self.hangover_frames
+            return True
+
+        if self._hangover > 0:
+            self._hangover -= 1
+            return True
+
+        return False
+
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        if self._pending.shape[0]:
+            samples = np.concatenate((self._pending, samples))
+
+        frame_count = samples.shape[0] // self.frame_len
+        usable = frame_count * self.frame_len
+        self._pending = samples[usable:].copy()
+
+        if frame_count == 0:
+            return np.zeros(0, dtype=np.float32)
+
+        frames = samples[:usable].reshape(frame_count, self.frame_len)
+        energies_db = 10.0 * np.log10(np.mean(frames * frames, axis=1) + ENERGY_EPS)
+        signs = np.signbit(frames)
+        zcrs = np.mean(signs[:, 1:] != signs[:, :-1], axis=1)
+
+        mask = np.array([
+            self._is_speech(float(energy_db), float(zcr))
+            for energy_db, zcr in zip(energies_db, zcrs)
+        ])
+
+        self.total_frames += frame_count
+        self.speech_frames += int(mask.sum())
+
+        if mask.all():
+            return frames.reshape(-1)
+
+        return frames[mask].reshape(-1)
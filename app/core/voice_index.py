@@ -0,0 +1,469 @@
+import json
+import os
+import numpy as np
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+INDEX_MATRIX = "matrix"
+INDEX_FLAT = "flat"
+INDEX_IVF = "ivf"
+INDEX_HNSW = "hnsw"
+
+MATCH_CENTROID = "centroid"
+MATCH_MAX = "max"
+MATCH_MEAN_TOP_K = "mean_top_k"
+
+IVF_MIN_POINTS_PER_CENTROID = 39
+HNSW_MAX_TOMBSTONE_RATIO = 0.2
+
+
+def l2_normalize(embedding: np.ndarray) -> np.ndarray:
+    vector = np.asarray(embedding, dtype=np.float32).reshape(-1)
+    length = np.linalg.norm(vector)
+    if length > 0:
+        vector = vector / length
+    return vector
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    k = min(k, scores.shape[0])
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+
+    if k < scores.shape[0]:
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(scores.shape[0])
+
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+class MatrixVoiceIndex:
+    index_type = INDEX_MATRIX
+    exhaustive = True
+    needs_rebuild = False
+    stamps = None
+
+    def __init__(self, dim: Optional[int] = None, initial_capacity: int = 64):
+        self.dim = dim
+        self._capacity = initial_capacity
+        self._size = 0
+        self._matrix: Optional[np.ndarray] = None
+        self._ids = np.empty(initial_capacity, dtype=object)
+        self._rows: Dict[str, int] = {}
+
+        if dim is not None:
+            self._matrix = np.zeros((initial_capacity, dim), dtype=np.float32)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, person_id: str) -> bool:
+        return person_id in self._rows
+
+    @property
+    def ids(self) -> np.ndarray:
+        return self._ids[:self._size]
+
+    @property
+    def matrix(self) -> np.ndarray:
+        if self._matrix is None:
+            return np.zeros((0, self.dim or 0), dtype=np.float32)
+        return self._matrix[:self._size]
+
+    def _ensure_capacity(self, dim: int):
+        if self._matrix is None:
+            self.dim = dim
+            self._matrix = np.zeros((self._capacity, dim), dtype=np.float32)
+
+        if dim != self.dim:
+            raise ValueError(f"Dimensión de embedding inválida: {dim} (esperado {self.dim})")
+
+        if self._size < self._capacity:
+            return
+
+        self._capacity *= 2
+        matrix = np.zeros((self._capacity, self.dim), dtype=np.float32)
+        matrix[:self._size] = self._matrix[:self._size]
+        self._matrix = matrix
+
+        ids = np.empty(self._capacity, dtype=object)
+        ids[:self._size] = self._ids[:self._size]
+        self._ids = ids
+
+    def add(self, person_id: str, embedding: np.ndarray):
+        vector = l2_normalize(embedding)
+
+        if person_id in self._rows:
+            self._matrix[self._rows[person_id]] = vector
+            return
+
+        self._ensure_capacity(vector.shape[0])
+        row = self._size
+        self._matrix[row] = vector
+        self._ids[row] = person_id
+        self._rows[person_id] = row
+        self._size += 1
+
+    def remove(self, person_id: str) -> bool:
+        row = self._rows.pop(person_id, None)
+        if row is None:
+            return False
+
+        last = self._size - 1
+        if row != last:
+            moved_id = self._ids[last]
+            self._matrix[row] = self._matrix[last]
+            self._ids[row] = moved_id
+            self._rows[moved_id] = row
+
+        self._ids[last] = None
+        self._size = last
+        return True
+
+    def similarities(self, embedding: np.ndarray) -> np.ndarray:
+        if self._size == 0:
+            return np.zeros(0, dtype=np.float32)
+        return self.matrix @ l2_normalize(embedding)
+
+    def search(self, embedding: np.ndarray, k: int) -> Tuple[List[str], np.ndarray]:
+        scores = self.similarities(embedding)
+        order = top_k_indices(scores, k)
+        return self.ids[order].tolist(), scores[order]
+
+    def rebuild(self, items: Iterable[Tuple[str, np.ndarray]]):
+        self._size = 0
+        self._rows = {}
+        self._ids = np.empty(self._capacity, dtype=object)
+        for person_id, embedding in items:
+            self.add(person_id, embedding)
+
+    def save(self, path: str, stamps: Optional[Dict[str, list]] = None):
+        pass
+
+    def load(self, path: str) -> bool:
+        return False
+
+
+class FaissVoiceIndex:
+    exhaustive = False
+    stamps = None
+
+    def __init__(
+        self,
+        index_type: str = INDEX_FLAT,
+        ivf_nlist: int = 256,
+        ivf_nprobe: int = 8,
+        hnsw_m: int = 32,
+        hnsw_ef_search: int = 64
+    ):
+        if index_type not in (INDEX_FLAT, INDEX_IVF, INDEX_HNSW):
+            raise ValueError(f"Tipo de índice FAISS no soportado: {index_type}")
+
+        self.index_type = index_type
+        self.ivf_nlist = ivf_nlist
+        self.ivf_nprobe = ivf_nprobe
+        self.hnsw_m = hnsw_m
+        self.hnsw_ef_search = hnsw_ef_search
+
+        self.dim: Optional[int] = None
+        self._index = None
+        self._built_type: Optional[str] = None
+        self._labels: Dict[str, int] = {}
+        self._ids_by_label: Dict[int, str] = {}
+        self._deleted: Set[int] = set()
+        self._next_label = 0
+
+    def __len__(self) -> int:
+        return len(self._labels)
+
+    def __contains__(self, person_id: str) -> bool:
+        return person_id in self._labels
+
+    @property
+    def ids(self) -> List[str]:
+        return list(self._labels.keys())
+
+    @property
+    def needs_rebuild(self) -> bool:
+        if self._built_type == INDEX_HNSW:
+            total = len(self._labels) + len(self._deleted)
+            return total > 0 and len(self._deleted) / total > HNSW_MAX_TOMBSTONE_RATIO
+
+        if self.index_type == INDEX_IVF and self._built_type == INDEX_FLAT:
+            return len(self._labels) >= IVF_MIN_POINTS_PER_CENTROID * 2
+
+        return False
+
+    def _new_index(self, dim: int, vectors: Optional[np.ndarray] = None):
+        import faiss
+
+        built_type = self.index_type
+        if built_type == INDEX_IVF:
+            count = 0 if vectors is None else vectors.shape[0]
+            nlist = min(self.ivf_nlist, count // IVF_MIN_POINTS_PER_CENTROID)
+            if nlist < 2:
+                built_type = INDEX_FLAT
+            else:
+                quantizer = faiss.IndexFlatIP(dim)
+                index = faiss.IndexIVFFlat(quantizer, dim, nlist, faiss.METRIC_INNER_PRODUCT)
+                index.train(vectors)
+                index.nprobe = min(self.ivf_nprobe, nlist)
+
+        if built_type == INDEX_FLAT:
+            index = faiss.IndexIDMap2(faiss.IndexFlatIP(dim))
+        elif built_type == INDEX_HNSW:
+            hnsw = faiss.IndexHNSWFlat(dim, self.hnsw_m, faiss.METRIC_INNER_PRODUCT)
+            hnsw.hnsw.efSearch = self.hnsw_ef_search
+            index = faiss.IndexIDMap2(hnsw)
+
+        self.dim = dim
+        self._index = index
+        self._built_type = built_type
+
+    def add(self, person_id: str, embedding: np.ndarray):
+        vector = l2_normalize(embedding)
+
+        if self._index is None:
+            self._new_index(vector.shape[0])
+        elif vector.shape[0] != self.dim:
+            raise ValueError(f"Dimensión de embedding inválida: {vector.shape[0]} (esperado {self.dim})")
+
+        if person_id in self._labels:
+            self.remove(person_id)
+
+        label = self._next_label
+        self._next_label += 1
+        self._index.add_with_ids(vector[np.newaxis, :], np.array([label], dtype=np.int64))
+        self._labels[person_id] = label
+        self._ids_by_label[label] = person_id
+
+    def remove(self, person_id: str) -> bool:
+        label = self._labels.pop(person_id, None)
+        if label is None:
+            return False
+
+        del self._ids_by_label[label]
+
+        if self._built_type == INDEX_HNSW:
+            self._deleted.add(label)
+        else:
+            self._index.remove_ids(np.array([label], dtype=np.int64))
+
+        return True
+
+    def search(self, embedding: np.ndarray, k: int) -> Tuple[List[str], np.ndarray]:
+        if self._index is None or not self._labels or k <= 0:
+            return [], np.zeros(0, dtype=np.float32)
+
+        query = l2_normalize(embedding)[np.newaxis, :]
+        fetch = min(k + len(self._deleted), self._index.ntotal)
+        scores, labels = self._index.search(query, fetch)
+
+        ids = []
+        kept = []
+        for score, label in zip(scores[0], labels[0]):
+            person_id = self._ids_by_label.get(int(label))
+            if person_id is None:
+                continue
+            ids.append(person_id)
+            kept.append(score)
+            if len(ids) == k:
+                break
+
+        return ids, np.array(kept, dtype=np.float32)
+
+    def rebuild(self, items: Iterable[Tuple[str, np.ndarray]]):
+        person_ids = []
+        vectors = []
+        for person_id, embedding in items:
+            person_ids.append(person_id)
+            vectors.append(l2_normalize(embedding))
+
+        self._labels = {}
+        self._ids_by_label = {}
+        self._deleted = set()
+        self._next_label = 0
+        self._index = None
+        self._built_type = None
+
+        if not vectors:
+            return
+
+        matrix = np.ascontiguousarray(np.stack(vectors))
+        labels = np.arange(len(person_ids), dtype=np.int64)
+
+        self._new_index(matrix.shape[1], matrix)
+        self._index.add_with_ids(matrix, labels)
+
+        self._labels = dict(zip(person_ids, labels.tolist()))
+        self._ids_by_label = dict(zip(labels.tolist(), person_ids))
+        self._next_label = len(person_ids)
+
+    def save(self, path: str, stamps: Optional[Dict[str, list]] = None):
+        import faiss
+
+        if self._index is None:
+            return
+
+        tmp_path = f"{path}.tmp"
+        faiss.write_index(self._index, tmp_path)
+        os.replace(tmp_path, path)
+
+        with open(f"{tmp_path}.json", "w", encoding="utf-8") as f:
+            json.dump({
+                "index_type": self.index_type,
+                "built_type": self._built_type,
+                "dim": self.dim,
+                "labels": self._labels,
+                "deleted": sorted(self._deleted),
+                "next_label": self._next_label,
+                "stamps": stamps
+            }, f)
+        os.replace(f"{tmp_path}.json", f"{path}.json")
+
+    def load(self, path: str) -> bool:
+        import faiss
+
+        meta_path = f"{path}.json"
+        if not os.path.exists(path) or not os.path.exists(meta_path):
+            return False
+
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+
+        if meta.get("index_type") != self.index_type:
+            return False
+
+        self._index = faiss.read_index(path)
+        self._built_type = meta["built_type"]
+        self.dim = meta["dim"]
+        self._labels = {person_id: int(label) for person_id, label in meta["labels"].items()}
+        self._ids_by_label = {label: person_id for person_id, label in self._labels.items()}
+        self._deleted = set(meta["deleted"])
+        self._next_label = meta["next_label"]
+        self.stamps = meta.get("stamps")
+
+        if self._built_type == INDEX_IVF:
+            self._index.nprobe = min(self.ivf_nprobe, self._index.nlist)
+        elif self._built_type == INDEX_HNSW:
+            faiss.downcast_index(self._index.index).hnsw.efSearch = self.hnsw_ef_search
+
+        return True
+
+
+class SampleMatrixIndex:
+    def __init__(self, max_samples: int, mode: str = MATCH_MAX, top_k: int = 3, initial_capacity: int = 64):
+        if mode not in (MATCH_MAX, MATCH_MEAN_TOP_K):
+            raise ValueError(f"Modo de comparación por muestras no soportado: {mode}")
+
+        self.max_samples = max_samples
+        self.mode = mode
+        self.top_k = min(top_k, max_samples)
+        self.dim: Optional[int] = None
+        self._capacity = initial_capacity
+        self._size = 0
+        self._matrix: Optional[np.ndarray] = None
+        self._counts = np.zeros(initial_capacity, dtype=np.int64)
+        self._ids = np.empty(initial_capacity, dtype=object)
+        self._slots: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, person_id: str) -> bool:
+        return person_id in self._slots
+
+    def _ensure_capacity(self, dim: int):
+        if self._matrix is None:
+            self.dim = dim
+            self._matrix = np.zeros((self._capacity, self.max_samples, dim), dtype=np.float32)
+
+        if dim != self.dim:
+            raise ValueError(f"Dimensión de embedding inválida: {dim} (esperado {self.dim})")
+
+        if self._size < self._capacity:
+            return
+
+        self._capacity *= 2
+        matrix = np.zeros((self._capacity, self.max_samples, self.dim), dtype=np.float32)
+        matrix[:self._size] = self._matrix[:self._size]
+        self._matrix = matrix
+
+        counts = np.zeros(self._capacity, dtype=np.int64)
+        counts[:self._size] = self._counts[:self._size]
+        self._counts = counts
+
+        ids = np.empty(self._capacity, dtype=object)
+        ids[:self._size] = self._ids[:self._size]
+        self._ids = ids
+
+    def set(self, person_id: str, embeddings: np.ndarray):
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        vectors = vectors.reshape(-1, vectors.shape[-1])[-self.max_samples:]
+        lengths = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(lengths > 0, lengths, 1.0)
+
+        slot = self._slots.get(person_id)
+        if slot is None:
+            self._ensure_capacity(vectors.shape[1])
+            slot = self._size
+            self._ids[slot] = person_id
+            self._slots[person_id] = slot
+            self._size += 1
+
+        self._matrix[slot] = 0.0
+        self._matrix[slot, :vectors.shape[0]] = vectors
+        self._counts[slot] = vectors.shape[0]
+
+    def remove(self, person_id: str) -> bool:
+        slot = self._slots.pop(person_id, None)
+        if slot is None:
+            return False
+
+        last = self._size - 1
+        if slot != last:
+            moved_id = self._ids[last]
+            self._matrix[slot] = self._matrix[last]
+            self._counts[slot] = self._counts[last]
+            self._ids[slot] = moved_id
+            self._slots[moved_id] = slot
+
+        self._ids[last] = None
+        self._counts[last] = 0
+        self._size = last
+        return True
+
+    def rebuild(self, items: Iterable[Tuple[str, np.ndarray]]):
+        self._size = 0
+        self._slots = {}
+        self._ids = np.empty(self._capacity, dtype=object)
+        self._counts = np.zeros(self._capacity, dtype=np.int64)
+        for person_id, embeddings in items:
+            self.set(person_id, embeddings)
+
+    def rescore(self, embedding: np.ndarray, person_ids: List[str]) -> Tuple[List[str], np.ndarray]:
+        slots = np.array([self._slots[p] for p in person_ids if p in self._slots], dtype=np.int64)
+        if slots.shape[0] == 0:
+            return [], np.zeros(0, dtype=np.float32)
+
+        scores = self._matrix[slots] @ l2_normalize(embedding)
+        counts = self._counts[slots]
+        valid = np.arange(self.max_samples)[np.newaxis, :] < counts[:, np.newaxis]
+        scores = np.where(valid, scores, -np.inf)
+
+        if self.mode == MATCH_MAX:
+            speaker_scores = scores.max(axis=1)
+        else:
+            k = self.top_k
+            top = -np.partition(-scores, k - 1, axis=1)[:, :k] if k < self.max_samples else scores
+            top = np.where(np.isfinite(top), top, 0.0)
+            speaker_scores = top.sum(axis=1) / np.minimum(counts, k)
+
+        order = np.argsort(-speaker_scores, kind="stable")
+        return self._ids[slots[order]].tolist(), speaker_scores[order].astype(np.float32)
+
+
+def create_voice_index(index_type: str = INDEX_MATRIX, **options):
+    if index_type == INDEX_MATRIX:
+        return MatrixVoiceIndex()
+    return FaissVoiceIndex(index_type, **options)
@@ -1,7 +1,9 @@
 import numpy as np
-from typing import Dict
+from typing import Dict, Optional, Union
 from numpy.linalg import norm
 from app.config import settings
+from app.core.score_norm import ScoreNormalizer
+from app.core.voice_index import MatrixVoiceIndex, FaissVoiceIndex, SampleMatrixIndex
 
 
 class VoiceMatcher:
@@ -10,32 +12,67 @@ class VoiceMatcher:
         return float(np.dot(a, b) / (norm(a) * norm(b)))
 
     @staticmethod
-    def find_match(embedding: np.ndarray, voice_pool: Dict[str, np.ndarray], threshold: float = None) -> dict:
+    def find_match(
+        embedding: np.ndarray,
+        voice_index: Union[MatrixVoiceIndex, FaissVoiceIndex],
+        threshold: float = None,
+        sample_index: Optional[SampleMatrixIndex] = None,
+        score_normalizer: Optional[ScoreNormalizer] = None,
+        top_k: int = None
+    ) -> dict:
         if threshold is None:
             threshold = settings.DEFAULT_THRESHOLD
 
-        if not voice_pool:
+        if top_k is None:
+            top_k = settings.RESULT_TOP_K
+
+        if len(voice_index) == 0:
             return {
                 "identified": False,
                 "person_id": None,
                 "score": 0.0,
                 "all_scores": {},
+                "margin": 0.0,
                 "message": "BD vacía - no hay voces registradas"
             }
 
-        scores = {}
-        for name, emb in voice_pool.items():
-            scores[name] = VoiceMatcher.cosine_similarity(embedding, emb)
+        if not voice_index.exhaustive:
+            k = max(settings.VOICE_INDEX_SEARCH_K, top_k)
+        elif sample_index is not None or score_normalizer is not None:
+            k = len(voice_index)
+        else:
+            k = max(top_k, 2)
+        ids, scores = voice_index.search(embedding, k=k)
+        if sample_index is not None and ids:
+            ids, scores = sample_index.rescore(embedding, ids)
+
+        raw_scores = scores
+        score_norm = None
+        if score_normalizer is not None and ids:
+            scores = score_normalizer.normalize(embedding, ids, scores)
+            order = np.argsort(-scores, kind="stable")
+            ids = [ids[i] for i in order]
+            scores = scores[order]
+            raw_scores = raw_scores[order]
+            score_norm = score_normalizer.method
+            threshold = settings.SCORE_NORM_THRESHOLD
+
+        all_scores = dict(zip(ids[:top_k], scores[:top_k].tolist()))
 
-        best_match = max(scores, key=scores.get)
-        best_score = scores[best_match]
+        best_match = ids[0]
+        best_score = float(scores[0])
+        margin = best_score - float(scores[1]) if len(scores) > 1 else best_score
 
         if best_score >= threshold:
             return {
                 "identified": True,
                 "person_id": best_match,
                 "score": best_score,
-                "all_scores": scores,
+                "raw_score": float(raw_scores[0]),
+                "score_norm": score_norm,
+                "all_scores": all_scores,
+                "top_k": top_k,
+                "margin": margin,
                 "threshold": threshold
             }
         else:
@@ -43,7 +80,45 @@ class VoiceMatcher:
                 "identified": False,
                 "person_id": None,
                 "score": best_score,
-                "all_scores": scores,
+                "raw_score": float(raw_scores[0]),
+                "score_norm": score_norm,
+                "all_scores": all_scores,
+                "top_k": top_k,
+                "margin": margin,
                 "threshold": threshold,
                 "message": f"Desconocido (mejor score={best_score:.3f})"
             }
+
+    @staticmethod
+    def verify(embedding: np.ndarray, reference: np.ndarray, person_id: str, threshold: float) -> dict:
+        score = VoiceMatcher.cosine_similarity(np.asarray(embedding).reshape(-1), np.asarray(reference).reshape(-1))
+        result = {
+            "identified": score >= threshold,
+            "person_id": person_id if score >= threshold else None,
+            "score": score,
+            "raw_score": score,
+            "all_scores": {person_id: score},
+            "top_k": 1,
+            "margin": score,
+            "threshold": threshold
+        }
+        if not result["identified"]:
+            result["message"] = f"Verificación 1:1 fallida contra '{person_id}' (score={score:.3f})"
+        return result
+
+    @staticmethod
+    def score_all(
+        embedding: np.ndarray,
+        voice_index: Union[MatrixVoiceIndex, FaissVoiceIndex],
+        sample_index: Optional[SampleMatrixIndex] = None,
+        score_normalizer: Optional[ScoreNormalizer] = None
+    ) -> Dict[str, float]:
+        ids, scores = voice_index.search(embedding, k=len(voice_index))
+        if sample_index is not None and ids:
+            ids, scores = sample_index.rescore(embedding, ids)
+        if score_normalizer is not None and ids:
+            scores = score_normalizer.normalize(embedding, ids, scores)
+            order = np.argsort(-scores, kind="stable")
+            ids = [ids[i] for i in order]
+            scores = scores[order]
+        return dict(zip(ids, scores.tolist()))
@@ -13,15 +13,102 @@ class ModelManager:
 
     def get_classifier(self):
         if self._classifier is None:
-            from speechbrain.pretrained import EncoderClassifier
-            self._classifier = EncoderClassifier.from_hparams(
-                source=settings.MODEL_DIR,
-                savedir=settings.MODEL_DIR,
-                run_opts={"device": "cpu"}
-            )
+            self._classifier = self._optimize(self._load_classifier())
+
+            if settings.INFERENCE_WARMUP:
+                from app.core.optimized_encoder import warm_up
+                warm_up(self._classifier, settings.TARGET_DURATION_SEC, settings.SAMPLE_RATE)
         return self._classifier
 
+    def _load_classifier(self):
+        from app.core.model_cache import export_verified_model_cache, is_cache_valid, load_model_cache
+        from app.core.optimized_encoder import parity_waveforms
+
+        if settings.MODEL_CACHE_ENABLED and is_cache_valid(settings.MODEL_CACHE_PATH, settings.MODEL_DIR):
+            return load_model_cache(settings.MODEL_CACHE_PATH)
+
+        from speechbrain.pretrained import EncoderClassifier
+        classifier = EncoderClassifier.from_hparams(
+            source=settings.MODEL_DIR,
+            savedir=settings.MODEL_DIR,
+            run_opts={"device": "cpu"}
+        )
+
+        if settings.MODEL_CACHE_ENABLED:
+            try:
+                cached, report = export_verified_model_cache(
+                    classifier,
+                    settings.MODEL_CACHE_PATH,
+                    settings.MODEL_DIR,
+                    parity_waveforms((3.0,), settings.SAMPLE_RATE)
+                )
+                if cached is not None:
+                    return cached
+                print(f"Caché del modelo descartada: coseno mínimo vs original={report['min_cosine']:.6f}")
+            except Exception as e:
+                print(f"No se pudo generar la caché del modelo: {str(e)}")
+
+        return classifier
+
+    def _optimize(self, classifier):
+        from app.core.optimized_encoder import BACKEND_EAGER, OptimizedEncoder, check_parity, parity_waveforms
+
+        if settings.INFERENCE_BACKEND == BACKEND_EAGER:
+            return classifier
+
+        try:
+            encoder = OptimizedEncoder(
+                classifier,
+                settings.INFERENCE_BACKEND,
+                cache_dir=settings.MODEL_DIR,
+                sample_rate=settings.SAMPLE_RATE
+            )
+        except Exception as e:
+            print(f"No se pudo construir el backend '{settings.INFERENCE_BACKEND}': {str(e)} - usando eager")
+            return classifier
+
+        waveforms = parity_waveforms((3.0, settings.TARGET_DURATION_SEC), settings.SAMPLE_RATE)
+        report = check_parity(classifier, encoder, waveforms)
+        print(
+            f"Backend '{settings.INFERENCE_BACKEND}': coseno mínimo vs fp32={report['min_cosine']:.5f} "
+            f"(deriva={report['max_drift']:.5f})"
+        )
+
+        if report["min_cosine"] < settings.INFERENCE_PARITY_MIN_COSINE:
+            print(f"Deriva sobre el límite ({settings.INFERENCE_PARITY_MIN_COSINE}) - usando eager")
+            return classifier
+
+        return encoder
+
 
 @lru_cache()
 def get_model_manager() -> ModelManager:
     return ModelManager()
+
+
+@lru_cache()
+def get_inference_executor():
+    from app.core.inference_executor import InferenceExecutor
+    return InferenceExecutor(
+        mode=settings.INFERENCE_EXECUTOR,
+        max_workers=settings.INFERENCE_WORKERS,
+        torch_threads=settings.INFERENCE_TORCH_THREADS,
+        max_queue=settings.INFERENCE_MAX_QUEUE,
+        queue_timeout=settings.INFERENCE_QUEUE_TIMEOUT_SEC
+    )
+
+
+@lru_cache()
+def get_caller_cache():
+    from app.services.caller_cache import CallerCache
+    return CallerCache(
+        ttl_sec=settings.CALLER_CACHE_TTL_SEC,
+        max_entries=settings.CALLER_CACHE_MAX_ENTRIES,
+        max_bytes=int(settings.CALLER_CACHE_MAX_MB * 1024 * 1024)
+    )
+
+
+@lru_cache()
+def get_voice_repository():
+    from app.repositories.voice_repository import VoiceRepository
+    return VoiceRepository()
@@ -1,15 +1,16 @@
 import uuid
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from typing import List
+from fastapi import FastAPI, Query, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.websockets import WebSocketState
 from app.config import settings
-from app.dependencies import get_model_manager
+from app.dependencies import get_model_manager, get_inference_executor, get_voice_repository
 from app.api.v1 import voices, sessions
+from app.api.upload_limit import UploadSizeLimitMiddleware
 from app.api.v1.sessions import get_audio_buffer, get_protocol_handler, get_session_service
-from app.websocket.connection_manager import ConnectionManager
+from app.websocket.connection_manager import ALL_CONVERSATIONS, ConnectionManager
 from app.websocket.audiohook_handler import AudioHookHandler
 from app.websocket.audiohook_protocol import AudioHookProtocolHandler
-from app.repositories.voice_repository import VoiceRepository
 
 app = FastAPI(
     title=settings.APP_NAME,
@@ -25,11 +26,23 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(
+    UploadSizeLimitMiddleware,
+    limits={
+        "/api/v1/voices/register": settings.MAX_FILE_SIZE_MB * 1024 * 1024,
+        "/api/v1/voices/{person_id}/samples": settings.MAX_FILE_SIZE_MB * 1024 * 1024,
+        "/api/v1/voices/register/bulk": settings.BULK_ENROLL_MAX_ARCHIVE_MB * 1024 * 1024
+    }
+)
+
 app.include_router(voices.router, prefix="/api/v1")
 app.include_router(sessions.router, prefix="/api/v1")
 
-connection_manager = ConnectionManager()
-voice_repository = VoiceRepository()
+connection_manager = ConnectionManager(
+    queue_size=settings.RESULT_QUEUE_SIZE,
+    send_timeout=settings.RESULT_SEND_TIMEOUT_SEC
+)
+voice_repository = get_voice_repository()
 audio_buffer = get_audio_buffer()
 protocol_handler = get_protocol_handler()
 session_service = get_session_service()
@@ -48,7 +61,16 @@ async def startup_event():
     model_mgr = get_model_manager()
     model_mgr.get_classifier()
     print("Modelo ECAPA-TDNN precargado exitosamente")
+    executor = get_inference_executor()
+    print(f"Ejecutor de inferencia: {executor.mode} ({executor.max_workers} workers)")
     print("WebSocket endpoint disponible en: ws://localhost:8000/ws/audiohook")
+    print("Resultados disponibles en: ws://localhost:8000/ws/results")
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    get_inference_executor().shutdown()
+    voice_repository.persist_index()
 
 
 @app.get("/api/health")
@@ -56,10 +78,41 @@ async def health_check():
     return {
         "status": "healthy",
         "model_loaded": True,
-        "version": settings.VERSION
+        "version": settings.VERSION,
+        "inference": get_inference_executor().get_stats(),
+        "batching": audiohook_handler.embedding_batcher.get_stats(),
+        "feature_batching": audiohook_handler.feature_batcher.get_stats(),
+        "results": connection_manager.get_stats(),
+        "caller_cache": audiohook_handler.caller_cache.get_stats() if audiohook_handler.caller_cache else None
     }
 
 
+@app.websocket("/ws/results")
+async def websocket_results(
+    websocket: WebSocket,
+    conversation_id: List[str] = Query(default=[])
+):
+    subscriber = await connection_manager.connect(websocket, topics=conversation_id or [ALL_CONVERSATIONS])
+    client_id = subscriber.subscriber_id
+
+    try:
+        while True:
+            message = await websocket.receive_json()
+            action = message.get("action")
+            topic = message.get("conversation_id") or ALL_CONVERSATIONS
+
+            if action == "subscribe":
+                connection_manager.subscribe(client_id, topic)
+            elif action == "unsubscribe":
+                connection_manager.unsubscribe(client_id, topic)
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        print(f"Error en WebSocket de resultados: {str(e)}")
+    finally:
+        connection_manager.disconnect(client_id)
+
+
 @app.websocket("/ws/audiohook")
 async def websocket_audiohook(websocket: WebSocket):
     await websocket.accept()
@@ -85,20 +138,18 @@ async def websocket_audiohook(websocket: WebSocket):
 
             elif "bytes" in message:
                 audio_data = message["bytes"]
-                if protocol_handler.handle_audio_frame(audio_data, session):
-                    conversation_id = session.conversation_id
-                    if conversation_id:
-                        duration = audio_buffer.get_accumulated_duration(conversation_id)
-                        if duration >= settings.TARGET_DURATION_SEC:
-                            await audiohook_handler.identify_speaker(conversation_id)
+                duration = protocol_handler.handle_audio_frame(audio_data, session)
+                if duration is not None:
+                    await audiohook_handler.process_audio(session.conversation_id)
 
     except WebSocketDisconnect:
         print(f"WebSocket desconectado: {session_id}")
     except Exception as e:
         print(f"Error en WebSocket: {str(e)}")
     finally:
-        if session.conversation_id:
+        if session.conversation_id and protocol_handler.owns_conversation(session):
             audio_buffer.delete_session(session.conversation_id)
+            session_service.cancel_identification(session.conversation_id)
         protocol_handler.delete_session(session_id)
         if websocket.client_state == WebSocketState.CONNECTED:
             await websocket.close()
@@ -0,0 +1,417 @@
+import json
+import os
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+STORE_FORMAT_VERSION = 1
+LOCK_TIMEOUT_SEC = 10.0
+LOCK_STALE_SEC = 30.0
+COMPACTION_CHUNK_ROWS = 10000
+
+
+class StoreLock:
+    def __init__(self, path: str):
+        self.path = path
+
+    def __enter__(self):
+        deadline = time.monotonic() + LOCK_TIMEOUT_SEC
+        while True:
+            try:
+                fd = os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                os.write(fd, str(os.getpid()).encode())
+                os.close(fd)
+                return self
+            except FileExistsError:
+                try:
+                    if time.time() - os.path.getmtime(self.path) > LOCK_STALE_SEC:
+                        os.remove(self.path)
+                        continue
+                except FileNotFoundError:
+                    continue
+
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"No se pudo bloquear el almacén de voces ({self.path})")
+                time.sleep(0.01)
+
+    def heartbeat(self):
+        try:
+            os.utime(self.path)
+        except FileNotFoundError:
+            pass
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+class VoiceRecord:
+    __slots__ = ("rows", "registered_at", "updated_at")
+
+    def __init__(self, rows: List[int], registered_at: float, updated_at: float = None):
+        self.rows = rows
+        self.registered_at = registered_at
+        self.updated_at = updated_at if updated_at is not None else registered_at
+
+    @property
+    def stamp(self) -> Tuple[float, float, int]:
+        return self.registered_at, self.updated_at, len(self.rows)
+
+
+class EmbeddingStore:
+    def __init__(self, directory: str, compaction_ratio: float = 0.3, compaction_min_rows: int = 64):
+        self.directory = directory
+        self.compaction_ratio = compaction_ratio
+        self.compaction_min_rows = compaction_min_rows
+
+        self._manifest_path = os.path.join(directory, "store.json")
+        self._lock_path = os.path.join(directory, "store.lock")
+
+        self.generation = 0
+        self.dim: Optional[int] = None
+        self.records: Dict[str, VoiceRecord] = {}
+        self.matrix: Optional[np.memmap] = None
+        self._rows_total = 0
+        self._live_rows = 0
+        self._log_offset = 0
+        self._changes: List[Tuple[str, str, List[int]]] = []
+
+        self.open()
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __contains__(self, person_id: str) -> bool:
+        return person_id in self.records
+
+    @property
+    def initialized(self) -> bool:
+        return os.path.exists(self._manifest_path)
+
+    @property
+    def embeddings_path(self) -> str:
+        return os.path.join(self.directory, f"embeddings.{self.generation}.f32")
+
+    @property
+    def metadata_path(self) -> str:
+        return os.path.join(self.directory, f"metadata.{self.generation}.jsonl")
+
+    @property
+    def row_bytes(self) -> int:
+        return (self.dim or 0) * np.dtype(np.float32).itemsize
+
+    @property
+    def needs_compaction(self) -> bool:
+        dead_rows = self._rows_total - self._live_rows
+        return (
+            self._rows_total >= self.compaction_min_rows
+            and dead_rows / self._rows_total > self.compaction_ratio
+        )
+
+    def _read_manifest(self) -> dict:
+        if not os.path.exists(self._manifest_path):
+            return {"version": STORE_FORMAT_VERSION, "generation": 0, "dim": None}
+
+        with open(self._manifest_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _write_manifest(self):
+        tmp_path = f"{self._manifest_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": STORE_FORMAT_VERSION, "generation": self.generation, "dim": self.dim}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self._manifest_path)
+
+    def open(self):
+        os.makedirs(self.directory, exist_ok=True)
+
+        previous = self.records
+        touched = dict.fromkeys(person_id for _, person_id, _ in self._changes)
+
+        manifest = self._read_manifest()
+        self.generation = manifest["generation"]
+        self.dim = manifest["dim"]
+        self.records = {}
+        self._live_rows = 0
+        self._log_offset = 0
+
+        self._read_log()
+        self._remap()
+
+        touched.update(dict.fromkeys(previous.keys() - self.records.keys()))
+        touched.update(dict.fromkeys(
+            person_id for person_id, record in self.records.items()
+            if person_id not in previous or previous[person_id].stamp != record.stamp
+        ))
+        self._changes = [
+            ("delete", person_id, []) for person_id in touched if person_id not in self.records
+        ] + [
+            ("add", person_id, self.records[person_id].rows) for person_id in touched if person_id in self.records
+        ]
+
+    def _remap(self):
+        if not self.dim or not os.path.exists(self.embeddings_path):
+            self.matrix = None
+            self._rows_total = 0
+            return
+
+        self._rows_total = os.path.getsize(self.embeddings_path) // self.row_bytes
+        if self._rows_total == 0:
+            self.matrix = None
+            return
+
+        self.matrix = np.memmap(
+            self.embeddings_path,
+            dtype=np.float32,
+            mode="r",
+            shape=(self._rows_total, self.dim)
+        )
+
+    def _read_log(self) -> bool:
+        try:
+            size = os.path.getsize(self.metadata_path)
+        except FileNotFoundError:
+            return False
+
+        if size <= self._log_offset:
+            return False
+
+        with open(self.metadata_path, "rb") as f:
+            f.seek(self._log_offset)
+            data = f.read()
+
+        lines = data.split(b"\n")
+        for line in lines[:-1]:
+            self._log_offset += len(line) + 1
+            if line:
+                self._apply(json.loads(line))
+
+        return len(lines) > 1
+
+    def _apply(self, entry: dict):
+        if entry["op"] == "add":
+            for person_id, rows, registered_at, *updated_at in entry["items"]:
+                rows = rows if isinstance(rows, list) else [rows]
+                self.records[person_id] = VoiceRecord(rows, registered_at, *updated_at)
+                self._live_rows += len(rows)
+                self._changes.append(("add", person_id, rows))
+        elif entry["op"] == "sample":
+            record = self.records.get(entry["person_id"])
+            if record is None:
+                return
+            evicted = entry.get("evicted", [])
+            record.rows = [row for row in record.rows if row not in evicted] + entry["rows"]
+            record.updated_at = entry["updated_at"]
+            self._live_rows += len(entry["rows"]) - len(evicted)
+            self._changes.append(("sample", entry["person_id"], entry["rows"]))
+            if evicted:
+                self._changes.append(("evict", entry["person_id"], evicted))
+        elif entry["op"] == "delete":
+            record = self.records.pop(entry["person_id"], None)
+            if record is not None:
+                self._live_rows -= len(record.rows)
+                self._changes.append(("delete", entry["person_id"], []))
+
+    def _append_log(self, entry: dict):
+        line = (json.dumps(entry) + "\n").encode("utf-8")
+        with open(self.metadata_path, "a+b") as f:
+            end = f.seek(0, os.SEEK_END)
+            if end > self._log_offset:
+                f.seek(self._log_offset)
+                if b"\n" in f.read():
+                    raise RuntimeError(f"El log de voces avanzó sin sincronizar ({self.metadata_path})")
+                f.truncate(self._log_offset)
+                f.seek(self._log_offset)
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+
+        self._log_offset += len(line)
+        self._apply(entry)
+
+    def _sync(self, check_manifest: bool = False) -> bool:
+        if check_manifest or not os.path.exists(self.metadata_path):
+            if self._read_manifest()["generation"] != self.generation:
+                self.open()
+                return True
+
+        if self._read_log():
+            if self.dim is None:
+                self.dim = self._read_manifest()["dim"]
+            self._remap()
+        return False
+
+    def _sync_locked(self):
+        self._sync(check_manifest=True)
+
+    def refresh(self) -> bool:
+        return self._sync()
+
+    def drain_changes(self) -> List[Tuple[str, str, List[int]]]:
+        changes, self._changes = self._changes, []
+        return changes
+
+    def get_rows(self, rows: List[int]) -> np.ndarray:
+        return self.matrix[rows]
+
+    def get_embeddings(self, person_id: str) -> np.ndarray:
+        return self.matrix[self.records[person_id].rows]
+
+    def _prepare_vectors(self, embeddings) -> np.ndarray:
+        vectors = np.stack([np.asarray(e, dtype=np.float32).reshape(-1) for e in embeddings])
+
+        if self.dim is None:
+            self.dim = vectors.shape[1]
+            self._write_manifest()
+        elif vectors.shape[1] != self.dim:
+            raise ValueError(f"Dimensión de embedding inválida: {vectors.shape[1]} (esperado {self.dim})")
+
+        return vectors
+
+    def _write_rows(self, vectors: np.ndarray) -> List[int]:
+        mode = "r+b" if os.path.exists(self.embeddings_path) else "wb"
+        with open(self.embeddings_path, mode) as f:
+            end = f.seek(0, os.SEEK_END)
+            end -= end % self.row_bytes
+            f.truncate(end)
+            f.write(vectors.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+
+        first_row = end // self.row_bytes
+        return list(range(first_row, first_row + vectors.shape[0]))
+
+    def append(self, items: Iterable[tuple], registered_at: float = None):
+        items = list(items)
+        if not items:
+            return
+
+        if registered_at is None:
+            registered_at = time.time()
+
+        with StoreLock(self._lock_path):
+            self._sync_locked()
+
+            for person_id, *_ in items:
+                if person_id in self.records:
+                    raise FileExistsError(f"Voz '{person_id}' ya existe")
+
+            rows = self._write_rows(self._prepare_vectors(item[1] for item in items))
+            self._append_log({
+                "op": "add",
+                "items": [
+                    [item[0], row, item[2] if len(item) > 2 else registered_at]
+                    for item, row in zip(items, rows)
+                ]
+            })
+            self._remap()
+
+    def append_samples(self, person_id: str, embeddings, max_samples: int, updated_at: float = None) -> int:
+        embeddings = list(embeddings)[-max_samples:]
+        if not embeddings:
+            return 0
+
+        if updated_at is None:
+            updated_at = time.time()
+
+        with StoreLock(self._lock_path) as lock:
+            self._sync_locked()
+
+            record = self.records.get(person_id)
+            if record is None:
+                raise FileNotFoundError(f"Voz '{person_id}' no encontrada")
+
+            rows = self._write_rows(self._prepare_vectors(embeddings))
+            overflow = len(record.rows) + len(rows) - max_samples
+            evicted = record.rows[:max(overflow, 0)]
+
+            self._append_log({
+                "op": "sample",
+                "person_id": person_id,
+                "rows": rows,
+                "evicted": evicted,
+                "updated_at": updated_at
+            })
+            self._remap()
+
+            if self.needs_compaction:
+                self._compact(lock)
+
+            return len(evicted)
+
+    def delete(self, person_id: str):
+        with StoreLock(self._lock_path) as lock:
+            self._sync_locked()
+
+            if person_id not in self.records:
+                raise FileNotFoundError(f"Voz '{person_id}' no encontrada")
+
+            self._append_log({"op": "delete", "person_id": person_id})
+
+            if self.needs_compaction:
+                self._compact(lock)
+
+    def compact(self):
+        with StoreLock(self._lock_path) as lock:
+            self._sync_locked()
+            self._compact(lock)
+
+    def _compact(self, lock: StoreLock):
+        old_paths = (self.embeddings_path, self.metadata_path)
+        live = sorted(self.records.items(), key=lambda item: item[1].rows[0])
+        source = self.matrix
+
+        self.generation += 1
+
+        next_row = 0
+        with open(self.embeddings_path, "wb") as data, open(self.metadata_path, "wb") as log:
+            for start in range(0, len(live), COMPACTION_CHUNK_ROWS):
+                chunk = live[start:start + COMPACTION_CHUNK_ROWS]
+                rows = np.array([row for _, record in chunk for row in record.rows], dtype=np.int64)
+                data.write(np.ascontiguousarray(source[rows]).tobytes())
+
+                items = []
+                for person_id, record in chunk:
+                    new_rows = list(range(next_row, next_row + len(record.rows)))
+                    next_row += len(record.rows)
+                    items.append([person_id, new_rows, record.registered_at, record.updated_at])
+                log.write((json.dumps({"op": "add", "items": items}) + "\n").encode("utf-8"))
+                lock.heartbeat()
+
+            for f in (data, log):
+                f.flush()
+                os.fsync(f.fileno())
+                lock.heartbeat()
+
+        self._write_manifest()
+
+        self.open()
+
+        for path in old_paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def import_npy_directory(store: EmbeddingStore, directory: str) -> int:
+    items = []
+    for file in sorted(os.listdir(directory)):
+        if not file.endswith(".npy"):
+            continue
+
+        person_id = file[:-len(".npy")]
+        if person_id in store:
+            continue
+
+        file_path = os.path.join(directory, file)
+        items.append((person_id, np.load(file_path), os.path.getmtime(file_path)))
+
+    for start in range(0, len(items), COMPACTION_CHUNK_ROWS):
+        store.append(items[start:start + COMPACTION_CHUNK_ROWS])
+
+    return len(items)
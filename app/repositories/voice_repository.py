@@ -1,77 +1,296 @@
-import os
 import numpy as np
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple, Union
 from datetime import datetime
 from app.config import settings
+from app.core.voice_index import (
+    MATCH_CENTROID,
+    FaissVoiceIndex,
+    MatrixVoiceIndex,
+    SampleMatrixIndex,
+    create_voice_index,
+    l2_normalize
+)
+from app.core.score_norm import NORM_NONE, ScoreNormalizer, load_cohort
+from app.repositories.embedding_store import EmbeddingStore, import_npy_directory
 
 
 class VoiceRepository:
     def __init__(self):
-        self._cache = {}
-        self._load_all_to_cache()
+        self._store = EmbeddingStore(
+            settings.VOICES_DB,
+            compaction_ratio=settings.VOICE_STORE_COMPACTION_RATIO,
+            compaction_min_rows=settings.VOICE_STORE_COMPACTION_MIN_ROWS
+        )
+        self._index = create_voice_index(
+            settings.VOICE_INDEX_TYPE,
+            **self._index_options()
+        )
+        self._samples: Optional[SampleMatrixIndex] = None
+        if settings.VOICE_MATCH_MODE != MATCH_CENTROID:
+            self._samples = SampleMatrixIndex(
+                settings.VOICE_MAX_SAMPLES_PER_SPEAKER,
+                mode=settings.VOICE_MATCH_MODE,
+                top_k=settings.VOICE_MATCH_TOP_K
+            )
+        self._centroid_sums: Dict[str, np.ndarray] = {}
+        self._score_norm: Optional[ScoreNormalizer] = None
+        self._score_norm_enabled: Optional[bool] = None
+        self._cohort_members: Optional[set] = None
+        self.version = 0
+        self._migrate_legacy_files()
+        self._store.drain_changes()
+        self._load_index()
+        self._init_score_norm()
 
-    def _load_all_to_cache(self):
-        if not os.path.exists(settings.VOICES_DB):
-            os.makedirs(settings.VOICES_DB, exist_ok=True)
+    @staticmethod
+    def _index_options() -> dict:
+        if settings.VOICE_INDEX_TYPE == "matrix":
+            return {}
+        return {
+            "ivf_nlist": settings.VOICE_INDEX_IVF_NLIST,
+            "ivf_nprobe": settings.VOICE_INDEX_IVF_NPROBE,
+            "hnsw_m": settings.VOICE_INDEX_HNSW_M,
+            "hnsw_ef_search": settings.VOICE_INDEX_HNSW_EF_SEARCH
+        }
+
+    def _migrate_legacy_files(self):
+        if self._store.initialized:
+            return
+
+        imported = import_npy_directory(self._store, settings.VOICES_DB)
+        if imported:
+            print(f"📦 {imported} voces migradas de .npy al almacén de embeddings")
+
+    def _normalized_rows(self, rows: List[int]) -> np.ndarray:
+        vectors = np.asarray(self._store.get_rows(rows), dtype=np.float64)
+        lengths = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(lengths > 0, lengths, 1.0)
+
+    def _load_centroids(self):
+        person_ids = list(self._store.records)
+        self._centroid_sums = {}
+        if not person_ids:
+            return
+
+        counts = np.array([len(self._store.records[p].rows) for p in person_ids], dtype=np.int64)
+        rows = [row for p in person_ids for row in self._store.records[p].rows]
+        offsets = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        sums = np.add.reduceat(self._normalized_rows(rows), offsets, axis=0)
+        self._centroid_sums = dict(zip(person_ids, sums))
+
+    def _centroid(self, person_id: str) -> np.ndarray:
+        return l2_normalize(self._centroid_sums[person_id])
+
+    def _init_score_norm(self):
+        if settings.SCORE_NORM == NORM_NONE:
+            return
+
+        if settings.SCORE_NORM_COHORT_PATH:
+            self._set_score_norm(load_cohort(settings.SCORE_NORM_COHORT_PATH))
+        else:
+            self._rebuild_db_cohort()
+
+    def _rebuild_db_cohort(self):
+        cohort_ids = list(self._store.records)
+        cohort = np.stack([self._centroid(person_id) for person_id in cohort_ids]) if cohort_ids else np.zeros((0, 0))
+        self._cohort_members = set(cohort_ids)
+        self._set_score_norm(cohort, cohort_ids)
+
+    def _set_score_norm(self, cohort: np.ndarray, cohort_ids: Optional[List[str]] = None):
+        enabled = cohort.shape[0] >= settings.SCORE_NORM_MIN_COHORT
+        if enabled != self._score_norm_enabled:
+            if enabled:
+                print(f"✅ Normalización de score activada: cohorte de {cohort.shape[0]} voces")
+            else:
+                print(
+                    f"⚠️ Normalización de score desactivada: cohorte de {cohort.shape[0]} voces "
+                    f"(mínimo {settings.SCORE_NORM_MIN_COHORT})"
+                )
+            self._score_norm_enabled = enabled
+
+        if not enabled:
+            self._score_norm = None
             return
 
-        for file in os.listdir(settings.VOICES_DB):
-            if file.endswith('.npy'):
-                person_id = file.replace('.npy', '')
-                file_path = os.path.join(settings.VOICES_DB, file)
-                self._cache[person_id] = {
-                    "embedding": np.load(file_path),
-                    "file_path": file_path,
-                    "registered_at": datetime.fromtimestamp(os.path.getmtime(file_path))
-                }
+        self._score_norm = ScoreNormalizer(
+            cohort,
+            method=settings.SCORE_NORM,
+            top_k=settings.SCORE_NORM_TOP_K,
+            cohort_ids=cohort_ids
+        )
+        self._score_norm.rebuild(
+            (person_id, self._centroid(person_id)) for person_id in self._store.records
+        )
+
+    def _load_index(self):
+        self._load_centroids()
+
+        if self._samples is not None:
+            self._samples.rebuild(
+                (person_id, self._store.get_embeddings(person_id)) for person_id in self._store.records
+            )
+
+        if not self._index.load(settings.VOICE_INDEX_PATH) or self._index.stamps is None:
+            self._index.rebuild(
+                (person_id, self._centroid(person_id)) for person_id in self._store.records
+            )
+            return
+
+        indexed = set(self._index.ids)
+        for person_id in indexed - self._store.records.keys():
+            self._index.remove(person_id)
+
+        stamps = self._index_stamps()
+        for person_id, stamp in stamps.items():
+            if person_id not in indexed or self._index.stamps.get(person_id) != stamp:
+                self._index.add(person_id, self._centroid(person_id))
+
+        if self._index.needs_rebuild:
+            self.rebuild_index()
+
+    def _apply_changes(self) -> bool:
+        changes = self._store.drain_changes()
+        dirty = set()
+        for op, person_id, rows in changes:
+            if op == "add":
+                self._centroid_sums[person_id] = self._normalized_rows(rows).sum(axis=0)
+            elif op == "sample":
+                self._centroid_sums[person_id] += self._normalized_rows(rows).sum(axis=0)
+            elif op == "evict":
+                self._centroid_sums[person_id] -= self._normalized_rows(rows).sum(axis=0)
+            elif op == "delete":
+                self._centroid_sums.pop(person_id, None)
+                self._index.remove(person_id)
+                if self._samples is not None:
+                    self._samples.remove(person_id)
+                if self._score_norm is not None:
+                    self._score_norm.remove(person_id)
+                dirty.discard(person_id)
+                continue
+            dirty.add(person_id)
+
+        for person_id in dirty:
+            self._index.add(person_id, self._centroid(person_id))
+            if self._samples is not None:
+                self._samples.set(person_id, self._store.get_embeddings(person_id))
+
+        if self._cohort_members is not None and self._cohort_members != self._store.records.keys():
+            self._rebuild_db_cohort()
+        elif self._score_norm is not None and dirty:
+            self._score_norm.enroll_many((person_id, self._centroid(person_id)) for person_id in dirty)
+
+        if changes:
+            self.version += 1
+            if self._index.needs_rebuild:
+                self.rebuild_index()
+
+        return bool(changes)
+
+    def refresh(self) -> bool:
+        self._store.refresh()
+        return self._apply_changes()
 
     def save(self, person_id: str, embedding: np.ndarray) -> str:
-        file_path = os.path.join(settings.VOICES_DB, f"{person_id}.npy")
+        self.refresh()
+        self._store.append([(person_id, embedding)])
+        self.refresh()
 
-        if os.path.exists(file_path):
-            raise FileExistsError(f"Voz '{person_id}' ya existe")
+        return self._store.embeddings_path
 
-        np.save(file_path, embedding)
+    def save_many(self, items: List[Tuple[str, np.ndarray]]) -> str:
+        self.refresh()
+        self._store.append(items)
+        self.refresh()
 
-        self._cache[person_id] = {
-            "embedding": embedding,
-            "file_path": file_path,
-            "registered_at": datetime.now()
-        }
+        return self._store.embeddings_path
+
+    def add_sample(self, person_id: str, embedding: np.ndarray) -> dict:
+        self.refresh()
+        evicted = self._store.append_samples(person_id, [embedding], settings.VOICE_MAX_SAMPLES_PER_SPEAKER)
+        self.refresh()
 
-        return file_path
+        record = self._store.records[person_id]
+        return {
+            "person_id": person_id,
+            "num_samples": len(record.rows),
+            "evicted_samples": evicted,
+            "updated_at": datetime.fromtimestamp(record.updated_at)
+        }
 
     def get(self, person_id: str) -> dict:
-        if person_id not in self._cache:
+        self.refresh()
+        if person_id not in self._store:
             raise FileNotFoundError(f"Voz '{person_id}' no encontrada")
 
-        return self._cache[person_id]
+        record = self._store.records[person_id]
+        return {
+            "embedding": self._centroid(person_id),
+            "num_samples": len(record.rows),
+            "file_path": self._store.embeddings_path,
+            "registered_at": datetime.fromtimestamp(record.registered_at),
+            "updated_at": datetime.fromtimestamp(record.updated_at)
+        }
 
     def get_all_embeddings(self) -> Dict[str, np.ndarray]:
-        return {person_id: data["embedding"] for person_id, data in self._cache.items()}
+        self.refresh()
+        return {person_id: self._centroid(person_id) for person_id in self._store.records}
+
+    def snapshot(self) -> Tuple[
+        Union[MatrixVoiceIndex, FaissVoiceIndex], Optional[SampleMatrixIndex], Optional[ScoreNormalizer]
+    ]:
+        self.refresh()
+        return self._index, self._samples, self._score_norm
+
+    def get_voice_index(self) -> Union[MatrixVoiceIndex, FaissVoiceIndex]:
+        self.refresh()
+        return self._index
+
+    def get_sample_index(self) -> Optional[SampleMatrixIndex]:
+        self.refresh()
+        return self._samples
+
+    def get_score_normalizer(self) -> Optional[ScoreNormalizer]:
+        self.refresh()
+        return self._score_norm
+
+    def rebuild_index(self):
+        self._index.rebuild(
+            (person_id, self._centroid(person_id)) for person_id in self._store.records
+        )
+        if self._samples is not None:
+            self._samples.rebuild(
+                (person_id, self._store.get_embeddings(person_id)) for person_id in self._store.records
+            )
+
+    def _index_stamps(self) -> Dict[str, list]:
+        return {
+            person_id: [record.updated_at, len(record.rows)]
+            for person_id, record in self._store.records.items()
+        }
+
+    def persist_index(self):
+        self.refresh()
+        self._index.save(settings.VOICE_INDEX_PATH, self._index_stamps())
 
     def list_all(self) -> List[dict]:
+        self.refresh()
         return [
             {
                 "person_id": person_id,
-                "registered_at": data["registered_at"],
-                "embedding_shape": list(data["embedding"].shape)
+                "registered_at": datetime.fromtimestamp(record.registered_at),
+                "embedding_shape": [self._store.dim],
+                "num_samples": len(record.rows)
             }
-            for person_id, data in self._cache.items()
+            for person_id, record in self._store.records.items()
         ]
 
     def delete(self, person_id: str) -> bool:
-        if person_id not in self._cache:
-            raise FileNotFoundError(f"Voz '{person_id}' no encontrada")
-
-        file_path = self._cache[person_id]["file_path"]
-
-        if os.path.exists(file_path):
-            os.remove(file_path)
-
-        del self._cache[person_id]
+        self.refresh()
+        self._store.delete(person_id)
+        self._apply_changes()
 
         return True
 
     def exists(self, person_id: str) -> bool:
-        return person_id in self._cache
+        self.refresh()
+        return person_id in self._store
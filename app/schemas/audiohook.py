@@ -87,24 +87,51 @@ class AudioHookServerMessage(BaseModel):
     parameters: Optional[Dict[str, Any]] = None
 
 
-class WebSocketSession(BaseModel):
-    session_id: str
-    conversation_id: Optional[str] = None
-    organization_id: Optional[str] = None
-    participant: Optional[ParticipantInfo] = None
-    media: List[MediaConfig] = []
-    client_seq: int = 0
-    server_seq: int = 0
-    is_open: bool = False
-    is_active: bool = False
+class WebSocketSession:
+    __slots__ = (
+        "connection_id", "session_id", "conversation_id", "organization_id", "participant",
+        "media", "client_seq", "server_seq", "is_open", "is_active"
+    )
+
+    def __init__(self, session_id: str, connection_id: Optional[str] = None):
+        self.connection_id = connection_id or session_id
+        self.session_id = session_id
+        self.conversation_id: Optional[str] = None
+        self.organization_id: Optional[str] = None
+        self.participant: Optional[ParticipantInfo] = None
+        self.media: List[MediaConfig] = []
+        self.client_seq = 0
+        self.server_seq = 0
+        self.is_open = False
+        self.is_active = False
 
 
 class IdentificationResult(BaseModel):
     conversation_id: str
+    channel: Optional[str] = None
     identified: bool
     person_id: Optional[str]
     score: float
+    raw_score: Optional[float] = None
+    score_norm: Optional[str] = None
     all_scores: Dict[str, float]
+    top_k: Optional[int] = None
     threshold: float
+    audio_duration_sec: Optional[float] = None
     completed_at: datetime
     message: Optional[str] = None
+
+
+class SpeakerChangeEvent(BaseModel):
+    event: str
+    conversation_id: str
+    channel: Optional[str] = None
+    identified: bool
+    person_id: Optional[str]
+    previous_person_id: Optional[str] = None
+    score: float
+    previous_score: Optional[float] = None
+    threshold: float
+    window_sec: float
+    next_hop_sec: float
+    completed_at: datetime
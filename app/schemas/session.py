@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Optional
 from pydantic import BaseModel, Field
 
 
@@ -15,6 +15,13 @@ class VoiceData(BaseModel):
 class SessionActivateResponse(BaseModel):
     identified: bool
     data: VoiceData
+    scores: Optional[Dict[str, float]] = None
+
+
+class SessionScoresResponse(BaseModel):
+    conversation_id: str
+    scores: Dict[str, float]
+    total: int
 
 
 class SessionPauseRequest(BaseModel):
@@ -29,8 +36,10 @@ class SessionPauseResponse(BaseModel):
 class ActiveSessionResponse(BaseModel):
     conversation_id: str
     threshold: float
+    continuous: bool = False
     activated_at: datetime
     audio_duration_seconds: float
+    speech_duration_seconds: float
 
 
 class ActiveSessionsResponse(BaseModel):
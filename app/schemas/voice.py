@@ -14,12 +14,22 @@ class VoiceInfoResponse(BaseModel):
     person_id: str
     embedding_shape: List[int]
     registered_at: datetime
+    updated_at: datetime
+    num_samples: int
     file_size_bytes: int
 
 
+class VoiceSampleResponse(BaseModel):
+    person_id: str
+    num_samples: int
+    evicted_samples: int
+    updated_at: datetime
+
+
 class VoiceListResponse(BaseModel):
     person_id: str
     registered_at: datetime
+    num_samples: int = 1
 
 
 class VoicesListResponse(BaseModel):
@@ -0,0 +1,103 @@
+import time
+from collections import OrderedDict
+from typing import Optional
+
+ENTRY_OVERHEAD_BYTES = 256
+
+
+class CachedCaller:
+    __slots__ = ("person_id", "score", "cached_at", "size")
+
+    def __init__(self, person_id: str, score: float, cached_at: float):
+        self.person_id = person_id
+        self.score = score
+        self.cached_at = cached_at
+        self.size = len(person_id) + ENTRY_OVERHEAD_BYTES
+
+
+class CallerCache:
+    def __init__(self, ttl_sec: float = 600.0, max_entries: int = 10000, max_bytes: int = 16 * 1024 * 1024):
+        self.ttl_sec = ttl_sec
+        self.max_entries = max(1, max_entries)
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, CachedCaller]" = OrderedDict()
+        self._bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evicted = 0
+        self.verified = 0
+        self.rejected = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remove(self, ani: str) -> Optional[CachedCaller]:
+        entry = self._entries.pop(ani, None)
+        if entry is not None:
+            self._bytes -= entry.size
+        return entry
+
+    def get(self, ani: str) -> Optional[CachedCaller]:
+        entry = self._entries.get(ani)
+        if entry is not None and time.monotonic() - entry.cached_at > self.ttl_sec:
+            self._remove(ani)
+            self.expired += 1
+            entry = None
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(ani)
+        self.hits += 1
+        return entry
+
+    def put(self, ani: str, person_id: str, score: float):
+        self._remove(ani)
+
+        entry = CachedCaller(person_id, score, time.monotonic())
+        if entry.size > self.max_bytes:
+            return
+
+        self._entries[ani] = entry
+        self._bytes += entry.size
+
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evicted += 1
+
+    def invalidate(self, ani: str) -> bool:
+        return self._remove(ani) is not None
+
+    def invalidate_person(self, person_id: str) -> int:
+        stale = [ani for ani, entry in self._entries.items() if entry.person_id == person_id]
+        for ani in stale:
+            self._remove(ani)
+        return len(stale)
+
+    def record_verification(self, verified: bool):
+        if verified:
+            self.verified += 1
+        else:
+            self.rejected += 1
+
+    def clear(self):
+        self._entries.clear()
+        self._bytes = 0
+
+    def get_stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / lookups) if lookups else 0.0,
+            "expired": self.expired,
+            "evicted": self.evicted,
+            "verified": self.verified,
+            "rejected": self.rejected
+        }
@@ -0,0 +1,250 @@
+import asyncio
+import csv
+import os
+import tarfile
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import AsyncIterator, Callable, List, Optional, Tuple
+
+import numpy as np
+from app.config import settings
+from app.core.embedding_generator import EmbeddingGenerator
+from app.repositories.voice_repository import VoiceRepository
+
+MANIFEST_NAME = "manifest.csv"
+
+
+class EnrollmentItem:
+    __slots__ = ("person_id", "source", "read")
+
+    def __init__(self, person_id: str, source: str, read: Callable[[], bytes]):
+        self.person_id = person_id
+        self.source = source
+        self.read = read
+
+
+def decode_enrollment_audio(data: bytes) -> Tuple[Optional[np.ndarray], Optional[str]]:
+    from app.core.audio_processor import AudioProcessor
+
+    try:
+        waveform, _ = AudioProcessor.load_and_normalize(data)
+    except Exception as e:
+        return None, str(e)
+
+    return waveform.reshape(-1).numpy(), None
+
+
+def _person_id_from_name(name: str) -> str:
+    return os.path.splitext(os.path.basename(name))[0].strip()
+
+
+def _read_manifest(lines) -> List[Tuple[str, str]]:
+    entries = []
+    for row in csv.reader(lines):
+        if not row or row[0].strip().startswith("#"):
+            continue
+        if len(row) < 2:
+            raise ValueError(f"Fila de manifiesto inválida: {','.join(row)}")
+        if row[0].strip() == "person_id":
+            continue
+        entries.append((row[0].strip(), row[1].strip()))
+    return entries
+
+
+def items_from_directory(path: str) -> List[EnrollmentItem]:
+    manifest_path = path if os.path.isfile(path) else os.path.join(path, MANIFEST_NAME)
+    base_dir = os.path.dirname(manifest_path)
+
+    def reader(file_path: str):
+        def read() -> bytes:
+            with open(file_path, "rb") as f:
+                return f.read()
+        return read
+
+    if os.path.isfile(manifest_path):
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            entries = _read_manifest(f)
+        return [
+            EnrollmentItem(person_id, wav_path, reader(os.path.join(base_dir, wav_path)))
+            for person_id, wav_path in entries
+        ]
+
+    return [
+        EnrollmentItem(_person_id_from_name(file), file, reader(os.path.join(path, file)))
+        for file in sorted(os.listdir(path))
+        if file.lower().endswith(".wav")
+    ]
+
+
+def _check_member(name: str, size: int, regular: bool, max_bytes: int):
+    if not regular:
+        raise ValueError(f"'{name}' no es un archivo regular")
+    if size > max_bytes:
+        raise ValueError(f"'{name}' es muy grande ({size} bytes, máximo {max_bytes // (1024 * 1024)}MB)")
+
+
+def items_from_archive(fileobj, filename: str, max_file_bytes: Optional[int] = None) -> List[EnrollmentItem]:
+    if max_file_bytes is None:
+        max_file_bytes = settings.MAX_FILE_SIZE_MB * 1024 * 1024
+
+    if filename.lower().endswith(".zip"):
+        archive = zipfile.ZipFile(fileobj)
+        infos = {info.filename: info for info in archive.infolist() if not info.is_dir()}
+
+        def reader(name: str, max_bytes: int = max_file_bytes):
+            def read() -> bytes:
+                _check_member(name, infos[name].file_size, True, max_bytes)
+                return archive.read(infos[name])
+            return read
+    else:
+        archive = tarfile.open(fileobj=fileobj, mode="r:*")
+        infos = {member.name: member for member in archive.getmembers() if not member.isdir()}
+
+        def reader(name: str, max_bytes: int = max_file_bytes):
+            def read() -> bytes:
+                _check_member(name, infos[name].size, infos[name].isfile(), max_bytes)
+                return archive.extractfile(infos[name]).read()
+            return read
+
+    names = list(infos)
+    manifest = next((name for name in names if os.path.basename(name) == MANIFEST_NAME), None)
+    if manifest is not None:
+        base_dir = os.path.dirname(manifest)
+        manifest_bytes = settings.BULK_ENROLL_MAX_ARCHIVE_MB * 1024 * 1024
+        lines = reader(manifest, manifest_bytes)().decode("utf-8").splitlines()
+        items = []
+        for person_id, wav_path in _read_manifest(lines):
+            name = f"{base_dir}/{wav_path}" if base_dir else wav_path
+            items.append(EnrollmentItem(person_id, wav_path, reader(name) if name in infos else lambda: b""))
+        return items
+
+    return [
+        EnrollmentItem(_person_id_from_name(name), name, reader(name))
+        for name in sorted(names)
+        if name.lower().endswith(".wav") and not os.path.basename(name).startswith(".")
+    ]
+
+
+class EnrollmentService:
+    def __init__(
+        self,
+        voice_repository: VoiceRepository,
+        embedding_generator: EmbeddingGenerator,
+        decode_workers: int = 2,
+        batch_size: int = 8
+    ):
+        self.voice_repository = voice_repository
+        self.embedding_generator = embedding_generator
+        self.decode_workers = decode_workers
+        self.batch_size = batch_size
+
+    async def enroll(self, items) -> AsyncIterator[dict]:
+        import torch
+
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+
+        seen = set()
+        pending_decode = set()
+        decoding = {}
+        decoded: List[Tuple[str, str, np.ndarray]] = []
+        embedded: List[Tuple[str, np.ndarray]] = []
+        failed = 0
+
+        def failure(item_id: str, source: str, error: str) -> dict:
+            nonlocal failed
+            failed += 1
+            return {"person_id": item_id, "source": source, "status": "failed", "error": error}
+
+        async def embed_batch(batch) -> List[dict]:
+            waveforms = [torch.from_numpy(waveform) for _, _, waveform in batch]
+            try:
+                embeddings = await self.embedding_generator.generate_embeddings_batch_async(waveforms)
+            except Exception as e:
+                return [failure(person_id, source, f"Error generando embedding: {e}") for person_id, source, _ in batch]
+
+            events = []
+            for (person_id, source, _), embedding in zip(batch, embeddings):
+                embedded.append((person_id, embedding))
+                events.append({"person_id": person_id, "source": source, "status": "embedded"})
+            return events
+
+        async def collect(done) -> List[dict]:
+            events = []
+            for future in done:
+                person_id, source = decoding.pop(future)
+                waveform, error = future.result()
+                if error is not None:
+                    events.append(failure(person_id, source, error))
+                else:
+                    decoded.append((person_id, source, waveform))
+
+            while len(decoded) >= self.batch_size * 2:
+                decoded.sort(key=lambda entry: entry[2].shape[0])
+                batch = decoded[:self.batch_size]
+                del decoded[:self.batch_size]
+                events.extend(await embed_batch(batch))
+            return events
+
+        with ProcessPoolExecutor(max_workers=self.decode_workers) as pool:
+            for item in items:
+                if not item.person_id:
+                    yield failure(item.person_id, item.source, "person_id no puede estar vacío")
+                    continue
+                if item.person_id in seen:
+                    yield failure(item.person_id, item.source, "person_id duplicado en el lote")
+                    continue
+                seen.add(item.person_id)
+
+                if self.voice_repository.exists(item.person_id):
+                    yield failure(item.person_id, item.source, f"Voz '{item.person_id}' ya existe")
+                    continue
+
+                try:
+                    data = await loop.run_in_executor(None, item.read)
+                except Exception as e:
+                    yield failure(item.person_id, item.source, f"No se pudo leer el archivo: {e}")
+                    continue
+
+                if not data:
+                    yield failure(item.person_id, item.source, "Archivo vacío o inexistente")
+                    continue
+
+                future = loop.run_in_executor(pool, decode_enrollment_audio, data)
+                decoding[future] = (item.person_id, item.source)
+                pending_decode.add(future)
+
+                if len(pending_decode) >= self.decode_workers * 2:
+                    done, pending_decode = await asyncio.wait(pending_decode, return_when=asyncio.FIRST_COMPLETED)
+                    for event in await collect(done):
+                        yield event
+
+            if pending_decode:
+                done, _ = await asyncio.wait(pending_decode)
+                for event in await collect(done):
+                    yield event
+
+        if decoded:
+            for event in await embed_batch(decoded):
+                yield event
+            decoded.clear()
+
+        registered = 0
+        if embedded:
+            try:
+                await loop.run_in_executor(None, self.voice_repository.save_many, embedded)
+            except Exception as e:
+                for person_id, _ in embedded:
+                    yield failure(person_id, None, f"Error guardando el lote: {e}")
+            else:
+                registered = len(embedded)
+                for person_id, _ in embedded:
+                    yield {"person_id": person_id, "status": "registered"}
+
+        yield {
+            "status": "completed",
+            "registered": registered,
+            "failed": failed,
+            "elapsed_sec": round(time.perf_counter() - start, 3)
+        }
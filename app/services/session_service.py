@@ -1,17 +1,25 @@
 import asyncio
+import numpy as np
 from typing import List, Dict, Optional
 from datetime import datetime
 from app.utils.audio_buffer import AudioBuffer
-from app.config import settings
+
+
+class IdentificationSuperseded(Exception):
+    pass
 
 
 class SessionService:
     def __init__(self, audio_buffer: AudioBuffer):
         self.audio_buffer = audio_buffer
         self.identification_results: Dict[str, dict] = {}
+        self._waiters: Dict[str, asyncio.Future] = {}
+        self._embeddings: Dict[str, np.ndarray] = {}
 
-    def activate_session(self, conversation_id: str, threshold: float = None) -> dict:
-        self.audio_buffer.create_session(conversation_id, threshold)
+    def activate_session(self, conversation_id: str, threshold: float = None, continuous: bool = False) -> dict:
+        self.identification_results.pop(conversation_id, None)
+        self._embeddings.pop(conversation_id, None)
+        self.audio_buffer.create_session(conversation_id, threshold, continuous=continuous)
         self.audio_buffer.activate(conversation_id)
 
         return {
@@ -25,23 +33,48 @@ class SessionService:
         conversation_id: str,
         timeout: float = 30.0
     ) -> Optional[dict]:
-        start_time = datetime.now()
+        if conversation_id in self.identification_results:
+            return self.identification_results.pop(conversation_id)
+
+        previous = self._waiters.pop(conversation_id, None)
+        if previous is not None and not previous.done():
+            previous.set_exception(IdentificationSuperseded(
+                f"La identificación de '{conversation_id}' fue reemplazada por una nueva activación"
+            ))
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters[conversation_id] = waiter
+
+        try:
+            return await asyncio.wait_for(waiter, timeout=timeout)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            if self._waiters.get(conversation_id) is waiter:
+                del self._waiters[conversation_id]
+
+    def _release_waiter(self, conversation_id: str, result: Optional[dict]) -> bool:
+        waiter = self._waiters.pop(conversation_id, None)
+        if waiter is None or waiter.done():
+            return False
 
-        while True:
-            if conversation_id in self.identification_results:
-                result = self.identification_results.pop(conversation_id)
-                return result
+        waiter.set_result(result)
+        return True
 
-            duration = self.audio_buffer.get_accumulated_duration(conversation_id)
+    def store_identification_result(self, conversation_id: str, result: dict, embedding: np.ndarray = None):
+        if embedding is not None:
+            self._embeddings[conversation_id] = embedding
 
-            elapsed = (datetime.now() - start_time).total_seconds()
-            if elapsed >= timeout:
-                return None
+        if not self._release_waiter(conversation_id, result):
+            self.identification_results[conversation_id] = result
 
-            await asyncio.sleep(0.5)
+    def cancel_identification(self, conversation_id: str):
+        self._release_waiter(conversation_id, None)
+        self.identification_results.pop(conversation_id, None)
+        self._embeddings.pop(conversation_id, None)
 
-    def store_identification_result(self, conversation_id: str, result: dict):
-        self.identification_results[conversation_id] = result
+    def get_last_embedding(self, conversation_id: str) -> Optional[np.ndarray]:
+        return self._embeddings.get(conversation_id)
 
     def pause_session(self, conversation_id: str) -> dict:
         self.audio_buffer.pause(conversation_id)
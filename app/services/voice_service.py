@@ -1,10 +1,10 @@
-import os
 from typing import Dict, List
 from datetime import datetime
-from app.core.audio_processor import AudioProcessor
+from app.core.audio_processor import AudioProcessor, AudioSource
 from app.core.embedding_generator import EmbeddingGenerator
 from app.repositories.voice_repository import VoiceRepository
-from app.dependencies import get_model_manager
+from app.config import settings
+from app.dependencies import get_caller_cache, get_model_manager
 
 
 class VoiceService:
@@ -15,12 +15,17 @@ class VoiceService:
         model_manager = get_model_manager()
         classifier = model_manager.get_classifier()
         self.embedding_generator = EmbeddingGenerator(classifier)
+        self.caller_cache = get_caller_cache() if settings.CALLER_CACHE_ENABLED else None
 
-    def register_voice(self, audio_path: str, person_id: str) -> dict:
+    def _invalidate_caller(self, person_id: str):
+        if self.caller_cache is not None:
+            self.caller_cache.invalidate_person(person_id)
+
+    def register_voice(self, audio_source: AudioSource, person_id: str) -> dict:
         if self.voice_repository.exists(person_id):
             raise FileExistsError(f"Voz '{person_id}' ya existe")
 
-        waveform, sr = self.audio_processor.load_and_normalize(audio_path)
+        waveform, sr = self.audio_processor.load_and_normalize(audio_source)
 
         embedding = self.embedding_generator.generate_embedding(waveform)
 
@@ -33,17 +38,28 @@ class VoiceService:
             "file_path": file_path
         }
 
+    def add_voice_sample(self, audio_source: AudioSource, person_id: str) -> dict:
+        if not self.voice_repository.exists(person_id):
+            raise FileNotFoundError(f"Voz '{person_id}' no encontrada")
+
+        waveform, sr = self.audio_processor.load_and_normalize(audio_source)
+
+        embedding = self.embedding_generator.generate_embedding(waveform)
+
+        result = self.voice_repository.add_sample(person_id, embedding)
+        self._invalidate_caller(person_id)
+        return result
+
     def get_voice_info(self, person_id: str) -> dict:
         voice_data = self.voice_repository.get(person_id)
 
-        file_path = voice_data["file_path"]
-        file_size = os.path.getsize(file_path) if os.path.exists(file_path) else 0
-
         return {
             "person_id": person_id,
             "embedding_shape": list(voice_data["embedding"].shape),
             "registered_at": voice_data["registered_at"],
-            "file_size_bytes": file_size
+            "updated_at": voice_data["updated_at"],
+            "num_samples": voice_data["num_samples"],
+            "file_size_bytes": voice_data["embedding"].nbytes * voice_data["num_samples"]
         }
 
     def list_voices(self) -> List[dict]:
@@ -51,6 +67,7 @@ class VoiceService:
 
     def delete_voice(self, person_id: str) -> dict:
         self.voice_repository.delete(person_id)
+        self._invalidate_caller(person_id)
 
         return {
             "deleted": True,
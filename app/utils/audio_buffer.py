@@ -1,72 +1,291 @@
-from typing import List
+import numpy as np
+from typing import Callable, Dict, List, Optional
 from datetime import datetime
 from app.config import settings
+from app.core.pcm_converter import FORMAT_PCMU, FrameDemuxer, create_stream_decoder
+from app.core.vad import EnergyVAD
+from app.utils.sample_buffer import SlidingSampleBuffer
 
-ULAW_SAMPLE_RATE = 8000
+
+class ChannelStream:
+    __slots__ = (
+        "name", "index", "decoder", "vad", "samples", "features", "total_samples", "next_checkpoint", "done",
+        "verifying", "person_id", "score", "hop_sec", "next_verify", "caller_checked", "cached_caller",
+        "failures", "retry_at"
+    )
+
+    def __init__(self, name: str, index: int):
+        self.name = name
+        self.index = index
+        self.decoder = None
+        self.vad: Optional[EnergyVAD] = None
+        self.samples: Optional[SlidingSampleBuffer] = None
+        self.features = None
+        self.total_samples = 0
+        self.next_checkpoint = settings.PROGRESSIVE_MIN_SEC
+        self.done = False
+        self.verifying = False
+        self.person_id: Optional[str] = None
+        self.score = 0.0
+        self.hop_sec = settings.CONTINUOUS_HOP_SEC
+        self.next_verify = 0
+        self.caller_checked = False
+        self.cached_caller = None
+        self.failures = 0
+        self.retry_at = 0
+
+    def allocate(self, media_format: str, media_rate: int, sample_rate: int, feature_factory: Callable = None):
+        self.decoder = create_stream_decoder(media_format, media_rate)
+        self.samples = SlidingSampleBuffer(int(settings.MAX_DURATION_SEC * sample_rate))
+        if feature_factory is not None:
+            self.features = feature_factory(self.samples.capacity)
+        if settings.VAD_ENABLED:
+            self.vad = EnergyVAD(
+                sample_rate=sample_rate,
+                frame_ms=settings.VAD_FRAME_MS,
+                energy_threshold_db=settings.VAD_ENERGY_THRESHOLD_DB,
+                snr_db=settings.VAD_SNR_DB,
+                max_zcr=settings.VAD_MAX_ZCR,
+                hangover_ms=settings.VAD_HANGOVER_MS
+            )
+
+    def append(self, raw: np.ndarray):
+        samples = self.decoder.decode(raw)
+        self.total_samples += samples.shape[0]
+
+        if self.vad is not None:
+            samples = self.vad.process(samples)
+
+        self.samples.write(samples)
+        if self.features is not None:
+            self.features.append(samples)
+
+    def start_verification(self, person_id: Optional[str], score: float, sample_rate: int):
+        self.verifying = True
+        self.person_id = person_id
+        self.score = score
+        self.schedule(settings.CONTINUOUS_HOP_SEC, sample_rate)
+
+    def schedule(self, hop_sec: float, sample_rate: int):
+        self.hop_sec = hop_sec
+        self.next_verify = self.samples.total_written + int(hop_sec * sample_rate)
+
+    def verification_due(self) -> bool:
+        return self.verifying and self.samples.total_written >= self.next_verify
+
+    def identification_due(self) -> bool:
+        return self.samples.total_written >= self.retry_at
+
+    def backoff(self, sample_rate: int) -> float:
+        self.failures += 1
+        delay_sec = settings.INFERENCE_RETRY_SEC * 2 ** (self.failures - 1)
+        self.retry_at = self.samples.total_written + int(delay_sec * sample_rate)
+        return delay_sec
+
+    def reset(self):
+        self.next_checkpoint = settings.PROGRESSIVE_MIN_SEC
+        self.total_samples = 0
+        self.done = False
+        self.verifying = False
+        self.person_id = None
+        self.score = 0.0
+        self.caller_checked = False
+        self.cached_caller = None
+        self.failures = 0
+        self.retry_at = 0
+        if self.samples is not None:
+            self.samples.clear()
+            self.decoder.reset()
+        if self.features is not None:
+            self.features.reset()
+        if self.vad is not None:
+            self.vad.reset()
+
+    def __len__(self) -> int:
+        return len(self.samples) if self.samples is not None else 0
+
+
+class AudioSession:
+    __slots__ = (
+        "streams", "demuxer", "channels", "sample_rate", "media_format", "media_rate",
+        "active", "threshold", "continuous", "ani", "feature_factory", "created_at", "activated_at"
+    )
+
+    def __init__(
+        self,
+        threshold: float,
+        media_format: str = FORMAT_PCMU,
+        media_rate: int = 8000,
+        channels: List[str] = None,
+        identify: List[str] = None,
+        continuous: bool = False,
+        ani: Optional[str] = None
+    ):
+        self.channels = list(channels or ["external"])
+        identify = [name for name in self.channels if identify is None or name in identify]
+        self.streams: Dict[str, ChannelStream] = {
+            name: ChannelStream(name, self.channels.index(name))
+            for name in identify or self.channels[:1]
+        }
+        self.demuxer: Optional[FrameDemuxer] = None
+        self.sample_rate = settings.SAMPLE_RATE
+        self.media_format = media_format
+        self.media_rate = media_rate
+        self.active = False
+        self.threshold = threshold
+        self.continuous = continuous
+        self.ani = ani
+        self.feature_factory: Optional[Callable] = None
+        self.created_at = datetime.now()
+        self.activated_at: Optional[datetime] = None
+
+    @property
+    def primary(self) -> ChannelStream:
+        return next(iter(self.streams.values()))
+
+    @property
+    def multichannel(self) -> bool:
+        return len(self.streams) > 1
+
+    def get_stream(self, channel: str = None) -> Optional[ChannelStream]:
+        if channel is None:
+            return self.primary
+        return self.streams.get(channel)
+
+    def pending_streams(self) -> List[ChannelStream]:
+        return [stream for stream in self.streams.values() if not stream.done]
+
+    def allocate(self):
+        if self.demuxer is None:
+            for stream in self.streams.values():
+                stream.allocate(self.media_format, self.media_rate, self.sample_rate, self.feature_factory)
+            self.demuxer = FrameDemuxer(self.primary.decoder.dtype, len(self.channels))
+
+    def append(self, audio_data: bytes) -> float:
+        frames = self.demuxer.split(audio_data)
+        for stream in self.streams.values():
+            if not stream.done:
+                stream.append(frames[:, stream.index])
+
+        return max((len(stream) for stream in self.pending_streams()), default=0) / self.sample_rate
+
+    def finish(self, channel: str = None) -> bool:
+        stream = self.get_stream(channel)
+        stream.done = True
+        if stream.samples is not None:
+            stream.samples.clear()
+        if stream.features is not None:
+            stream.features.reset()
+        return not self.pending_streams()
+
+    def reset(self):
+        if self.demuxer is not None:
+            self.demuxer.reset()
+        for stream in self.streams.values():
+            stream.reset()
+
+    def stream_duration(self, channel: str = None) -> float:
+        stream = self.get_stream(channel)
+        return len(stream) / self.sample_rate if stream is not None else 0.0
+
+    @property
+    def duration(self) -> float:
+        return len(self.primary) / self.sample_rate
+
+    @property
+    def total_duration(self) -> float:
+        return self.primary.total_samples / self.sample_rate
 
 
 class AudioBuffer:
     def __init__(self):
-        self._buffers = {}
+        self._buffers: Dict[str, AudioSession] = {}
+        self.feature_factory: Optional[Callable] = None
 
-    def create_session(self, conversation_id: str, threshold: float = None):
+    def set_feature_factory(self, feature_factory: Optional[Callable]):
+        self.feature_factory = feature_factory
+
+    def create_session(
+        self,
+        conversation_id: str,
+        threshold: float = None,
+        media_format: str = None,
+        media_rate: int = None,
+        channels: List[str] = None,
+        identify: List[str] = None,
+        continuous: bool = False,
+        ani: Optional[str] = None
+    ):
         if threshold is None:
             threshold = settings.DEFAULT_THRESHOLD
 
-        self._buffers[conversation_id] = {
-            "chunks": [],
-            "sample_rate": ULAW_SAMPLE_RATE,
-            "active": False,
-            "threshold": threshold,
-            "created_at": datetime.now()
-        }
+        previous = self._buffers.get(conversation_id)
+        if previous is not None and media_format is None:
+            media_format = previous.media_format
+            media_rate = previous.media_rate
+            channels = previous.channels
+            identify = list(previous.streams)
+            ani = ani or previous.ani
+
+        self._buffers[conversation_id] = AudioSession(
+            threshold,
+            media_format or FORMAT_PCMU,
+            media_rate or 8000,
+            channels,
+            identify,
+            continuous,
+            ani
+        )
+        self._buffers[conversation_id].feature_factory = self.feature_factory
+
+    def get_session(self, conversation_id: str) -> Optional[AudioSession]:
+        return self._buffers.get(conversation_id)
 
     def activate(self, conversation_id: str):
         if conversation_id not in self._buffers:
             self.create_session(conversation_id)
 
-        self._buffers[conversation_id]["active"] = True
-        self._buffers[conversation_id]["activated_at"] = datetime.now()
+        session = self._buffers[conversation_id]
+        session.allocate()
+        session.active = True
+        session.activated_at = datetime.now()
 
     def pause(self, conversation_id: str):
         if conversation_id in self._buffers:
-            self._buffers[conversation_id]["active"] = False
-
-    def append_chunk(self, conversation_id: str, pcm_data: bytes):
-        if conversation_id in self._buffers and self._buffers[conversation_id]["active"]:
-            self._buffers[conversation_id]["chunks"].append(pcm_data)
+            self._buffers[conversation_id].active = False
 
-    def get_accumulated_duration(self, conversation_id: str) -> float:
-        if conversation_id not in self._buffers:
+    def append_chunk(self, conversation_id: str, pcm_data: bytes) -> float:
+        session = self._buffers.get(conversation_id)
+        if session is None or not session.active:
             return 0.0
 
-        chunks = self._buffers[conversation_id]["chunks"]
-        sample_rate = self._buffers[conversation_id]["sample_rate"]
+        return session.append(pcm_data)
 
-        if not chunks:
+    def get_accumulated_duration(self, conversation_id: str) -> float:
+        session = self._buffers.get(conversation_id)
+        if session is None:
             return 0.0
 
-        total_samples = sum(len(chunk) for chunk in chunks)
-
-        duration = total_samples / sample_rate
+        return session.duration
 
-        return duration
+    def get_samples(self, conversation_id: str, channel: str = None) -> np.ndarray:
+        session = self._buffers.get(conversation_id)
+        stream = session.get_stream(channel) if session is not None else None
+        if stream is None or stream.samples is None:
+            return np.zeros(0, dtype=np.float32)
 
-    def get_chunks(self, conversation_id: str) -> List[bytes]:
-        if conversation_id not in self._buffers:
-            return []
-
-        return self._buffers[conversation_id]["chunks"]
+        return stream.samples.view()
 
     def get_threshold(self, conversation_id: str) -> float:
         if conversation_id not in self._buffers:
             return settings.DEFAULT_THRESHOLD
 
-        return self._buffers[conversation_id]["threshold"]
+        return self._buffers[conversation_id].threshold
 
     def clear(self, conversation_id: str):
-        if conversation_id in self._buffers:
-            self._buffers[conversation_id]["chunks"] = []
+        session = self._buffers.get(conversation_id)
+        if session is not None:
+            session.reset()
 
     def delete_session(self, conversation_id: str):
         if conversation_id in self._buffers:
@@ -76,16 +295,18 @@ class AudioBuffer:
         if conversation_id not in self._buffers:
             return False
 
-        return self._buffers[conversation_id]["active"]
+        return self._buffers[conversation_id].active
 
     def get_active_sessions(self) -> List[dict]:
         result = []
-        for conversation_id, data in self._buffers.items():
-            if data["active"]:
+        for conversation_id, session in self._buffers.items():
+            if session.active:
                 result.append({
                     "conversation_id": conversation_id,
-                    "threshold": data["threshold"],
-                    "activated_at": data.get("activated_at", data["created_at"]),
-                    "audio_duration_seconds": self.get_accumulated_duration(conversation_id)
+                    "threshold": session.threshold,
+                    "continuous": session.continuous,
+                    "activated_at": session.activated_at or session.created_at,
+                    "audio_duration_seconds": session.total_duration,
+                    "speech_duration_seconds": session.duration
                 })
         return result
@@ -0,0 +1,58 @@
+import numpy as np
+
+
+class SlidingSampleBuffer:
+    __slots__ = ("capacity", "_data", "_start", "_end", "total_written")
+
+    def __init__(self, capacity: int, slack: int = None, width: int = None):
+        if slack is None:
+            slack = max(1, capacity // 4)
+
+        self.capacity = capacity
+        shape = (capacity + slack,) if width is None else (capacity + slack, width)
+        self._data = np.zeros(shape, dtype=np.float32)
+        self._start = 0
+        self._end = 0
+        self.total_written = 0
+
+    def __len__(self) -> int:
+        return self._end - self._start
+
+    def write(self, samples: np.ndarray):
+        count = samples.shape[0]
+        if count == 0:
+            return
+
+        self.total_written += count
+
+        if count >= self.capacity:
+            self._data[:self.capacity] = samples[-self.capacity:]
+            self._start = 0
+            self._end = self.capacity
+            return
+
+        if self._end + count > self._data.shape[0]:
+            keep = min(self._end - self._start, self.capacity - count)
+            self._data[:keep] = self._data[self._end - keep:self._end]
+            self._start = 0
+            self._end = keep
+
+        self._data[self._end:self._end + count] = samples
+        self._end += count
+
+        if self._end - self._start > self.capacity:
+            self._start = self._end - self.capacity
+
+    def view(self, count: int = None) -> np.ndarray:
+        size = self._end - self._start
+        if count is None or count > size:
+            count = size
+
+        window = self._data[self._end - count:self._end]
+        window.flags.writeable = False
+        return window
+
+    def clear(self):
+        self._start = 0
+        self._end = 0
+        self.total_written = 0
@@ -1,13 +1,17 @@
+import asyncio
 from datetime import datetime
 from typing import Optional
 from app.websocket.connection_manager import ConnectionManager
 from app.utils.audio_buffer import AudioBuffer
 from app.core.pcm_converter import PCMConverter
 from app.core.embedding_generator import EmbeddingGenerator
+from app.core.embedding_batcher import EmbeddingBatcher
 from app.core.voice_matcher import VoiceMatcher
 from app.repositories.voice_repository import VoiceRepository
-from app.dependencies import get_model_manager
-from app.schemas.audiohook import IdentificationResult
+from app.dependencies import get_caller_cache, get_model_manager, get_inference_executor
+from app.schemas.audiohook import IdentificationResult, SpeakerChangeEvent
+from app.services.caller_cache import CachedCaller
+from app.config import settings
 
 
 class AudioHookHandler:
@@ -25,59 +29,183 @@ class AudioHookHandler:
 
         model_manager = get_model_manager()
         classifier = model_manager.get_classifier()
-        self.embedding_generator = EmbeddingGenerator(classifier)
+        self.inference_executor = get_inference_executor()
+        self.embedding_generator = EmbeddingGenerator(classifier, self.inference_executor)
+        self.embedding_batcher = EmbeddingBatcher(
+            self.embedding_generator,
+            max_batch_size=settings.EMBEDDING_BATCH_MAX_SIZE,
+            window_ms=settings.EMBEDDING_BATCH_WINDOW_MS
+        )
+        self.feature_batcher = EmbeddingBatcher(
+            self.embedding_generator,
+            max_batch_size=settings.EMBEDDING_BATCH_MAX_SIZE,
+            window_ms=settings.EMBEDDING_BATCH_WINDOW_MS,
+            batch_fn=self.embedding_generator.generate_embeddings_from_features_async
+        )
+        if settings.FEATURE_CACHE_ENABLED:
+            self._enable_feature_cache()
+        self.caller_cache = get_caller_cache() if settings.CALLER_CACHE_ENABLED else None
         self.voice_matcher = VoiceMatcher()
         self.pcm_converter = PCMConverter()
 
     def set_session_service(self, session_service):
         self.session_service = session_service
 
-    async def identify_speaker(self, conversation_id: str):
-        print(f"[{conversation_id}] Iniciando identificación...")
+    def _enable_feature_cache(self):
+        try:
+            self.embedding_generator.create_feature_stream(settings.SAMPLE_RATE)
+        except Exception as e:
+            print(f"Caché de features desactivada: {str(e)}")
+            return
+
+        self.audio_buffer.set_feature_factory(self.embedding_generator.create_feature_stream)
+
+    async def _embed(self, samples, features=None):
+        if features is not None:
+            return await self.feature_batcher.submit(features.features(samples))
+
+        waveform = self.pcm_converter.samples_to_waveform(samples)
+        return await self.embedding_batcher.submit(waveform)
+
+    async def process_audio(self, conversation_id: str):
+        session = self.audio_buffer.get_session(conversation_id)
+        if session is None:
+            return
+
+        pending = []
+        for stream in session.pending_streams():
+            if stream.verifying:
+                if stream.verification_due():
+                    pending.append(self.verify_window(conversation_id, stream.name))
+                continue
+
+            if not stream.identification_due():
+                continue
+
+            stream_duration = len(stream) / session.sample_rate
+
+            if self.caller_cache is not None and session.ani and stream is session.primary:
+                if not stream.caller_checked:
+                    stream.caller_checked = True
+                    stream.cached_caller = self.caller_cache.get(session.ani)
+                if stream.cached_caller is not None:
+                    if stream_duration >= settings.CALLER_CACHE_CONFIRM_SEC:
+                        pending.append(self.identify_speaker(
+                            conversation_id, channel=stream.name, caller=stream.cached_caller
+                        ))
+                    continue
+
+            if stream_duration >= settings.TARGET_DURATION_SEC:
+                pending.append(self.identify_speaker(conversation_id, channel=stream.name))
+            elif settings.PROGRESSIVE_IDENTIFICATION and stream_duration >= stream.next_checkpoint:
+                stream.next_checkpoint = stream_duration + settings.PROGRESSIVE_STEP_SEC
+                pending.append(self.identify_speaker(conversation_id, final=False, channel=stream.name))
+
+        if len(pending) == 1:
+            await pending[0]
+        elif pending:
+            await asyncio.gather(*pending)
 
+    async def identify_speaker(
+        self,
+        conversation_id: str,
+        final: bool = True,
+        channel: str = None,
+        caller: Optional[CachedCaller] = None
+    ):
+        session = self.audio_buffer.get_session(conversation_id)
+        multichannel = session is not None and session.multichannel
+        primary = session is None or channel is None or session.primary.name == channel
+        label = f"{conversation_id}/{channel}" if multichannel and channel else conversation_id
+
+        print(f"[{label}] Iniciando {'confirmación por ANI' if caller is not None else 'identificación'}...")
+
+        stream = session.get_stream(channel) if session is not None else None
         try:
-            chunks = self.audio_buffer.get_chunks(conversation_id)
+            samples = self.audio_buffer.get_samples(conversation_id, channel)
             threshold = self.audio_buffer.get_threshold(conversation_id)
+            audio_duration = samples.shape[0] / settings.SAMPLE_RATE
+            if samples.shape[0] == 0:
+                raise ValueError("Buffer de audio vacío")
 
-            waveform = self.pcm_converter.ulaw_chunks_to_waveform(chunks)
-
-            embedding = self.embedding_generator.generate_embedding(waveform)
+            embedding = await self._embed(samples, stream.features if stream is not None else None)
 
-            voice_pool = self.voice_repository.get_all_embeddings()
+            if caller is not None:
+                result = self._confirm_caller(session, stream, embedding, caller)
+                if result is None:
+                    return
+            else:
+                voice_index, sample_index, score_normalizer = self.voice_repository.snapshot()
+                result = self.voice_matcher.find_match(
+                    embedding, voice_index, threshold, sample_index, score_normalizer
+                )
 
-            result = self.voice_matcher.find_match(embedding, voice_pool, threshold)
+            required_margin = (
+                settings.SCORE_NORM_PROGRESSIVE_MARGIN if result.get("score_norm") else settings.PROGRESSIVE_MARGIN
+            )
+            if not final and not (
+                result["identified"] and result["margin"] >= required_margin
+            ):
+                print(f"[{label}] Checkpoint {audio_duration:.1f}s sin decisión (score={result['score']:.3f})")
+                return
 
             result_message = IdentificationResult(
                 conversation_id=conversation_id,
+                channel=channel if multichannel else None,
                 identified=result["identified"],
                 person_id=result.get("person_id"),
                 score=result["score"],
+                raw_score=result.get("raw_score"),
+                score_norm=result.get("score_norm"),
                 all_scores=result["all_scores"],
+                top_k=result.get("top_k"),
                 threshold=result.get("threshold", threshold),
+                audio_duration_sec=audio_duration,
                 completed_at=datetime.now(),
                 message=result.get("message")
             )
 
-            if self.session_service:
+            if self.session_service and primary:
                 self.session_service.store_identification_result(
                     conversation_id,
-                    result_message.model_dump(mode='json')
+                    result_message.model_dump(mode='json'),
+                    embedding=embedding
                 )
 
-            await self.connection_manager.send_json(
-                result_message.model_dump(mode='json'),
-                client_id="audiohook"
-            )
+            self.connection_manager.publish(result_message.model_dump(mode='json'), conversation_id)
 
-            print(f"[{conversation_id}] Identificación completada: {result.get('person_id', 'DESCONOCIDO')}")
+            print(f"[{label}] Identificación completada: {result.get('person_id', 'DESCONOCIDO')}")
 
-            self.audio_buffer.pause(conversation_id)
-            self.audio_buffer.clear(conversation_id)
+            if caller is None and primary and result["identified"] and session is not None and session.ani:
+                if self.caller_cache is not None:
+                    self.caller_cache.put(session.ani, result["person_id"], result["score"])
+
+            if session is not None and session.continuous:
+                session.get_stream(channel).start_verification(
+                    result.get("person_id") if result["identified"] else None,
+                    result["score"],
+                    session.sample_rate
+                )
+            elif session is None or session.finish(channel):
+                self.audio_buffer.pause(conversation_id)
+                self.audio_buffer.clear(conversation_id)
 
         except Exception as e:
-            print(f"Error en identificación para {conversation_id}: {str(e)}")
+            print(f"Error en identificación para {label}: {str(e)}")
+            if caller is not None and stream is not None:
+                stream.cached_caller = None
+                return
+            if not final:
+                return
+
+            if stream is not None and stream.failures < settings.INFERENCE_MAX_RETRIES:
+                delay_sec = stream.backoff(session.sample_rate)
+                print(f"[{label}] Reintento de identificación tras {delay_sec:.1f}s de audio")
+                return
+
             error_result = {
                 "conversation_id": conversation_id,
+                "channel": channel if multichannel else None,
                 "identified": False,
                 "person_id": None,
                 "score": 0.0,
@@ -85,7 +213,106 @@ class AudioHookHandler:
                 "completed_at": datetime.now().isoformat()
             }
 
-            if self.session_service:
+            if self.session_service and primary:
                 self.session_service.store_identification_result(conversation_id, error_result)
 
-            await self.connection_manager.send_json(error_result, client_id="audiohook")
+            self.connection_manager.publish(error_result, conversation_id)
+
+            if session is None or session.finish(channel):
+                self.audio_buffer.pause(conversation_id)
+                self.audio_buffer.clear(conversation_id)
+
+    def _confirm_caller(self, session, stream, embedding, caller: CachedCaller) -> Optional[dict]:
+        stream.cached_caller = None
+
+        try:
+            reference = self.voice_repository.get(caller.person_id)["embedding"]
+        except FileNotFoundError:
+            self.caller_cache.invalidate(session.ani)
+            return None
+
+        result = self.voice_matcher.verify(
+            embedding,
+            reference,
+            caller.person_id,
+            max(session.threshold, settings.CALLER_CACHE_VERIFY_THRESHOLD)
+        )
+        self.caller_cache.record_verification(result["identified"])
+
+        if not result["identified"]:
+            print(f"[{session.ani}] ANI no confirmado ({result['score']:.3f}), se usa la identificación completa")
+            self.caller_cache.invalidate(session.ani)
+            return None
+
+        result["message"] = f"Confirmado por ANI {session.ani}"
+        return result
+
+    async def verify_window(self, conversation_id: str, channel: str = None):
+        session = self.audio_buffer.get_session(conversation_id)
+        stream = session.get_stream(channel) if session is not None else None
+        if stream is None or not stream.verifying:
+            return
+
+        label = f"{conversation_id}/{channel}" if session.multichannel and channel else conversation_id
+        window = min(int(settings.CONTINUOUS_WINDOW_SEC * session.sample_rate), len(stream))
+        hop_sec = stream.hop_sec
+
+        try:
+            samples = stream.samples.view(window)
+            embedding = await self._embed(samples, stream.features)
+
+            voice_index, sample_index, score_normalizer = self.voice_repository.snapshot()
+            result = self.voice_matcher.find_match(
+                embedding,
+                voice_index,
+                session.threshold,
+                sample_index,
+                score_normalizer,
+                top_k=1
+            )
+        except Exception as e:
+            print(f"Error en verificación continua para {label}: {str(e)}")
+            stream.schedule(hop_sec, session.sample_rate)
+            return
+
+        if not stream.verifying:
+            return
+
+        person_id = result.get("person_id") if result["identified"] else None
+        score = result["score"]
+
+        if person_id != stream.person_id:
+            event = "speaker_changed"
+        elif abs(score - stream.score) >= settings.CONTINUOUS_SCORE_DELTA:
+            event = "score_changed"
+        else:
+            event = None
+
+        if event is None:
+            stream.schedule(
+                min(hop_sec * settings.CONTINUOUS_HOP_BACKOFF, settings.CONTINUOUS_MAX_HOP_SEC),
+                session.sample_rate
+            )
+            return
+
+        stream.schedule(settings.CONTINUOUS_HOP_SEC, session.sample_rate)
+
+        change = SpeakerChangeEvent(
+            event=event,
+            conversation_id=conversation_id,
+            channel=channel if session.multichannel else None,
+            identified=result["identified"],
+            person_id=person_id,
+            previous_person_id=stream.person_id,
+            score=score,
+            previous_score=stream.score,
+            threshold=result.get("threshold", session.threshold),
+            window_sec=window / session.sample_rate,
+            next_hop_sec=stream.hop_sec,
+            completed_at=datetime.now()
+        )
+        stream.person_id = person_id
+        stream.score = score
+
+        self.connection_manager.publish(change.model_dump(mode='json'), conversation_id)
+        print(f"[{label}] {event}: {change.previous_person_id} -> {person_id} (score={score:.3f})")
@@ -1,5 +1,5 @@
 import json
-from typing import Dict, Optional, Any
+from typing import Any, Dict, List, Optional
 from fastapi import WebSocket
 from app.schemas.audiohook import (
     ClientMessageType,
@@ -11,6 +11,8 @@ from app.schemas.audiohook import (
     OpenParameters,
     ParticipantInfo
 )
+from app.config import settings
+from app.core.pcm_converter import is_supported_media
 from app.utils.audio_buffer import AudioBuffer
 
 
@@ -18,6 +20,7 @@ class AudioHookProtocolHandler:
     def __init__(self, audio_buffer: AudioBuffer):
         self.audio_buffer = audio_buffer
         self.sessions: Dict[str, WebSocketSession] = {}
+        self._conversations: Dict[str, Dict[str, WebSocketSession]] = {}
 
     def create_session(self, session_id: str) -> WebSocketSession:
         session = WebSocketSession(session_id=session_id)
@@ -28,14 +31,39 @@ class AudioHookProtocolHandler:
         return self.sessions.get(session_id)
 
     def get_session_by_conversation(self, conversation_id: str) -> Optional[WebSocketSession]:
-        for session in self.sessions.values():
-            if session.conversation_id == conversation_id:
-                return session
-        return None
+        sessions = self._conversations.get(conversation_id)
+        if not sessions:
+            return None
+        return next(reversed(sessions.values()))
+
+    def owns_conversation(self, session: WebSocketSession) -> bool:
+        return self.get_session_by_conversation(session.conversation_id) is session
+
+    def _index_conversation(self, session: WebSocketSession, conversation_id: Optional[str]):
+        if session.conversation_id != conversation_id:
+            self._unindex_conversation(session)
+
+        session.conversation_id = conversation_id
+        if conversation_id:
+            sessions = self._conversations.setdefault(conversation_id, {})
+            sessions.pop(session.connection_id, None)
+            if sessions:
+                print(f"[{conversation_id}] conversationId duplicado, prevalece la conexión más reciente")
+            sessions[session.connection_id] = session
+
+    def _unindex_conversation(self, session: WebSocketSession):
+        sessions = self._conversations.get(session.conversation_id)
+        if sessions is None:
+            return
+
+        sessions.pop(session.connection_id, None)
+        if not sessions:
+            del self._conversations[session.conversation_id]
 
     def delete_session(self, session_id: str):
-        if session_id in self.sessions:
-            del self.sessions[session_id]
+        session = self.sessions.pop(session_id, None)
+        if session is not None:
+            self._unindex_conversation(session)
 
     def _increment_server_seq(self, session: WebSocketSession) -> int:
         session.server_seq += 1
@@ -71,41 +99,32 @@ class AudioHookProtocolHandler:
 
             params = message.get("parameters", {})
 
-            session.conversation_id = params.get("conversationId")
+            self._index_conversation(session, params.get("conversationId"))
             session.organization_id = params.get("organizationId")
 
             participant_data = params.get("participant")
             if participant_data:
                 session.participant = ParticipantInfo(**participant_data)
 
-            media_list = params.get("media", [])
-            selected_media = []
-            for m in media_list:
-                if "external" in m.get("channels", []):
-                    media_config = MediaConfig(
-                        type=m.get("type", "audio"),
-                        format=MediaFormat(m.get("format", "PCMU")),
-                        channels=m.get("channels", ["external"]),
-                        rate=m.get("rate", 8000)
-                    )
-                    selected_media.append(media_config)
-                    break
-
-            if not selected_media and media_list:
-                first_media = media_list[0]
-                selected_media.append(MediaConfig(
-                    type=first_media.get("type", "audio"),
-                    format=MediaFormat(first_media.get("format", "PCMU")),
-                    channels=first_media.get("channels", ["external"]),
-                    rate=first_media.get("rate", 8000)
-                ))
+            selected_media = self._select_media(params.get("media", []))
 
             session.media = selected_media
             session.is_open = True
 
             if session.conversation_id:
-                self.audio_buffer.create_session(session.conversation_id)
-                print(f"[{session.conversation_id}] Sesión creada (pausada)")
+                media = selected_media[0] if selected_media else MediaConfig()
+                self.audio_buffer.create_session(
+                    session.conversation_id,
+                    media_format=media.format.value,
+                    media_rate=media.rate,
+                    channels=media.channels,
+                    identify=self._identify_channels(),
+                    ani=session.participant.ani if session.participant else None
+                )
+                print(
+                    f"[{session.conversation_id}] Sesión creada (pausada) - "
+                    f"{media.format.value} {media.rate} Hz, canales: {', '.join(media.channels)}"
+                )
 
             response_params = {
                 "startPaused": True,
@@ -126,6 +145,44 @@ class AudioHookProtocolHandler:
             print(f"Error en handle_open: {str(e)}")
             return False
 
+    @staticmethod
+    def _identify_channels() -> List[str]:
+        return [name.strip() for name in settings.AUDIOHOOK_IDENTIFY_CHANNELS.split(",") if name.strip()]
+
+    def _select_media(self, media_list: List[Dict[str, Any]]) -> List[MediaConfig]:
+        offers = []
+        for m in media_list:
+            try:
+                media_config = MediaConfig(
+                    type=m.get("type", "audio"),
+                    format=MediaFormat(m.get("format", "PCMU")),
+                    channels=m.get("channels", ["external"]),
+                    rate=m.get("rate", 8000)
+                )
+            except ValueError:
+                continue
+
+            if is_supported_media(media_config.format.value, media_config.rate):
+                offers.append(media_config)
+
+        if not offers:
+            if media_list:
+                raise ValueError("Ningún formato de audio ofrecido es compatible")
+            return []
+
+        wanted = self._identify_channels()
+
+        def preference(media_config: MediaConfig):
+            covered = sum(1 for name in wanted if name in media_config.channels)
+            return (
+                covered,
+                covered - len(media_config.channels),
+                settings.AUDIOHOOK_PREFER_L16 and media_config.format == MediaFormat.L16,
+                media_config.rate
+            )
+
+        return [max(offers, key=preference)]
+
     async def handle_ping(
         self,
         websocket: WebSocket,
@@ -145,7 +202,7 @@ class AudioHookProtocolHandler:
     ):
         session.client_seq = message.get("seq", session.client_seq)
 
-        if session.conversation_id:
+        if session.conversation_id and self.owns_conversation(session):
             self.audio_buffer.delete_session(session.conversation_id)
 
         response = self._build_response(
@@ -190,15 +247,15 @@ class AudioHookProtocolHandler:
             print(f"Error procesando mensaje: {str(e)}")
             return True
 
-    def handle_audio_frame(self, audio_data: bytes, session: WebSocketSession) -> bool:
-        if not session.is_open or not session.conversation_id:
-            return False
+    def handle_audio_frame(self, audio_data: bytes, session: WebSocketSession) -> Optional[float]:
+        if not session.is_open or not session.conversation_id or not self.owns_conversation(session):
+            return None
 
-        if not self.audio_buffer.is_active(session.conversation_id):
-            return False
+        audio_session = self.audio_buffer.get_session(session.conversation_id)
+        if audio_session is None or not audio_session.active:
+            return None
 
-        self.audio_buffer.append_chunk(session.conversation_id, audio_data)
-        return True
+        return audio_session.append(audio_data)
 
     def activate_session(self, conversation_id: str) -> bool:
         session = self.get_session_by_conversation(conversation_id)
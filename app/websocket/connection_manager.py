@@ -1,26 +1,163 @@
+import asyncio
+import uuid
 from fastapi import WebSocket
-from typing import Dict
+from starlette.websockets import WebSocketState
+from typing import Dict, Iterable, Optional, Set
+
+ALL_CONVERSATIONS = "*"
+SLOW_CONSUMER_CLOSE_CODE = 1013
+
+
+class Subscriber:
+    __slots__ = ("subscriber_id", "websocket", "topics", "queue", "task", "sent")
+
+    def __init__(self, subscriber_id: str, websocket: WebSocket, queue_size: int):
+        self.subscriber_id = subscriber_id
+        self.websocket = websocket
+        self.topics: Set[str] = set()
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.task: Optional[asyncio.Task] = None
+        self.sent = 0
 
 
 class ConnectionManager:
-    def __init__(self):
-        self.active_connections: Dict[str, WebSocket] = {}
+    def __init__(self, queue_size: int = 100, send_timeout: float = 5.0):
+        self.queue_size = queue_size
+        self.send_timeout = send_timeout
+        self.active_connections: Dict[str, Subscriber] = {}
+        self._topics: Dict[str, Set[str]] = {}
 
-    async def connect(self, websocket: WebSocket, client_id: str = "default"):
+        self.published = 0
+        self.delivered = 0
+        self.dropped_subscribers = 0
+
+    async def connect(
+        self,
+        websocket: WebSocket,
+        client_id: str = None,
+        topics: Iterable[str] = (ALL_CONVERSATIONS,)
+    ) -> Subscriber:
         await websocket.accept()
-        self.active_connections[client_id] = websocket
+
+        client_id = client_id or str(uuid.uuid4())
+        if client_id in self.active_connections:
+            self.disconnect(client_id)
+
+        subscriber = Subscriber(client_id, websocket, self.queue_size)
+        self.active_connections[client_id] = subscriber
+        for topic in topics:
+            self.subscribe(client_id, topic)
+
+        subscriber.task = asyncio.create_task(self._sender(subscriber))
         print(f"WebSocket conectado: {client_id}")
+        return subscriber
+
+    def subscribe(self, client_id: str, topic: str = ALL_CONVERSATIONS) -> bool:
+        subscriber = self.active_connections.get(client_id)
+        if subscriber is None:
+            return False
+
+        subscriber.topics.add(topic)
+        self._topics.setdefault(topic, set()).add(client_id)
+        return True
+
+    def unsubscribe(self, client_id: str, topic: str = ALL_CONVERSATIONS) -> bool:
+        subscriber = self.active_connections.get(client_id)
+        if subscriber is None or topic not in subscriber.topics:
+            return False
+
+        subscriber.topics.discard(topic)
+        members = self._topics.get(topic)
+        if members is not None:
+            members.discard(client_id)
+            if not members:
+                del self._topics[topic]
+        return True
 
     def disconnect(self, client_id: str = "default"):
-        if client_id in self.active_connections:
-            del self.active_connections[client_id]
-            print(f"WebSocket desconectado: {client_id}")
+        subscriber = self.active_connections.pop(client_id, None)
+        if subscriber is None:
+            return
+
+        for topic in list(subscriber.topics):
+            members = self._topics.get(topic)
+            if members is not None:
+                members.discard(client_id)
+                if not members:
+                    del self._topics[topic]
+
+        if subscriber.task is not None and subscriber.task is not asyncio.current_task():
+            subscriber.task.cancel()
+
+        print(f"WebSocket desconectado: {client_id}")
+
+    def _drop(self, subscriber: Subscriber, reason: str):
+        if self.active_connections.get(subscriber.subscriber_id) is not subscriber:
+            return
+
+        self.dropped_subscribers += 1
+        print(f"Suscriptor lento descartado: {subscriber.subscriber_id} ({reason})")
+        self.disconnect(subscriber.subscriber_id)
+        asyncio.create_task(self._close(subscriber.websocket, reason))
+
+    async def _close(self, websocket: WebSocket, reason: str):
+        try:
+            if websocket.client_state == WebSocketState.CONNECTED:
+                await websocket.close(code=SLOW_CONSUMER_CLOSE_CODE, reason=reason)
+        except Exception:
+            pass
+
+    async def _sender(self, subscriber: Subscriber):
+        while True:
+            message = await subscriber.queue.get()
+            try:
+                await asyncio.wait_for(subscriber.websocket.send_json(message), timeout=self.send_timeout)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._drop(subscriber, f"envío fallido: {type(e).__name__}")
+                return
+
+            subscriber.sent += 1
+            self.delivered += 1
+
+    def _enqueue(self, subscriber: Subscriber, message: dict) -> bool:
+        try:
+            subscriber.queue.put_nowait(message)
+            return True
+        except asyncio.QueueFull:
+            self._drop(subscriber, f"cola llena ({self.queue_size})")
+            return False
+
+    def publish(self, message: dict, conversation_id: str = None) -> int:
+        self.published += 1
+
+        client_ids = set(self._topics.get(ALL_CONVERSATIONS, ()))
+        if conversation_id is not None:
+            client_ids |= self._topics.get(conversation_id, set())
+
+        queued = 0
+        for client_id in client_ids:
+            subscriber = self.active_connections.get(client_id)
+            if subscriber is not None and self._enqueue(subscriber, message):
+                queued += 1
+        return queued
 
     async def send_json(self, message: dict, client_id: str = "default"):
-        if client_id in self.active_connections:
-            websocket = self.active_connections[client_id]
-            await websocket.send_json(message)
+        subscriber = self.active_connections.get(client_id)
+        if subscriber is not None:
+            self._enqueue(subscriber, message)
 
     async def broadcast(self, message: dict):
-        for client_id, websocket in self.active_connections.items():
-            await websocket.send_json(message)
+        for subscriber in list(self.active_connections.values()):
+            self._enqueue(subscriber, message)
+
+    def get_stats(self) -> dict:
+        return {
+            "subscribers": len(self.active_connections),
+            "topics": len(self._topics),
+            "published": self.published,
+            "delivered": self.delivered,
+            "dropped_subscribers": self.dropped_subscribers,
+            "max_queue_depth": max((s.queue.qsize() for s in self.active_connections.values()), default=0)
+        }
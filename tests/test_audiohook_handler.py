@@ -0,0 +1,237 @@
+import asyncio
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from app.config import settings
+from app.core.inference_executor import InferenceQueueFullError
+from app.core.voice_index import MatrixVoiceIndex
+from app.utils.audio_buffer import AudioBuffer
+from app.websocket import audiohook_handler as handler_module
+
+RATE = 16000
+FRAME = np.zeros(int(0.02 * RATE), dtype="<i2").tobytes()
+
+
+def unit(index: int, dim: int = 8) -> np.ndarray:
+    vector = np.zeros(dim, dtype=np.float32)
+    vector[index] = 1.0
+    return vector
+
+
+def mix(first: np.ndarray, second: np.ndarray, weight: float) -> np.ndarray:
+    return weight * first + np.sqrt(1.0 - weight * weight) * second
+
+
+class FakeBatcher:
+    def __init__(self, outcomes):
+        self.outcomes = outcomes
+        self.calls = []
+        self.times = []
+        self.clock = None
+
+    async def submit(self, waveform):
+        self.calls.append(waveform.shape[-1] / RATE)
+        if self.clock is not None:
+            self.times.append(self.clock())
+        outcome = self.outcomes(len(self.calls)) if callable(self.outcomes) else self.outcomes
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+class FakeRepository:
+    def __init__(self, voices):
+        self.index = MatrixVoiceIndex()
+        for person_id, embedding in voices.items():
+            self.index.add(person_id, embedding)
+
+    def snapshot(self):
+        return self.index, None, None
+
+
+class FakeBus:
+    def __init__(self):
+        self.messages = []
+
+    def publish(self, message, conversation_id=None):
+        self.messages.append(message)
+
+
+@pytest.fixture
+def harness(monkeypatch):
+    monkeypatch.setattr(handler_module, "get_model_manager", lambda: SimpleNamespace(get_classifier=lambda: None))
+    monkeypatch.setattr(handler_module, "get_inference_executor", lambda: None)
+    for name, value in {
+        "FEATURE_CACHE_ENABLED": False,
+        "CALLER_CACHE_ENABLED": False,
+        "VAD_ENABLED": False,
+        "TARGET_DURATION_SEC": 2.0,
+        "MAX_DURATION_SEC": 4.0,
+        "PROGRESSIVE_IDENTIFICATION": False,
+        "CONTINUOUS_VERIFICATION": False
+    }.items():
+        monkeypatch.setattr(settings, name, value)
+
+    def build(outcomes, voices=None, continuous=False, threshold=0.75):
+        audio_buffer = AudioBuffer()
+        bus = FakeBus()
+        handler = handler_module.AudioHookHandler(audio_buffer, bus, FakeRepository(voices or {"ana": unit(0)}))
+        handler.embedding_batcher = FakeBatcher(outcomes)
+        audio_buffer.create_session("c1", threshold, media_format="L16", media_rate=RATE, continuous=continuous)
+        audio_buffer.activate("c1")
+        stream = audio_buffer.get_session("c1").primary
+        handler.embedding_batcher.clock = lambda: stream.samples.total_written / RATE
+        return SimpleNamespace(handler=handler, buffer=audio_buffer, bus=bus, batcher=handler.embedding_batcher)
+
+    return build
+
+
+def feed(harness, seconds: float):
+    async def run():
+        session = harness.buffer.get_session("c1")
+        for _ in range(int(seconds / 0.02)):
+            if not session.active:
+                break
+            session.append(FRAME)
+            await harness.handler.process_audio("c1")
+
+    asyncio.run(run())
+
+
+def test_failed_identification_backs_off_and_reports_once(harness, monkeypatch):
+    monkeypatch.setattr(settings, "INFERENCE_RETRY_SEC", 0.5)
+    monkeypatch.setattr(settings, "INFERENCE_MAX_RETRIES", 2)
+    h = harness(InferenceQueueFullError("Cola de inferencia llena"))
+
+    feed(h, 10.0)
+
+    assert len(h.batcher.calls) == 3
+    assert [message.get("error") for message in h.bus.messages] == ["Cola de inferencia llena"]
+    assert not h.buffer.get_session("c1").active
+
+
+def test_retry_that_succeeds_publishes_only_the_result(harness, monkeypatch):
+    monkeypatch.setattr(settings, "INFERENCE_RETRY_SEC", 0.5)
+    h = harness(lambda call: InferenceQueueFullError("llena") if call == 1 else unit(0))
+
+    feed(h, 10.0)
+
+    assert len(h.batcher.calls) == 2
+    assert len(h.bus.messages) == 1
+    assert h.bus.messages[0]["person_id"] == "ana"
+
+
+@pytest.fixture
+def progressive(monkeypatch):
+    for name, value in {
+        "PROGRESSIVE_IDENTIFICATION": True,
+        "PROGRESSIVE_MIN_SEC": 0.5,
+        "PROGRESSIVE_STEP_SEC": 0.5,
+        "PROGRESSIVE_MARGIN": 0.2
+    }.items():
+        monkeypatch.setattr(settings, name, value)
+
+
+def test_undecided_checkpoints_run_until_the_target_duration(harness, progressive):
+    h = harness(mix(unit(0), unit(1), np.sqrt(0.5)), voices={"ana": unit(0), "luis": unit(1)})
+
+    feed(h, 5.0)
+
+    assert h.batcher.calls == pytest.approx([0.5, 1.0, 1.5, 2.0])
+    assert len(h.bus.messages) == 1
+    assert not h.bus.messages[0]["identified"]
+    assert h.bus.messages[0]["audio_duration_sec"] == pytest.approx(2.0)
+
+
+def test_a_confident_checkpoint_ends_identification_early(harness, progressive):
+    h = harness(unit(0), voices={"ana": unit(0), "luis": unit(1)})
+
+    feed(h, 5.0)
+
+    assert h.batcher.calls == pytest.approx([0.5])
+    assert [message["person_id"] for message in h.bus.messages] == ["ana"]
+    assert not h.buffer.get_session("c1").active
+
+
+def test_a_narrow_margin_waits_for_the_final_decision(harness, progressive):
+    h = harness(unit(0), voices={"ana": unit(0), "luis": mix(unit(0), unit(1), 0.9)})
+
+    feed(h, 5.0)
+
+    assert h.batcher.calls == pytest.approx([0.5, 1.0, 1.5, 2.0])
+    assert [message["person_id"] for message in h.bus.messages] == ["ana"]
+
+
+def test_checkpoint_errors_are_silent(harness, progressive):
+    h = harness(lambda call: InferenceQueueFullError("llena") if call < 4 else unit(0))
+
+    feed(h, 5.0)
+
+    assert h.batcher.calls == pytest.approx([0.5, 1.0, 1.5, 2.0])
+    assert [message["person_id"] for message in h.bus.messages] == ["ana"]
+    assert h.buffer.get_session("c1").primary.failures == 0
+
+
+@pytest.fixture
+def continuous(monkeypatch):
+    for name, value in {
+        "CONTINUOUS_WINDOW_SEC": 2.0,
+        "CONTINUOUS_HOP_SEC": 1.0,
+        "CONTINUOUS_MAX_HOP_SEC": 4.0,
+        "CONTINUOUS_HOP_BACKOFF": 2.0,
+        "CONTINUOUS_SCORE_DELTA": 0.15
+    }.items():
+        monkeypatch.setattr(settings, name, value)
+
+
+def events(h):
+    return [message for message in h.bus.messages if "event" in message]
+
+
+def test_stable_speaker_backs_off_to_the_maximum_hop(harness, continuous):
+    h = harness(unit(0), voices={"ana": unit(0), "luis": unit(1)}, continuous=True)
+
+    feed(h, 18.0)
+
+    assert h.batcher.times == pytest.approx([2.0, 3.0, 5.0, 9.0, 13.0, 17.0])
+    assert h.batcher.calls[1:] == pytest.approx([2.0] * 5)
+    assert events(h) == []
+
+
+def test_speaker_change_is_published_and_resets_the_hop(harness, continuous):
+    h = harness(
+        lambda call: unit(0) if call < 4 else unit(1), voices={"ana": unit(0), "luis": unit(1)}, continuous=True
+    )
+
+    feed(h, 12.5)
+
+    assert h.batcher.times == pytest.approx([2.0, 3.0, 5.0, 9.0, 10.0, 12.0])
+    [change] = events(h)
+    assert change["event"] == "speaker_changed"
+    assert (change["previous_person_id"], change["person_id"]) == ("ana", "luis")
+    assert change["next_hop_sec"] == pytest.approx(1.0)
+
+
+@pytest.mark.parametrize("weight, expected", [(0.8, ["score_changed"]), (0.9, [])])
+def test_score_drift_is_published_past_the_delta(harness, continuous, weight, expected):
+    h = harness(lambda call: unit(0) if call < 3 else mix(unit(0), unit(1), weight), continuous=True)
+
+    feed(h, 5.5)
+
+    assert [change["event"] for change in events(h)] == expected
+    for change in events(h):
+        assert change["person_id"] == "ana"
+        assert change["previous_score"] == pytest.approx(1.0)
+        assert change["score"] == pytest.approx(weight)
+
+
+def test_verification_error_keeps_the_current_hop(harness, continuous):
+    h = harness(lambda call: InferenceQueueFullError("llena") if call == 3 else unit(0), continuous=True)
+
+    feed(h, 12.0)
+
+    assert h.batcher.times == pytest.approx([2.0, 3.0, 5.0, 7.0, 11.0])
+    assert len(h.bus.messages) == 1
+    assert h.buffer.get_session("c1").primary.verifying
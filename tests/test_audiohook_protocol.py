@@ -0,0 +1,69 @@
+import asyncio
+import json
+
+from app.utils.audio_buffer import AudioBuffer
+from app.websocket.audiohook_protocol import AudioHookProtocolHandler
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def send_json(self, data):
+        self.sent.append(data)
+
+
+def open_message(conversation_id: str) -> str:
+    return json.dumps({
+        "type": "open",
+        "seq": 1,
+        "id": "audiohook-session",
+        "parameters": {
+            "conversationId": conversation_id,
+            "media": [{"type": "audio", "format": "PCMU", "channels": ["external"], "rate": 8000}]
+        }
+    })
+
+
+def connect(handler: AudioHookProtocolHandler, connection: str, conversation_id: str):
+    session = handler.create_session(connection)
+    assert asyncio.run(handler.handle_message(FakeWebSocket(), open_message(conversation_id), session))
+    return session
+
+
+def test_reconnect_takes_over_the_conversation():
+    handler = AudioHookProtocolHandler(AudioBuffer())
+    stale = connect(handler, "old", "conv-1")
+    live = connect(handler, "new", "conv-1")
+
+    assert handler.get_session_by_conversation("conv-1") is live
+    assert handler.owns_conversation(live)
+    assert not handler.owns_conversation(stale)
+
+
+def test_stale_close_keeps_the_live_session():
+    audio_buffer = AudioBuffer()
+    handler = AudioHookProtocolHandler(audio_buffer)
+    stale = connect(handler, "old", "conv-1")
+    live = connect(handler, "new", "conv-1")
+    handler.activate_session("conv-1")
+
+    close = json.dumps({"type": "close", "seq": 2, "id": "audiohook-session"})
+    assert not asyncio.run(handler.handle_message(FakeWebSocket(), close, stale))
+    handler.delete_session("old")
+
+    assert audio_buffer.get_session("conv-1") is not None
+    assert handler.get_session_by_conversation("conv-1") is live
+    assert handler.handle_audio_frame(b"\xff" * 160, stale) is None
+    assert handler.handle_audio_frame(b"\xff" * 160, live) is not None
+
+
+def test_owner_close_deletes_the_audio_session():
+    audio_buffer = AudioBuffer()
+    handler = AudioHookProtocolHandler(audio_buffer)
+    session = connect(handler, "only", "conv-1")
+
+    close = json.dumps({"type": "close", "seq": 2, "id": "audiohook-session"})
+    asyncio.run(handler.handle_message(FakeWebSocket(), close, session))
+
+    assert audio_buffer.get_session("conv-1") is None
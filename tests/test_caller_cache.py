@@ -0,0 +1,126 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from app.config import settings
+from app.services import caller_cache as caller_cache_module
+from app.services.caller_cache import CallerCache
+from app.websocket import audiohook_handler as handler_module
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(caller_cache_module.time, "monotonic", clock)
+    return clock
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = CallerCache(ttl_sec=60)
+    cache.put("+34600000001", "ana", 0.9)
+
+    clock.now += 59
+    assert cache.get("+34600000001").person_id == "ana"
+
+    clock.now += 2
+    assert cache.get("+34600000001") is None
+    assert cache.get_stats()["expired"] == 1
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    cache = CallerCache(max_entries=2)
+    cache.put("1", "ana", 0.9)
+    cache.put("2", "luis", 0.9)
+    cache.get("1")
+
+    cache.put("3", "eva", 0.9)
+
+    assert cache.get("2") is None
+    assert cache.get("1").person_id == "ana"
+    assert cache.get("3").person_id == "eva"
+    assert cache.get_stats()["evicted"] == 1
+
+
+def test_memory_cap_evicts_oldest(clock):
+    entry_size = caller_cache_module.CachedCaller("ana", 0.9, 0.0).size
+    cache = CallerCache(max_bytes=2 * entry_size)
+    cache.put("1", "ana", 0.9)
+    cache.put("2", "ana", 0.9)
+    cache.put("3", "ana", 0.9)
+
+    assert len(cache) == 2
+    assert cache.get("1") is None
+
+
+def test_invalidate_person_drops_every_ani(clock):
+    cache = CallerCache()
+    cache.put("1", "ana", 0.9)
+    cache.put("2", "ana", 0.9)
+    cache.put("3", "luis", 0.9)
+
+    assert cache.invalidate_person("ana") == 2
+    assert len(cache) == 1
+
+
+class FakeRepository:
+    def __init__(self, centroids):
+        self.centroids = centroids
+
+    def get(self, person_id):
+        if person_id not in self.centroids:
+            raise FileNotFoundError(person_id)
+        return {"embedding": self.centroids[person_id]}
+
+
+def make_handler(monkeypatch, repository):
+    monkeypatch.setattr(handler_module, "get_model_manager", lambda: SimpleNamespace(get_classifier=lambda: None))
+    monkeypatch.setattr(handler_module, "get_inference_executor", lambda: None)
+    monkeypatch.setattr(settings, "CALLER_CACHE_ENABLED", True)
+    monkeypatch.setattr(settings, "FEATURE_CACHE_ENABLED", False)
+    monkeypatch.setattr(settings, "CALLER_CACHE_VERIFY_THRESHOLD", 0.7)
+    monkeypatch.setattr(handler_module, "get_caller_cache", lambda: CallerCache())
+    return handler_module.AudioHookHandler(None, None, repository)
+
+
+def embedding_with_score(reference: np.ndarray, score: float) -> np.ndarray:
+    orthogonal = np.zeros_like(reference)
+    orthogonal[1] = 1.0
+    return score * reference + np.sqrt(1.0 - score * score) * orthogonal
+
+
+def test_confirmation_uses_current_centroid_and_session_threshold(monkeypatch, clock):
+    centroid = np.zeros(8)
+    centroid[0] = 1.0
+    handler = make_handler(monkeypatch, FakeRepository({"ana": centroid}))
+    handler.caller_cache.put("1", "ana", 0.95)
+    caller = handler.caller_cache.get("1")
+    stream = SimpleNamespace(cached_caller=caller)
+
+    strict = SimpleNamespace(ani="1", threshold=0.85)
+    assert handler._confirm_caller(strict, stream, embedding_with_score(centroid, 0.8), caller) is None
+    assert handler.caller_cache.get("1") is None
+
+    handler.caller_cache.put("1", "ana", 0.95)
+    lenient = SimpleNamespace(ani="1", threshold=0.5)
+    result = handler._confirm_caller(lenient, stream, embedding_with_score(centroid, 0.8), caller)
+    assert result["identified"]
+    assert result["threshold"] == 0.7
+
+
+def test_confirmation_of_deleted_voice_invalidates_the_ani(monkeypatch, clock):
+    handler = make_handler(monkeypatch, FakeRepository({}))
+    handler.caller_cache.put("1", "ana", 0.95)
+    caller = handler.caller_cache.get("1")
+
+    session = SimpleNamespace(ani="1", threshold=0.5)
+    assert handler._confirm_caller(session, SimpleNamespace(cached_caller=caller), np.ones(8), caller) is None
+    assert len(handler.caller_cache) == 0
@@ -0,0 +1,82 @@
+import asyncio
+
+from starlette.websockets import WebSocketState
+
+from app.websocket.connection_manager import SLOW_CONSUMER_CLOSE_CODE, ConnectionManager
+
+
+class FakeWebSocket:
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.messages = []
+        self.closed_with = None
+        self.client_state = WebSocketState.CONNECTED
+
+    async def accept(self):
+        pass
+
+    async def send_json(self, message):
+        await asyncio.sleep(self.delay)
+        self.messages.append(message)
+
+    async def close(self, code: int = 1000, reason: str = ""):
+        self.closed_with = code
+        self.client_state = WebSocketState.DISCONNECTED
+
+
+def test_topic_subscribers_only_get_their_conversation():
+    async def scenario():
+        manager = ConnectionManager()
+        everything = FakeWebSocket()
+        only_c1 = FakeWebSocket()
+        await manager.connect(everything, "all")
+        await manager.connect(only_c1, "c1", topics=["c1"])
+
+        manager.publish({"n": 1}, "c1")
+        manager.publish({"n": 2}, "c2")
+        await asyncio.sleep(0.05)
+        return everything.messages, only_c1.messages
+
+    everything, only_c1 = asyncio.run(scenario())
+
+    assert everything == [{"n": 1}, {"n": 2}]
+    assert only_c1 == [{"n": 1}]
+
+
+def test_slow_consumer_is_dropped_without_blocking_others():
+    async def scenario():
+        manager = ConnectionManager(queue_size=2, send_timeout=5.0)
+        slow = FakeWebSocket(delay=1.0)
+        fast = FakeWebSocket()
+        await manager.connect(slow, "slow")
+        await manager.connect(fast, "fast")
+        await asyncio.sleep(0)
+
+        for n in range(5):
+            manager.publish({"n": n})
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.05)
+        return manager, slow, fast
+
+    manager, slow, fast = asyncio.run(scenario())
+
+    assert [message["n"] for message in fast.messages] == list(range(5))
+    assert "slow" not in manager.active_connections
+    assert slow.closed_with == SLOW_CONSUMER_CLOSE_CODE
+    assert manager.get_stats()["dropped_subscribers"] == 1
+
+
+def test_send_timeout_drops_a_stalled_subscriber():
+    async def scenario():
+        manager = ConnectionManager(queue_size=10, send_timeout=0.05)
+        stalled = FakeWebSocket(delay=1.0)
+        await manager.connect(stalled, "stalled")
+
+        manager.publish({"n": 0})
+        await asyncio.sleep(0.2)
+        return manager, stalled
+
+    manager, stalled = asyncio.run(scenario())
+
+    assert "stalled" not in manager.active_connections
+    assert stalled.closed_with == SLOW_CONSUMER_CLOSE_CODE
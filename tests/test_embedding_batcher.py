@@ -0,0 +1,100 @@
+import asyncio
+
+import numpy as np
+
+from app.core.embedding_batcher import EmbeddingBatcher
+
+
+class FakeBatchFn:
+    def __init__(self, error: Exception = None):
+        self.error = error
+        self.batches = []
+
+    async def __call__(self, waveforms):
+        self.batches.append([float(w[0]) for w in waveforms])
+        await asyncio.sleep(0)
+        if self.error is not None:
+            raise self.error
+        return np.stack([w * 2 for w in waveforms])
+
+
+def make_batcher(batch_fn, **kwargs) -> EmbeddingBatcher:
+    return EmbeddingBatcher(None, batch_fn=batch_fn, **kwargs)
+
+
+def waveform(value: float) -> np.ndarray:
+    return np.full(4, value, dtype=np.float32)
+
+
+def test_requests_inside_the_window_share_a_batch():
+    batch_fn = FakeBatchFn()
+    batcher = make_batcher(batch_fn, max_batch_size=8, window_ms=20)
+
+    async def scenario():
+        return await asyncio.gather(*(batcher.submit(waveform(i)) for i in range(3)))
+
+    results = asyncio.run(scenario())
+
+    assert batch_fn.batches == [[0.0, 1.0, 2.0]]
+    for i, result in enumerate(results):
+        np.testing.assert_array_equal(result, waveform(2 * i))
+    assert batcher.get_stats()["max_batch_size"] == 3
+
+
+def test_full_batches_are_flushed_without_waiting_for_the_window():
+    batch_fn = FakeBatchFn()
+    batcher = make_batcher(batch_fn, max_batch_size=2, window_ms=10000)
+
+    async def scenario():
+        return await asyncio.wait_for(
+            asyncio.gather(*(batcher.submit(waveform(i)) for i in range(4))), timeout=1.0
+        )
+
+    results = asyncio.run(scenario())
+
+    assert batch_fn.batches == [[0.0, 1.0], [2.0, 3.0]]
+    assert [float(r[0]) for r in results] == [0.0, 2.0, 4.0, 6.0]
+
+
+def test_a_trailing_partial_batch_waits_for_the_window():
+    batch_fn = FakeBatchFn()
+    batcher = make_batcher(batch_fn, max_batch_size=2, window_ms=20)
+
+    async def scenario():
+        return await asyncio.gather(*(batcher.submit(waveform(i)) for i in range(5)))
+
+    asyncio.run(scenario())
+
+    assert [len(batch) for batch in batch_fn.batches] == [2, 2, 1]
+    assert batcher.get_stats()["items"] == 5
+
+
+def test_a_failed_batch_raises_for_every_caller():
+    batch_fn = FakeBatchFn(error=RuntimeError("cola llena"))
+    batcher = make_batcher(batch_fn, max_batch_size=8, window_ms=5)
+
+    async def scenario():
+        return await asyncio.gather(*(batcher.submit(waveform(i)) for i in range(3)), return_exceptions=True)
+
+    results = asyncio.run(scenario())
+
+    assert len(batch_fn.batches) == 1
+    assert all(isinstance(r, RuntimeError) and str(r) == "cola llena" for r in results)
+
+
+def test_a_cancelled_request_is_dropped_from_its_batch():
+    batch_fn = FakeBatchFn()
+    batcher = make_batcher(batch_fn, max_batch_size=8, window_ms=20)
+
+    async def scenario():
+        tasks = [asyncio.create_task(batcher.submit(waveform(i))) for i in range(3)]
+        await asyncio.sleep(0)
+        tasks[1].cancel()
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        return results
+
+    results = asyncio.run(scenario())
+
+    assert batch_fn.batches == [[0.0, 2.0]]
+    assert isinstance(results[1], asyncio.CancelledError)
+    np.testing.assert_array_equal(results[2], waveform(4))
@@ -0,0 +1,152 @@
+import os
+
+import numpy as np
+import pytest
+
+from app.repositories import embedding_store
+from app.repositories.embedding_store import EmbeddingStore, import_npy_directory
+
+
+def vector(seed: int, dim: int = 8) -> np.ndarray:
+    return np.random.default_rng(seed).standard_normal(dim).astype(np.float32)
+
+
+def make_store(path, **kwargs) -> EmbeddingStore:
+    kwargs.setdefault("compaction_ratio", 0.3)
+    kwargs.setdefault("compaction_min_rows", 4)
+    return EmbeddingStore(str(path), **kwargs)
+
+
+def test_log_replay_restores_records(tmp_path):
+    store = make_store(tmp_path)
+    store.append([("ana", vector(1)), ("luis", vector(2))])
+    store.append_samples("ana", [vector(3)], max_samples=5)
+    store.delete("luis")
+
+    reopened = make_store(tmp_path)
+    assert set(reopened.records) == {"ana"}
+    np.testing.assert_array_equal(reopened.get_embeddings("ana"), np.stack([vector(1), vector(3)]))
+
+
+def test_torn_trailing_line_is_ignored_and_replaced(tmp_path):
+    store = make_store(tmp_path)
+    store.append([("ana", vector(1))])
+    with open(store.metadata_path, "ab") as f:
+        f.write(b'{"op": "add", "items": [["bro')
+
+    reopened = make_store(tmp_path)
+    assert set(reopened.records) == {"ana"}
+    reopened.append([("luis", vector(2))])
+
+    assert set(make_store(tmp_path).records) == {"ana", "luis"}
+
+
+def test_compaction_keeps_live_rows(tmp_path):
+    store = make_store(tmp_path)
+    store.append([(f"p{i}", vector(i)) for i in range(6)])
+    for i in range(3):
+        store.delete(f"p{i}")
+
+    assert store.generation > 0
+    assert store._rows_total < 6
+    for i in range(3, 6):
+        np.testing.assert_array_equal(store.get_embeddings(f"p{i}")[0], vector(i))
+
+
+def test_compaction_keeps_pending_changes(tmp_path):
+    store = make_store(tmp_path)
+    store.append([(f"p{i}", vector(i)) for i in range(6)])
+    store.drain_changes()
+
+    store.append_samples("p5", [vector(50)], max_samples=5)
+    for i in range(3):
+        store.delete(f"p{i}")
+
+    assert store.generation > 0
+    changes = store.drain_changes()
+    assert {("delete", f"p{i}") for i in range(3)} <= {(op, person_id) for op, person_id, _ in changes}
+    adds = {person_id: rows for op, person_id, rows in changes if op == "add"}
+    np.testing.assert_array_equal(store.get_rows(adds["p5"]), np.stack([vector(5), vector(50)]))
+
+
+def test_compaction_does_not_drop_other_workers_commits(tmp_path):
+    worker_a = make_store(tmp_path)
+    worker_b = make_store(tmp_path)
+    worker_a.append([(f"p{i}", vector(i)) for i in range(6)])
+    worker_b.refresh()
+
+    worker_a.delete("p0")
+    assert worker_a.generation == 0
+    worker_a.delete("p1")
+    assert worker_a.generation == 1
+
+    worker_b.append([("bea", vector(10))])
+    worker_a.append([("ana", vector(11))])
+
+    final = make_store(tmp_path)
+    assert set(final.records) == {"p2", "p3", "p4", "p5", "bea", "ana"}
+    np.testing.assert_array_equal(final.get_embeddings("bea")[0], vector(10))
+
+
+def test_write_after_concurrent_append_keeps_both(tmp_path):
+    worker_a = make_store(tmp_path)
+    worker_b = make_store(tmp_path)
+    worker_a.append([("ana", vector(1))])
+    worker_b.append([("bea", vector(2))])
+    worker_a.delete("ana")
+
+    assert set(make_store(tmp_path).records) == {"bea"}
+
+
+def test_duplicate_person_is_rejected(tmp_path):
+    store = make_store(tmp_path)
+    store.append([("ana", vector(1))])
+    with pytest.raises(FileExistsError):
+        store.append([("ana", vector(2))])
+
+
+def test_reload_after_foreign_compaction_reports_only_changed_voices(tmp_path):
+    worker_a = make_store(tmp_path)
+    worker_b = make_store(tmp_path)
+    worker_a.append([(f"p{i}", vector(i)) for i in range(6)])
+    worker_b.refresh()
+    worker_b.drain_changes()
+
+    worker_a.append_samples("p5", [vector(50)], max_samples=5)
+    for i in range(3):
+        worker_a.delete(f"p{i}")
+    assert worker_a.generation == 1
+
+    worker_b.refresh()
+    changes = {(op, person_id) for op, person_id, _ in worker_b.drain_changes()}
+    assert changes == {("delete", "p0"), ("delete", "p1"), ("delete", "p2"), ("add", "p5")}
+
+
+def test_npy_import_is_a_single_append(tmp_path, monkeypatch):
+    legacy = tmp_path / "legacy"
+    legacy.mkdir()
+    for i in range(3):
+        np.save(legacy / f"p{i}.npy", vector(i))
+    os.utime(legacy / "p1.npy", (1000.0, 1000.0))
+
+    store = make_store(tmp_path / "store")
+    appends = []
+    original_append = store.append
+    monkeypatch.setattr(store, "append", lambda items, **kwargs: (appends.append(len(items)), original_append(items, **kwargs)))
+
+    assert import_npy_directory(store, str(legacy)) == 3
+    assert appends == [3]
+    assert store.records["p1"].registered_at == 1000.0
+    np.testing.assert_array_equal(store.get_embeddings("p2")[0], vector(2))
+
+
+def test_compaction_keeps_the_lock_fresh(tmp_path, monkeypatch):
+    monkeypatch.setattr(embedding_store, "COMPACTION_CHUNK_ROWS", 2)
+    store = make_store(tmp_path)
+    store.append([(f"p{i}", vector(i)) for i in range(6)])
+
+    beats = []
+    monkeypatch.setattr(embedding_store.StoreLock, "heartbeat", lambda lock: beats.append(lock.path))
+    store.compact()
+
+    assert len(beats) >= 2
@@ -0,0 +1,87 @@
+import asyncio
+import importlib
+import io
+import sys
+import tarfile
+import zipfile
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from starlette.datastructures import UploadFile
+
+from app import dependencies
+from app.services.enrollment_service import items_from_archive
+
+
+def zip_archive(files: dict) -> io.BytesIO:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, data in files.items():
+            archive.writestr(name, data)
+    buffer.seek(0)
+    return buffer
+
+
+def test_zip_entry_over_limit_is_rejected_before_reading():
+    archive = zip_archive({"ana.wav": b"\0" * 4096, "luis.wav": b"\0" * 100})
+    items = {item.person_id: item for item in items_from_archive(archive, "voces.zip", max_file_bytes=1024)}
+
+    with pytest.raises(ValueError, match="muy grande"):
+        items["ana"].read()
+    assert items["luis"].read() == b"\0" * 100
+
+
+def test_manifest_entries_are_size_checked():
+    archive = zip_archive({
+        "lote/manifest.csv": "person_id,path\nana,ana.wav\n",
+        "lote/ana.wav": b"\0" * 4096
+    })
+    items = list(items_from_archive(archive, "voces.zip", max_file_bytes=1024))
+
+    assert [item.person_id for item in items] == ["ana"]
+    with pytest.raises(ValueError, match="muy grande"):
+        items[0].read()
+
+
+def test_tar_non_regular_member_is_reported():
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w") as archive:
+        data = b"\0" * 100
+        info = tarfile.TarInfo("luis.wav")
+        info.size = len(data)
+        archive.addfile(info, io.BytesIO(data))
+        link = tarfile.TarInfo("ana.wav")
+        link.type = tarfile.SYMTYPE
+        link.linkname = "/etc/passwd"
+        archive.addfile(link)
+    buffer.seek(0)
+
+    items = {item.person_id: item for item in items_from_archive(buffer, "voces.tar", max_file_bytes=1024)}
+
+    with pytest.raises(ValueError, match="no es un archivo regular"):
+        items["ana"].read()
+    assert items["luis"].read() == b"\0" * 100
+
+
+@pytest.fixture
+def voices_api(monkeypatch):
+    monkeypatch.setattr(dependencies, "get_model_manager", lambda: SimpleNamespace(get_classifier=lambda: None))
+    monkeypatch.setattr(dependencies, "get_voice_repository", lambda: None)
+    monkeypatch.delitem(sys.modules, "app.services.voice_service", raising=False)
+    monkeypatch.delitem(sys.modules, "app.api.v1.voices", raising=False)
+    return importlib.import_module("app.api.v1.voices")
+
+
+@pytest.mark.parametrize("filename, data", [
+    ("voces.zip", b"not a zip"),
+    ("voces.tar.gz", b"not a tar"),
+    ("voces.zip", zip_archive({"manifest.csv": "ana\n"}).getvalue())
+])
+def test_bulk_register_rejects_a_corrupt_archive(voices_api, filename, data):
+    upload = UploadFile(io.BytesIO(data), filename=filename)
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(voices_api.register_voices_bulk(archive=upload, service=None))
+
+    assert error.value.status_code == 400
@@ -0,0 +1,102 @@
+import numpy as np
+import pytest
+
+from app.core import voice_index
+from app.core.voice_index import INDEX_FLAT, INDEX_HNSW, INDEX_IVF, FaissVoiceIndex
+
+pytest.importorskip("faiss")
+
+INDEX_TYPES = [INDEX_FLAT, INDEX_IVF, INDEX_HNSW]
+
+
+def unit_rows(count: int, dim: int = 16, seed: int = 0) -> np.ndarray:
+    rows = np.random.default_rng(seed).standard_normal((count, dim)).astype(np.float32)
+    return rows / np.linalg.norm(rows, axis=1, keepdims=True)
+
+
+def make_index(index_type: str, vectors: np.ndarray) -> FaissVoiceIndex:
+    index = FaissVoiceIndex(index_type, ivf_nlist=4, ivf_nprobe=4, hnsw_m=16, hnsw_ef_search=64)
+    index.rebuild((f"p{i}", vector) for i, vector in enumerate(vectors))
+    return index
+
+
+@pytest.mark.parametrize("index_type", INDEX_TYPES)
+def test_add_and_remove_are_visible_to_search(index_type):
+    vectors = unit_rows(200)
+    index = make_index(index_type, vectors)
+    extra = unit_rows(1, seed=1)[0]
+
+    index.add("nuevo", extra)
+    ids, scores = index.search(extra, k=1)
+    assert ids == ["nuevo"] and scores[0] == pytest.approx(1.0, abs=1e-5)
+
+    index.remove("nuevo")
+    index.remove("p5")
+    ids, _ = index.search(vectors[5], k=5)
+    assert "nuevo" not in index and "p5" not in ids
+    assert len(index) == 199
+
+
+@pytest.mark.parametrize("index_type", INDEX_TYPES)
+def test_re_adding_a_voice_replaces_its_vector(index_type):
+    vectors = unit_rows(100)
+    index = make_index(index_type, vectors)
+    replacement = unit_rows(1, seed=2)[0]
+
+    index.add("p3", replacement)
+
+    ids, _ = index.search(replacement, k=1)
+    assert ids == ["p3"]
+    assert len(index) == 100
+
+
+@pytest.mark.parametrize("index_type", INDEX_TYPES)
+def test_save_and_load_round_trip(index_type, tmp_path):
+    vectors = unit_rows(200)
+    index = make_index(index_type, vectors)
+    index.remove("p0")
+    path = str(tmp_path / "voices.index")
+    index.save(path, {"p1": [1.0, 1]})
+
+    loaded = FaissVoiceIndex(index_type, ivf_nlist=4, ivf_nprobe=4, hnsw_m=16, hnsw_ef_search=64)
+    assert loaded.load(path)
+
+    assert loaded.stamps == {"p1": [1.0, 1]}
+    assert sorted(loaded.ids) == sorted(index.ids)
+    for query in unit_rows(5, seed=3):
+        assert loaded.search(query, k=3)[0] == index.search(query, k=3)[0]
+
+    loaded.add("nuevo", vectors[0])
+    assert loaded.search(vectors[0], k=1)[0] == ["nuevo"]
+
+
+def test_load_rejects_an_index_of_another_type(tmp_path):
+    path = str(tmp_path / "voices.index")
+    make_index(INDEX_FLAT, unit_rows(10)).save(path)
+
+    assert not FaissVoiceIndex(INDEX_HNSW).load(path)
+
+
+def test_small_ivf_falls_back_to_flat_until_it_can_be_trained():
+    index = make_index(INDEX_IVF, unit_rows(10))
+    assert index._built_type == INDEX_FLAT
+    assert not index.needs_rebuild
+
+    for i, vector in enumerate(unit_rows(2 * voice_index.IVF_MIN_POINTS_PER_CENTROID, seed=4)):
+        index.add(f"q{i}", vector)
+    assert index.needs_rebuild
+
+    index.rebuild(zip(index.ids, unit_rows(len(index), seed=5)))
+    assert index._built_type == INDEX_IVF
+    assert not index.needs_rebuild
+
+
+def test_hnsw_tombstones_trigger_a_rebuild():
+    index = make_index(INDEX_HNSW, unit_rows(10))
+
+    index.remove("p0")
+    index.remove("p1")
+    assert not index.needs_rebuild
+
+    index.remove("p2")
+    assert index.needs_rebuild
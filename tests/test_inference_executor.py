@@ -0,0 +1,36 @@
+import asyncio
+import time
+
+import pytest
+
+from app.core import inference_executor
+from app.core.inference_executor import EXECUTOR_PROCESS, EXECUTOR_THREAD, InferenceExecutor
+
+
+def _no_model(torch_threads: int):
+    pass
+
+
+def _sleep(seconds: float) -> float:
+    time.sleep(seconds)
+    return seconds
+
+
+async def run_pair(executor: InferenceExecutor):
+    return await asyncio.gather(executor.run(_sleep, 0.3), executor.run(_sleep, 0.3))
+
+
+@pytest.mark.parametrize("mode", [EXECUTOR_THREAD, EXECUTOR_PROCESS])
+def test_queue_wait_is_measured(monkeypatch, mode):
+    monkeypatch.setattr(inference_executor, "_init_process_worker", _no_model)
+    executor = InferenceExecutor(mode=mode, max_workers=1)
+    try:
+        executor._get_executor().submit(_sleep, 0).result()
+        assert asyncio.run(run_pair(executor)) == [0.3, 0.3]
+    finally:
+        executor.shutdown()
+
+    stats = executor.get_stats()
+    assert stats["completed"] == 2
+    assert stats["max_wait_ms"] >= 200
+    assert 250 <= stats["max_run_ms"] < 1000
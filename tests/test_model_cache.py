@@ -0,0 +1,76 @@
+from types import SimpleNamespace
+
+import pytest
+import torch
+
+from app.core import model_cache
+from app.core.optimized_encoder import parity_waveforms
+
+pytest.importorskip("speechbrain")
+
+SMALL_ECAPA = {
+    "n_mels": 80,
+    "channels": [64, 64, 64, 64, 192],
+    "kernel_sizes": [5, 3, 3, 3, 1],
+    "dilations": [1, 2, 3, 4, 1],
+    "attention_channels": 16,
+    "lin_neurons": 32
+}
+
+
+@pytest.fixture
+def classifier(monkeypatch):
+    from speechbrain.lobes.features import Fbank
+    from speechbrain.lobes.models.ECAPA_TDNN import ECAPA_TDNN
+    from speechbrain.processing.features import InputNormalization
+
+    monkeypatch.setattr(model_cache, "ECAPA_CONFIG", SMALL_ECAPA)
+    config = dict(SMALL_ECAPA)
+    n_mels = config.pop("n_mels")
+    torch.manual_seed(0)
+
+    mean_var_norm_emb = InputNormalization(norm_type="global", std_norm=False)
+    mean_var_norm_emb.count = 12
+    mean_var_norm_emb.glob_mean = torch.randn(SMALL_ECAPA["lin_neurons"])
+    mean_var_norm_emb.glob_std = torch.rand(SMALL_ECAPA["lin_neurons"]) + 0.5
+
+    mods = SimpleNamespace(
+        compute_features=Fbank(n_mels=n_mels),
+        mean_var_norm=InputNormalization(norm_type="sentence", std_norm=False).eval(),
+        embedding_model=ECAPA_TDNN(input_size=n_mels, **config).eval(),
+        mean_var_norm_emb=mean_var_norm_emb.eval()
+    )
+    return model_cache.CachedClassifier(mods)
+
+
+def test_normalization_statistics_survive_the_cache(classifier, tmp_path):
+    path = str(tmp_path / "encoder_cache.pt")
+    model_cache.export_model_cache(classifier, path, str(tmp_path))
+
+    cached = model_cache.load_model_cache(path)
+
+    expected = classifier.mods.mean_var_norm_emb
+    restored = cached.mods.mean_var_norm_emb
+    assert restored.count == expected.count
+    torch.testing.assert_close(restored.glob_mean, expected.glob_mean)
+    torch.testing.assert_close(restored.glob_std, expected.glob_std)
+
+
+def test_verified_export_matches_the_source_classifier(classifier, tmp_path):
+    path = str(tmp_path / "encoder_cache.pt")
+    (tmp_path / model_cache.SOURCE_CHECKPOINT).write_bytes(b"ckpt")
+
+    cached, report = model_cache.export_verified_model_cache(
+        classifier, path, str(tmp_path), parity_waveforms((1.0, 2.0))
+    )
+
+    assert cached is not None
+    assert report["min_cosine"] >= model_cache.CACHE_PARITY_MIN_COSINE
+    assert model_cache.is_cache_valid(path, str(tmp_path))
+
+
+def test_cache_without_source_checkpoint_is_invalid(classifier, tmp_path):
+    path = str(tmp_path / "encoder_cache.pt")
+    model_cache.export_model_cache(classifier, path, str(tmp_path))
+
+    assert not model_cache.is_cache_valid(path, str(tmp_path))
@@ -0,0 +1,122 @@
+import numpy as np
+import pytest
+
+from app.core.pcm_converter import (
+    FORMAT_L16,
+    FORMAT_PCMU,
+    ULAW_DECODE_TABLE,
+    FrameDemuxer,
+    StreamingL16Decoder,
+    StreamingULawResampler,
+    StreamingUpsampler,
+    create_stream_decoder,
+    is_supported_media
+)
+
+
+def feed(process, data, chunk_sizes):
+    out = []
+    start = 0
+    index = 0
+    while start < len(data):
+        size = chunk_sizes[index % len(chunk_sizes)]
+        out.append(process(data[start:start + size]))
+        start += size
+        index += 1
+    return np.concatenate(out)
+
+
+def test_ulaw_decode_matches_g711_table():
+    decoder = StreamingULawResampler(rate=16000)
+    codes = bytes(range(256))
+
+    expected = ULAW_DECODE_TABLE.astype(np.float32) / 32768.0
+    np.testing.assert_array_equal(decoder.process(codes), expected)
+
+
+def test_ulaw_resampler_doubles_the_rate():
+    decoder = StreamingULawResampler(rate=8000)
+
+    assert decoder.process(bytes(160)).shape[0] == 320
+
+
+@pytest.mark.parametrize("chunk_sizes", [[1], [7, 160, 3], [1000]])
+def test_upsampling_is_invariant_to_chunking(chunk_sizes):
+    samples = np.random.default_rng(0).uniform(-0.5, 0.5, 4000).astype(np.float32)
+    expected = StreamingUpsampler().process(samples)
+
+    actual = feed(StreamingUpsampler().process, samples, chunk_sizes)
+
+    np.testing.assert_allclose(actual, expected, atol=1e-6)
+
+
+def test_upsampling_preserves_a_low_tone():
+    t = np.arange(8000) / 8000
+    tone = (0.5 * np.sin(2 * np.pi * 440 * t)).astype(np.float32)
+
+    upsampled = StreamingUpsampler().process(tone)
+
+    reference = 0.5 * np.sin(2 * np.pi * 440 * np.arange(16000) / 16000)
+    steady = slice(200, 15800)
+    errors = [np.max(np.abs(upsampled[steady] - np.roll(reference, shift)[steady])) for shift in range(80)]
+    assert min(errors) < 0.01
+
+
+@pytest.mark.parametrize("byte_order, dtype", [("little", "<i2"), ("big", ">i2")])
+def test_l16_decode_respects_byte_order(byte_order, dtype):
+    values = np.array([0, 1, -1, 16384, -32768, 32767], dtype=dtype)
+    decoder = StreamingL16Decoder(rate=16000, byte_order=byte_order)
+
+    np.testing.assert_array_equal(decoder.process(values.tobytes()), values.astype(np.float32) / 32768.0)
+
+
+def test_l16_8k_is_upsampled():
+    decoder = StreamingL16Decoder(rate=8000, byte_order="little")
+
+    assert decoder.process(np.zeros(160, dtype="<i2").tobytes()).shape[0] == 320
+
+
+def test_l16_rejects_unknown_byte_order():
+    with pytest.raises(ValueError):
+        StreamingL16Decoder(rate=16000, byte_order="middle")
+
+
+def test_create_stream_decoder_rejects_unsupported_media():
+    assert is_supported_media(FORMAT_L16, 16000)
+    assert not is_supported_media(FORMAT_L16, 44100)
+    assert not is_supported_media("opus", 16000)
+    with pytest.raises(ValueError):
+        create_stream_decoder(FORMAT_PCMU, 44100)
+
+
+def test_demuxer_splits_interleaved_channels():
+    left = np.arange(0, 100, dtype="<i2")
+    right = np.arange(1000, 1100, dtype="<i2")
+    interleaved = np.stack((left, right), axis=1).reshape(-1)
+
+    frames = FrameDemuxer(np.dtype("<i2"), channels=2).split(interleaved.tobytes())
+
+    np.testing.assert_array_equal(frames[:, 0], left)
+    np.testing.assert_array_equal(frames[:, 1], right)
+
+
+def test_demuxer_carries_partial_frames_across_chunks():
+    left = np.arange(0, 50, dtype="<i2")
+    right = -left
+    data = np.stack((left, right), axis=1).reshape(-1).tobytes()
+    demuxer = FrameDemuxer(np.dtype("<i2"), channels=2)
+
+    parts = [demuxer.split(data[start:start + 7]) for start in range(0, len(data), 7)]
+    frames = np.concatenate(parts)
+
+    np.testing.assert_array_equal(frames[:, 0], left)
+    np.testing.assert_array_equal(frames[:, 1], right)
+
+
+def test_demuxer_reset_drops_pending_bytes():
+    demuxer = FrameDemuxer(np.dtype(np.uint8), channels=2)
+    assert demuxer.split(b"\x01").shape == (0, 2)
+
+    demuxer.reset()
+
+    np.testing.assert_array_equal(demuxer.split(b"\x02\x03"), [[2, 3]])
@@ -0,0 +1,70 @@
+import asyncio
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from fastapi import HTTPException
+
+from app.api.v1 import sessions
+from app.core.score_norm import NORM_AS, NORM_S, ScoreNormalizer
+
+
+def unit_rows(count: int, dim: int = 16, seed: int = 0) -> np.ndarray:
+    rows = np.random.default_rng(seed).standard_normal((count, dim)).astype(np.float32)
+    return rows / np.linalg.norm(rows, axis=1, keepdims=True)
+
+
+def expected_norm(score, enroll_scores, test_scores):
+    return 0.5 * ((score - enroll_scores.mean()) / enroll_scores.std() + (score - test_scores.mean()) / test_scores.std())
+
+
+def test_s_norm_uses_the_whole_cohort():
+    cohort = unit_rows(50)
+    enrolled, query = unit_rows(2, seed=1)
+    normalizer = ScoreNormalizer(cohort, method=NORM_S)
+    normalizer.enroll("ana", enrolled)
+
+    score = float(enrolled @ query)
+    actual = normalizer.normalize(query, ["ana"], np.array([score]))[0]
+
+    assert actual == pytest.approx(expected_norm(score, cohort @ enrolled, cohort @ query), rel=1e-4)
+
+
+def test_as_norm_uses_the_top_k_cohort_scores():
+    cohort = unit_rows(50)
+    enrolled, query = unit_rows(2, seed=2)
+    normalizer = ScoreNormalizer(cohort, method=NORM_AS, top_k=10)
+    normalizer.enroll("ana", enrolled)
+
+    score = float(enrolled @ query)
+    actual = normalizer.normalize(query, ["ana"], np.array([score]))[0]
+
+    enroll_top = np.sort(cohort @ enrolled)[-10:]
+    test_top = np.sort(cohort @ query)[-10:]
+    assert actual == pytest.approx(expected_norm(score, enroll_top, test_top), rel=1e-4)
+
+
+def test_own_cohort_row_is_excluded_from_enrollment_stats():
+    cohort = unit_rows(20)
+    ids = [f"p{i}" for i in range(20)]
+    normalizer = ScoreNormalizer(cohort, method=NORM_S, cohort_ids=ids)
+
+    mean, std = normalizer.enrollment_stats(["p3"], cohort[3:4])
+
+    others = np.delete(cohort @ cohort[3], 3)
+    assert mean[0] == pytest.approx(others.mean(), rel=1e-4)
+    assert std[0] == pytest.approx(others.std(), rel=1e-4)
+
+
+def test_activate_rejects_custom_threshold_with_score_norm(monkeypatch):
+    monkeypatch.setattr(
+        sessions, "get_voice_repository", lambda: SimpleNamespace(get_score_normalizer=lambda: object())
+    )
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(sessions.activate_session(
+            conversation_id="c1", threshold=0.6, top_k=0, continuous=False, service=None
+        ))
+
+    assert error.value.status_code == 400
+    assert "SCORE_NORM_THRESHOLD" in error.value.detail
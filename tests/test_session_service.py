@@ -0,0 +1,47 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from app.api.v1 import sessions
+from app.services.session_service import SessionService
+from app.utils.audio_buffer import AudioBuffer
+
+
+def activate(service: SessionService):
+    return sessions.activate_session(
+        conversation_id="c1", threshold=None, top_k=0, continuous=False, service=service
+    )
+
+
+def test_reactivation_answers_the_previous_request_with_409():
+    service = SessionService(AudioBuffer())
+
+    async def scenario():
+        first = asyncio.create_task(activate(service))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(activate(service))
+        await asyncio.sleep(0)
+        service.store_identification_result("c1", {"identified": True, "person_id": "ana", "all_scores": {}})
+
+        with pytest.raises(HTTPException) as error:
+            await first
+        return error.value, await second
+
+    error, response = asyncio.run(scenario())
+
+    assert error.status_code == 409
+    assert response.identified and response.data.name == "ana"
+
+
+def test_timeout_is_still_408(monkeypatch):
+    service = SessionService(AudioBuffer())
+    original_wait = service.wait_for_identification
+    monkeypatch.setattr(
+        service, "wait_for_identification", lambda conversation_id, timeout: original_wait(conversation_id, 0.01)
+    )
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(activate(service))
+
+    assert error.value.status_code == 408
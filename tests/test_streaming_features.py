@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+import torch
+
+from app.core.streaming_features import StreamingFbank, check_feature_equivalence
+
+features = pytest.importorskip("speechbrain.lobes.features")
+
+
+@pytest.fixture(scope="module")
+def fbank():
+    return features.Fbank(n_mels=80)
+
+
+def signal(num_samples: int, seed: int = 0) -> np.ndarray:
+    return (0.1 * np.random.default_rng(seed).standard_normal(num_samples)).astype(np.float32)
+
+
+def stream(fbank, audio: np.ndarray, capacity: int, chunk: int = 1600) -> StreamingFbank:
+    extractor = StreamingFbank(fbank, capacity)
+    for start in range(0, audio.shape[0], chunk):
+        extractor.append(audio[start:start + chunk])
+    return extractor
+
+
+def test_full_and_trailing_windows_match_one_shot(fbank):
+    report = check_feature_equivalence(fbank, [signal(96080), signal(48123, seed=1)], chunk_samples=1600)
+
+    assert report["windows"] >= 8
+    assert report["max_abs_error"] < 1e-3
+
+
+@pytest.mark.parametrize("length", [96080, 48041, 8001, 481])
+def test_unaligned_window_is_snapped_to_hop(fbank, length):
+    audio = signal(200000, seed=2)
+    extractor = stream(fbank, audio, capacity=96080)
+
+    snapped = extractor.window_samples(length)
+    assert 0 <= length - snapped < extractor.hop
+    assert (audio.shape[0] - snapped) % extractor.hop == 0
+
+    with torch.no_grad():
+        expected = fbank(torch.from_numpy(audio[audio.shape[0] - snapped:]).unsqueeze(0))
+    actual = extractor.features(audio[audio.shape[0] - length:])
+
+    assert actual.shape == expected.shape
+    assert float((actual - expected).abs().max()) < 1e-3
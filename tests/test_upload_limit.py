@@ -0,0 +1,56 @@
+import asyncio
+import json
+
+from app.api.upload_limit import MULTIPART_OVERHEAD_BYTES, UploadSizeLimitMiddleware
+
+LIMIT = 1024 * 1024
+
+
+async def echo_app(scope, receive, send):
+    body = b""
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if not message.get("more_body"):
+            break
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": str(len(body)).encode()})
+
+
+def call(content_length, body: bytes = b"", path: str = "/api/v1/voices/register"):
+    middleware = UploadSizeLimitMiddleware(echo_app, {"/api/v1/voices/register": LIMIT})
+    headers = [] if content_length is None else [(b"content-length", content_length)]
+    scope = {"type": "http", "method": "POST", "path": path, "headers": headers}
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(middleware(scope, receive, send))
+    status = sent[0]["status"]
+    payload = b"".join(message.get("body", b"") for message in sent[1:])
+    return status, payload
+
+
+def test_small_upload_passes_through():
+    assert call(b"5", b"hello") == (200, b"5")
+
+
+def test_declared_oversize_is_rejected():
+    status, _ = call(str(LIMIT + MULTIPART_OVERHEAD_BYTES + 1).encode())
+
+    assert status == 413
+
+
+def test_malformed_content_length_is_rejected():
+    for value in (b"abc", b"-5", b""):
+        status, payload = call(value)
+        assert status == 400
+        assert json.loads(payload)["detail"] == "Cabecera Content-Length inválida"
+
+
+def test_unlimited_path_is_not_checked():
+    assert call(b"abc", b"hi", path="/api/health") == (200, b"2")
@@ -0,0 +1,39 @@
+import numpy as np
+
+from app.core.vad import EnergyVAD
+
+RATE = 16000
+
+
+def voiced_tone(seconds: float, rng) -> np.ndarray:
+    t = np.arange(int(RATE * seconds)) / RATE
+    tone = sum(0.3 / k * np.sin(2 * np.pi * 150 * k * t) for k in range(1, 6))
+    return (tone + 0.001 * rng.standard_normal(t.shape[0])).astype(np.float32)
+
+
+def noise(seconds: float, rng, level: float = 0.001) -> np.ndarray:
+    return (level * rng.standard_normal(int(RATE * seconds))).astype(np.float32)
+
+
+def run(vad: EnergyVAD, audio: np.ndarray, chunk: int = 1600) -> int:
+    return sum(vad.process(audio[i:i + chunk]).shape[0] for i in range(0, audio.shape[0], chunk))
+
+
+def test_sustained_speech_is_kept():
+    rng = np.random.default_rng(0)
+    vad = EnergyVAD(sample_rate=RATE)
+    run(vad, noise(0.5, rng))
+
+    kept = run(vad, voiced_tone(8.0, rng))
+
+    assert kept >= 0.95 * 8.0 * RATE
+
+
+def test_silence_is_dropped():
+    rng = np.random.default_rng(1)
+    vad = EnergyVAD(sample_rate=RATE)
+
+    kept = run(vad, noise(4.0, rng))
+
+    assert kept <= 0.05 * 4.0 * RATE
+
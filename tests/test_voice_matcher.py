@@ -0,0 +1,127 @@
+import numpy as np
+import pytest
+
+from app.config import settings
+from app.core.voice_index import MatrixVoiceIndex
+from app.core.voice_matcher import VoiceMatcher
+
+
+def unit_rows(count: int, dim: int = 16, seed: int = 0) -> np.ndarray:
+    rows = np.random.default_rng(seed).standard_normal((count, dim)).astype(np.float32)
+    return rows / np.linalg.norm(rows, axis=1, keepdims=True)
+
+
+def build_index(vectors: np.ndarray) -> MatrixVoiceIndex:
+    index = MatrixVoiceIndex()
+    for i, vector in enumerate(vectors):
+        index.add(f"p{i}", vector)
+    return index
+
+
+@pytest.fixture(autouse=True)
+def matcher_settings(monkeypatch):
+    monkeypatch.setattr(settings, "DEFAULT_THRESHOLD", 0.75)
+    monkeypatch.setattr(settings, "RESULT_TOP_K", 5)
+
+
+def test_empty_database_is_never_identified():
+    result = VoiceMatcher.find_match(unit_rows(1)[0], MatrixVoiceIndex())
+
+    assert not result["identified"]
+    assert result["person_id"] is None
+    assert result["all_scores"] == {}
+
+
+def test_score_equal_to_the_threshold_is_identified():
+    voices = unit_rows(3)
+    index = build_index(voices)
+    query = unit_rows(1, seed=1)[0] + voices[1]
+    score = float(index.similarities(query)[1])
+
+    exact = VoiceMatcher.find_match(query, index, threshold=score)
+    above = VoiceMatcher.find_match(query, index, threshold=score + 1e-6)
+
+    assert exact["identified"] and exact["person_id"] == "p1"
+    assert not above["identified"] and above["person_id"] is None
+
+
+def test_margin_is_the_gap_to_the_runner_up():
+    index = build_index(unit_rows(6))
+    query = unit_rows(1, seed=1)[0]
+
+    result = VoiceMatcher.find_match(query, index, threshold=0.0)
+
+    second = sorted(index.similarities(query), reverse=True)[1]
+    assert result["margin"] == pytest.approx(result["score"] - second, abs=1e-6)
+
+
+def test_single_voice_margin_is_its_score():
+    index = build_index(unit_rows(1))
+    query = unit_rows(1, seed=1)[0]
+
+    result = VoiceMatcher.find_match(query, index, threshold=-1.0)
+
+    assert result["margin"] == pytest.approx(result["score"])
+
+
+def test_search_matches_brute_force_ordering():
+    voices = unit_rows(200, seed=3)
+    index = build_index(voices)
+    for name in ("p7", "p50", "p199"):
+        index.remove(name)
+    remaining = [i for i in range(200) if f"p{i}" in index]
+    query = unit_rows(1, seed=4)[0]
+
+    ids, scores = index.search(query, k=20)
+
+    brute = voices[remaining] @ query
+    order = np.argsort(-brute, kind="stable")[:20]
+    assert ids == [f"p{remaining[i]}" for i in order]
+    np.testing.assert_allclose(scores, brute[order], rtol=1e-5)
+
+
+def test_find_match_picks_the_brute_force_best():
+    voices = unit_rows(50, seed=5)
+    index = build_index(voices)
+    query = voices[17] + 0.1 * unit_rows(1, seed=6)[0]
+
+    result = VoiceMatcher.find_match(query, index)
+
+    assert result["identified"] and result["person_id"] == "p17"
+    assert result["score"] == pytest.approx(float(np.max(voices @ (query / np.linalg.norm(query)))), rel=1e-5)
+
+
+@pytest.mark.parametrize("top_k", [1, 3, 5])
+def test_all_scores_are_capped_and_sorted(top_k):
+    index = build_index(unit_rows(20, seed=7))
+    query = unit_rows(1, seed=8)[0]
+
+    result = VoiceMatcher.find_match(query, index, threshold=0.0, top_k=top_k)
+
+    scores = list(result["all_scores"].values())
+    assert result["top_k"] == top_k
+    assert len(scores) == top_k
+    assert scores == sorted(scores, reverse=True)
+    assert scores[0] == pytest.approx(result["score"])
+
+
+def test_best_score_is_reported_when_below_the_threshold():
+    voices = unit_rows(20, seed=9)
+    index = build_index(voices)
+    query = unit_rows(1, seed=10)[0]
+
+    result = VoiceMatcher.find_match(query, index, threshold=0.99, top_k=3)
+
+    best = int(np.argmax(voices @ query))
+    assert not result["identified"]
+    assert next(iter(result["all_scores"])) == f"p{best}"
+    assert len(result["all_scores"]) == 3
+
+
+def test_default_top_k_comes_from_settings(monkeypatch):
+    monkeypatch.setattr(settings, "RESULT_TOP_K", 2)
+    index = build_index(unit_rows(10, seed=11))
+
+    result = VoiceMatcher.find_match(unit_rows(1, seed=12)[0], index)
+
+    assert len(result["all_scores"]) == 2
@@ -0,0 +1,136 @@
+import numpy as np
+import pytest
+
+from app.config import settings
+from app.core.voice_index import FaissVoiceIndex
+from app.repositories.voice_repository import VoiceRepository
+
+
+def vector(seed: int, dim: int = 8) -> np.ndarray:
+    return np.random.default_rng(seed).standard_normal(dim).astype(np.float32)
+
+
+@pytest.fixture
+def flat_settings(tmp_path, monkeypatch):
+    pytest.importorskip("faiss")
+    monkeypatch.setattr(settings, "VOICES_DB", str(tmp_path))
+    monkeypatch.setattr(settings, "VOICE_INDEX_TYPE", "flat")
+    monkeypatch.setattr(settings, "VOICE_INDEX_PATH", str(tmp_path / "voices.index"))
+    monkeypatch.setattr(settings, "VOICE_MATCH_MODE", "centroid")
+    monkeypatch.setattr(settings, "SCORE_NORM", "none")
+
+
+def top_score(repository: VoiceRepository, person_id: str) -> float:
+    centroid = repository.get(person_id)["embedding"]
+    ids, scores = repository.get_voice_index().search(centroid, 1)
+    assert ids[0] == person_id
+    return float(scores[0])
+
+
+def test_persisted_index_picks_up_samples_added_after_save(flat_settings):
+    writer = VoiceRepository()
+    writer.save_many([("ana", vector(1)), ("luis", vector(2))])
+    writer.persist_index()
+
+    writer.add_sample("ana", vector(3))
+
+    reader = VoiceRepository()
+    assert top_score(reader, "ana") == pytest.approx(1.0, abs=1e-5)
+
+
+def test_persist_index_refreshes_before_saving(flat_settings):
+    first = VoiceRepository()
+    first.save_many([("ana", vector(1))])
+
+    other = VoiceRepository()
+    other.add_sample("ana", vector(3))
+    other.save_many([("luis", vector(2))])
+
+    first.persist_index()
+
+    reader = VoiceRepository()
+    assert set(reader.get_voice_index().ids) == {"ana", "luis"}
+    assert top_score(reader, "ana") == pytest.approx(1.0, abs=1e-5)
+
+
+def test_compaction_by_another_worker_updates_only_touched_voices(flat_settings, monkeypatch):
+    monkeypatch.setattr(settings, "VOICE_STORE_COMPACTION_MIN_ROWS", 4)
+    reader = VoiceRepository()
+    writer = VoiceRepository()
+    writer.save_many([(f"p{i}", vector(i)) for i in range(6)])
+    reader.refresh()
+
+    monkeypatch.setattr(reader._index, "rebuild", lambda items: pytest.fail("reconstrucción completa"))
+    added = []
+    original_add = reader._index.add
+    monkeypatch.setattr(reader._index, "add", lambda person_id, v: (added.append(person_id), original_add(person_id, v)))
+
+    writer.add_sample("p5", vector(50))
+    for i in range(3):
+        writer.delete(f"p{i}")
+    assert writer._store.generation == 1
+
+    index, _, _ = reader.snapshot()
+    assert sorted(index.ids) == ["p3", "p4", "p5"]
+    assert added == ["p5"]
+    assert top_score(reader, "p5") == pytest.approx(1.0, abs=1e-5)
+
+
+def test_in_db_cohort_follows_enrollments(flat_settings, monkeypatch):
+    monkeypatch.setattr(settings, "SCORE_NORM", "s_norm")
+    monkeypatch.setattr(settings, "SCORE_NORM_COHORT_PATH", "")
+    monkeypatch.setattr(settings, "SCORE_NORM_MIN_COHORT", 3)
+    repository = VoiceRepository()
+    assert repository.get_score_normalizer() is None
+
+    repository.save_many([(f"p{i}", vector(i)) for i in range(3)])
+    normalizer = repository.get_score_normalizer()
+    assert normalizer.cohort.shape[0] == 3 and len(normalizer) == 3
+
+    repository.save("p3", vector(3))
+    normalizer = repository.get_score_normalizer()
+    assert normalizer.cohort.shape[0] == 4 and "p3" in normalizer
+
+    repository.delete("p0")
+    repository.delete("p1")
+    assert repository.get_score_normalizer() is None
+
+
+def test_persisted_index_is_patched_with_the_changes_since_save(flat_settings, monkeypatch):
+    writer = VoiceRepository()
+    writer.save_many([(f"p{i}", vector(i)) for i in range(4)])
+    writer.persist_index()
+
+    writer.add_sample("p1", vector(10))
+    writer.delete("p2")
+    writer.save("p4", vector(4))
+
+    monkeypatch.setattr(FaissVoiceIndex, "rebuild", lambda index, items: pytest.fail("reconstrucción completa"))
+    added = []
+    original_add = FaissVoiceIndex.add
+    monkeypatch.setattr(FaissVoiceIndex, "add", lambda index, person_id, v: (added.append(person_id), original_add(index, person_id, v)))
+
+    reader = VoiceRepository()
+
+    assert sorted(reader.get_voice_index().ids) == ["p0", "p1", "p3", "p4"]
+    assert sorted(added) == ["p1", "p4"]
+    assert top_score(reader, "p1") == pytest.approx(1.0, abs=1e-5)
+
+
+def test_loading_an_hnsw_index_with_many_removals_rebuilds_it(flat_settings, monkeypatch):
+    monkeypatch.setattr(settings, "VOICE_INDEX_TYPE", "hnsw")
+    writer = VoiceRepository()
+    writer.save_many([(f"p{i}", vector(i)) for i in range(5)])
+    writer.persist_index()
+    for i in range(2):
+        writer.delete(f"p{i}")
+
+    rebuilds = []
+    original_rebuild = FaissVoiceIndex.rebuild
+    monkeypatch.setattr(FaissVoiceIndex, "rebuild", lambda index, items: (rebuilds.append(1), original_rebuild(index, items)))
+
+    reader = VoiceRepository()
+
+    assert rebuilds == [1]
+    assert not reader._index.needs_rebuild
+    assert sorted(reader.get_voice_index().ids) == ["p2", "p3", "p4"]